@@ -0,0 +1,95 @@
+"""Benchmark JSONL row encoding: the original double json.dumps against RowEncoder.
+
+Usage:
+    uv run python -m benchmarks.bench_encode [--features N] [--vertices N] [--properties N]
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+from benchmarks.bench_reproject import make_geometries
+from rextag.convert import RowEncoder
+
+
+def make_features(features: int, vertices: int, properties: int) -> list[dict]:
+    """Polygon features in WGS84 with a mix of string, int and float properties."""
+    geoms = make_geometries("Polygon", features, vertices)
+    # Scale the synthetic state-plane rings down to lon/lat-sized numbers.
+    for geom in geoms:
+        geom["coordinates"] = [[[x / 1e5 - 180.0, y / 1e5] for x, y in ring] for ring in geom["coordinates"]]
+    return [
+        {
+            "geometry": geom,
+            "properties": {
+                f"FIELD_{j}": (f"value {i}" if j % 3 == 0 else i * j if j % 3 == 1 else i / (j + 1))
+                for j in range(properties)
+            },
+        }
+        for i, geom in enumerate(geoms)
+    ]
+
+
+def encode_original(feature: dict, source_file: str, layer_name: str) -> bytes:
+    """The original path: json.dumps the geometry, build a row dict, json.dumps it again."""
+    geom = feature.get("geometry")
+    row = {"geometry": json.dumps(geom) if geom is not None else None}
+    for key, value in feature.get("properties", {}).items():
+        row[key] = value
+    row["_loaded_at"] = datetime.now(timezone.utc).isoformat()
+    row["_source_file"] = source_file
+    row["_layer_name"] = layer_name
+    return json.dumps(row).encode()
+
+
+def _rate(features: list[dict], encode) -> float:
+    start = time.perf_counter()
+    for feature in features:
+        encode(feature)
+    elapsed = time.perf_counter() - start
+    return len(features) / elapsed if elapsed else float("inf")
+
+
+def run(features: int, vertices: int, properties: int) -> list[dict]:
+    data = make_features(features, vertices, properties)
+    results = [{
+        "encoder": "original",
+        "features_per_s": round(_rate(data, lambda f: encode_original(f, "bench.gdb", "bench"))),
+    }]
+
+    backends = ["stdlib"]
+    try:
+        import orjson  # noqa: F401
+
+        backends.append("orjson")
+    except ImportError:
+        pass
+
+    for backend in backends:
+        encoder = RowEncoder("bench.gdb", "bench", backend=backend)
+        results.append({
+            "encoder": backend,
+            "features_per_s": round(_rate(data, lambda f: encoder.encode(f, f["geometry"]))),
+        })
+
+    baseline = results[0]["features_per_s"]
+    for result in results:
+        result.update(features=features, vertices_per_feature=vertices, properties=properties)
+        result["speedup"] = round(result["features_per_s"] / baseline, 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--features", type=int, default=20000)
+    parser.add_argument("--vertices", type=int, default=32)
+    parser.add_argument("--properties", type=int, default=12)
+    args = parser.parse_args()
+
+    for result in run(args.features, args.vertices, args.properties):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""End-to-end throughput benchmarks: conversion, layer extract, unzip and a full extract run.
+
+Generates a synthetic geodatabase, then times convert_features,
+extract_layer_to_jsonl, unzip_geodatabase and run_extract (against the
+in-process fake GCS server from the test suite). Each benchmark runs in a
+fresh process so its peak RSS is its own. Every result reports
+features/s, MB/s and peak RSS; with --baseline, a drop in features/s of
+more than --tolerance against an earlier --output file exits non-zero.
+
+Run it from the root of a source checkout: the run_extract benchmark
+serves its zip from tests/fake_gcs.py, so the tests package must be
+importable.
+
+Usage:
+    uv run python -m benchmarks.bench_pipeline [--driver OpenFileGDB|GPKG] [--features N]
+        [--vertices N] [--properties N] [--width N] [--epsg N] [--output FILE] [--baseline FILE]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import fiona
+import yaml
+
+from benchmarks.synthetic import DEFAULT_EPSG, dir_size, make_geodatabase, zip_dir
+from rextag.convert import convert_features
+from rextag.extract import extract_layer_to_jsonl, list_layers, unzip_geodatabase
+
+DATA_DROP = "2026-01"
+
+
+def _peak_rss_mb() -> float:
+    """This process's peak resident set size (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1e6 if sys.platform == "darwin" else 1e3), 1)
+
+
+def _result(name: str, features: int, nbytes: int, seconds: float, **extra) -> dict:
+    return {
+        "benchmark": name,
+        "features": features,
+        "mb": round(nbytes / 1e6, 2),
+        "seconds": round(seconds, 4),
+        "features_per_s": round(features / seconds) if seconds else None,
+        "mb_per_s": round(nbytes / 1e6 / seconds, 2) if seconds else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        **extra,
+    }
+
+
+def bench_convert(gdb_path: str) -> dict:
+    """convert_features over one layer held in memory; MB is JSONL written."""
+    layer = list_layers(gdb_path)[0]
+    with fiona.open(gdb_path, layer=layer) as collection:
+        crs = collection.crs.to_string()
+        features = list(collection)
+    start = time.perf_counter()
+    nbytes = sum(len(line) + 1 for line in convert_features(features, crs, "bench", layer))
+    return _result("convert_features", len(features), nbytes, time.perf_counter() - start)
+
+
+def bench_extract_layer(gdb_path: str, work_dir: str, reader: str) -> dict:
+    """extract_layer_to_jsonl for every layer; MB is output written."""
+    count = nbytes = 0
+    start = time.perf_counter()
+    for layer in list_layers(gdb_path):
+        out_path = Path(work_dir) / layer / "data.geojsonl"
+        written = extract_layer_to_jsonl(gdb_path, layer, out_path, "bench", reader=reader)
+        count += written.count
+        nbytes += sum(Path(p).stat().st_size for p in written.paths)
+    return _result("extract_layer_to_jsonl", count, nbytes, time.perf_counter() - start, reader=reader)
+
+
+def bench_unzip(zip_path: str, work_dir: str, features: int) -> dict:
+    """unzip_geodatabase; MB is the uncompressed geodatabase."""
+    start = time.perf_counter()
+    gdb_path = unzip_geodatabase(Path(zip_path), Path(work_dir))
+    elapsed = time.perf_counter() - start
+    return _result("unzip_geodatabase", features, dir_size(gdb_path), elapsed)
+
+
+def bench_run_extract(zip_path: str, work_dir: str, features: int, jobs: int, reader: str) -> dict:
+    """run_extract of the zip from the test suite's fake GCS server; MB is the source zip."""
+    from rextag.cli import run_extract
+    from tests.fake_gcs import FakeGCSServer
+
+    server = FakeGCSServer().start()
+    os.environ["STORAGE_EMULATOR_HOST"] = server.url
+    try:
+        server.put("bench-source", f"data_drop={DATA_DROP}/bench.zip", Path(zip_path).read_bytes())
+        Path(work_dir).mkdir(parents=True, exist_ok=True)
+        config_path = Path(work_dir) / "config.yml"
+        config_path.write_text(yaml.dump({
+            "gcs": {"staging_bucket": "bench-staging", "staging_prefix": "staged/"},
+            "sources": [{"name": "bench", "uri": f"gs://bench-source/data_drop={DATA_DROP}/bench.zip"}],
+        }))
+        start = time.perf_counter()
+        # Keep the extract's progress lines out of the JSON output.
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_extract(config_path, jobs=jobs, reader=reader, work_dir=Path(work_dir) / "work")
+        elapsed = time.perf_counter() - start
+    finally:
+        server.stop()
+    return _result("run_extract", features, Path(zip_path).stat().st_size, elapsed, jobs=jobs, reader=reader)
+
+
+def _isolated(fn, *args) -> dict:
+    """Run a benchmark in a fresh spawned process, so its peak RSS is not inherited."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def run(args: argparse.Namespace) -> list[dict]:
+    total = args.layers * args.features
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        suffix = "gdb" if args.driver == "OpenFileGDB" else "gpkg"
+        gdb_path = make_geodatabase(
+            tmpdir / "src" / f"bench.{suffix}", args.driver, args.layers, args.features,
+            args.vertices, args.properties, args.width, args.epsg,
+        )
+        results.append(_isolated(bench_convert, str(gdb_path)))
+        results.append(_isolated(bench_extract_layer, str(gdb_path), str(tmpdir / "layers"), args.reader))
+        # unzip and run_extract take zipped FileGDBs.
+        if args.driver == "OpenFileGDB":
+            zip_path = zip_dir(gdb_path, tmpdir / "bench.zip")
+            results.append(_isolated(bench_unzip, str(zip_path), str(tmpdir / "unzipped"), total))
+            results.append(_isolated(
+                bench_run_extract, str(zip_path), str(tmpdir / "extract"), total, args.jobs, args.reader,
+            ))
+    for result in results:
+        result.update(driver=args.driver, vertices_per_feature=args.vertices, properties=args.properties)
+    return results
+
+
+def regressions(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Benchmarks whose features/s fell more than `tolerance` (a fraction) below the baseline."""
+    previous = {r["benchmark"]: r for r in baseline}
+    found = []
+    for result in results:
+        before = previous.get(result["benchmark"])
+        if not before or not before.get("features_per_s") or result["features_per_s"] is None:
+            continue
+        change = result["features_per_s"] / before["features_per_s"] - 1
+        if change < -tolerance:
+            found.append(
+                f"{result['benchmark']}: {result['features_per_s']} features/s vs "
+                f"{before['features_per_s']} in baseline ({change:+.0%})"
+            )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        epilog="Run from the root of a source checkout; the run_extract benchmark imports tests.fake_gcs.",
+    )
+    parser.add_argument("--driver", choices=["OpenFileGDB", "GPKG"], default="OpenFileGDB")
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--features", type=int, default=20_000, help="Rows per layer")
+    parser.add_argument("--vertices", type=int, default=32, help="Vertices per polygon")
+    parser.add_argument("--properties", type=int, default=12, help="Property columns per layer")
+    parser.add_argument("--width", type=int, default=16, help="Characters per string property")
+    parser.add_argument("--epsg", type=int, default=DEFAULT_EPSG, help="Source CRS (4326 skips reprojection)")
+    parser.add_argument("--reader", choices=["fiona", "arrow", "auto"], default="fiona")
+    parser.add_argument("--jobs", type=int, default=1, help="Conversion processes for run_extract")
+    parser.add_argument("--output", type=Path, help="Write results (and the parameters) to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="Earlier --output file to compare features/s against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed fractional slowdown")
+    args = parser.parse_args()
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline else None
+
+    results = run(args)
+    for result in results:
+        print(json.dumps(result))
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "tolerance")},
+            "results": results,
+        }, indent=2) + "\n")
+
+    if baseline is not None:
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print(f"Regression: {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
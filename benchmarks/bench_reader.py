@@ -0,0 +1,59 @@
+"""Benchmark reading layers in Arrow batches against fiona's per-feature iterator.
+
+Usage:
+    uv run python -m benchmarks.bench_reader [--features N] [--vertices N]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import make_filegdb
+from rextag.config import OutputConfig
+from rextag.extract import extract_layer_to_jsonl, list_layers
+
+
+def run(features: int, vertices: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        gdb_path = make_filegdb(tmpdir / "bench.gdb", layers=1, features=features, vertices=vertices)
+        layer = list_layers(gdb_path)[0]
+
+        for fmt, ext in (("jsonl", "geojsonl"), ("parquet", "parquet")):
+            output = OutputConfig(format=fmt)
+            for reader in ("fiona", "arrow"):
+                out_path = tmpdir / "out" / f"{reader}.{ext}"
+                start = time.perf_counter()
+                written = extract_layer_to_jsonl(gdb_path, layer, out_path, "bench", output=output, reader=reader)
+                elapsed = time.perf_counter() - start
+                results.append({
+                    "format": fmt,
+                    "reader": reader,
+                    "features": written.count,
+                    "vertices_per_feature": vertices,
+                    "seconds": round(elapsed, 4),
+                    "features_per_s": round(written.count / elapsed) if elapsed else None,
+                })
+                out_path.unlink()
+
+    for fmt in ("jsonl", "parquet"):
+        fiona_run, arrow_run = (r for r in results if r["format"] == fmt)
+        arrow_run["speedup"] = round(fiona_run["seconds"] / arrow_run["seconds"], 2) if arrow_run["seconds"] else None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--features", type=int, default=50000)
+    parser.add_argument("--vertices", type=int, default=32)
+    args = parser.parse_args()
+
+    for result in run(args.features, args.vertices):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
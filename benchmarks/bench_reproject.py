@@ -0,0 +1,105 @@
+"""Benchmark vectorized reprojection against the per-vertex Transformer path.
+
+Usage:
+    uv run python -m benchmarks.bench_reproject [--features N] [--vertices N]
+"""
+
+import argparse
+import json
+import math
+import time
+
+from pyproj import Transformer
+
+from rextag.convert import reproject_geometries
+
+# NAD83 / California zone 3 (feet), centred on San Francisco.
+SOURCE_CRS = "EPSG:2227"
+ORIGIN = (6000000.0, 2100000.0)
+
+
+def _ring(cx: float, cy: float, vertices: int, radius: float = 500.0) -> list[tuple]:
+    ring = [
+        (cx + radius * math.cos(2 * math.pi * i / vertices), cy + radius * math.sin(2 * math.pi * i / vertices))
+        for i in range(vertices)
+    ]
+    ring.append(ring[0])
+    return ring
+
+
+def make_geometries(geom_type: str, features: int, vertices: int) -> list[dict]:
+    """Synthetic geometries of one type, each with roughly `vertices` positions."""
+    geoms = []
+    for i in range(features):
+        cx, cy = ORIGIN[0] + (i % 100) * 1000.0, ORIGIN[1] + (i // 100) * 1000.0
+        if geom_type == "Polygon":
+            coords = [_ring(cx, cy, vertices)]
+        elif geom_type == "MultiPolygon":
+            half = max(vertices // 2, 3)
+            coords = [[_ring(cx, cy, half)], [_ring(cx + 2000.0, cy, half)]]
+        elif geom_type == "LineString":
+            coords = _ring(cx, cy, vertices)[:-1]
+        else:
+            raise ValueError(f"Unsupported geometry type: {geom_type}")
+        geoms.append({"type": geom_type, "coordinates": coords})
+    return geoms
+
+
+def reproject_per_point(geometry: dict, transformer: Transformer) -> dict:
+    """The original implementation: one Transformer.transform call per vertex."""
+
+    def transform_coords(coords):
+        if isinstance(coords[0], (int, float)):
+            x, y = transformer.transform(coords[0], coords[1])
+            return [x, y] if len(coords) == 2 else [x, y] + list(coords[2:])
+        return [transform_coords(c) for c in coords]
+
+    return {"type": geometry["type"], "coordinates": transform_coords(geometry["coordinates"])}
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(features: int, vertices: int, batch_size: int) -> list[dict]:
+    transformer = Transformer.from_crs(SOURCE_CRS, "EPSG:4326", always_xy=True)
+    results = []
+
+    for geom_type in ("Polygon", "MultiPolygon", "LineString"):
+        geoms = make_geometries(geom_type, features, vertices)
+
+        per_point = _time(lambda: [reproject_per_point(g, transformer) for g in geoms])
+        vectorized = _time(
+            lambda: [
+                out
+                for i in range(0, len(geoms), batch_size)
+                for out in reproject_geometries(geoms[i:i + batch_size], transformer)
+            ]
+        )
+
+        results.append({
+            "geometry_type": geom_type,
+            "features": features,
+            "vertices_per_feature": vertices,
+            "per_point_s": round(per_point, 4),
+            "vectorized_s": round(vectorized, 4),
+            "speedup": round(per_point / vectorized, 1) if vectorized else None,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--features", type=int, default=2000)
+    parser.add_argument("--vertices", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    for result in run(args.features, args.vertices, args.batch_size):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
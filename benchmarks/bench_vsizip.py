@@ -0,0 +1,64 @@
+"""Benchmark reading a zipped FileGDB in place (/vsizip/) against unzipping it first.
+
+Usage:
+    uv run python -m benchmarks.bench_vsizip [--layers N] [--features N]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import dir_size, make_filegdb, zip_dir
+from rextag.extract import extract_layer_to_jsonl, list_layers, open_geodatabase
+
+
+def run_mode(zip_path: Path, mode: str, work_dir: Path) -> dict:
+    """Open the zip in one mode, convert every layer, and measure time and disk."""
+    start = time.perf_counter()
+    gdb_path = open_geodatabase(zip_path, work_dir / "extracted", mode=mode)
+    open_s = time.perf_counter() - start
+
+    # Peak disk for the geodatabase is the zip plus whatever was unpacked.
+    gdb_disk = zip_path.stat().st_size + dir_size(work_dir)
+
+    features = 0
+    for layer in list_layers(gdb_path):
+        output = extract_layer_to_jsonl(gdb_path, layer, work_dir / "out" / layer / "data.geojsonl", "bench")
+        features += output.count
+        for path in output.paths:
+            path.unlink()
+    total_s = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "read_in_place": isinstance(gdb_path, str),
+        "open_s": round(open_s, 4),
+        "total_s": round(total_s, 4),
+        "features": features,
+        "peak_gdb_disk_mb": round(gdb_disk / 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--features", type=int, default=20_000)
+    parser.add_argument("--vertices", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        gdb = make_filegdb(tmpdir / "src" / "bench.gdb", args.layers, args.features, args.vertices)
+        zip_path = zip_dir(gdb, tmpdir / "bench.zip")
+        print(json.dumps({"zip_mb": round(zip_path.stat().st_size / 1e6, 2), "gdb_mb": round(dir_size(gdb) / 1e6, 2)}))
+
+        for mode in ("extract", "vsizip"):
+            work_dir = tmpdir / mode
+            work_dir.mkdir()
+            print(json.dumps(run_mode(zip_path, mode, work_dir)))
+
+
+if __name__ == "__main__":
+    main()
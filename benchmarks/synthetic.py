@@ -0,0 +1,89 @@
+"""Synthetic geodatabases for benchmarks."""
+
+import math
+import zipfile
+from pathlib import Path
+
+import fiona
+from fiona.crs import CRS
+
+# NAD83 / California zone 3 (feet): forces reprojection to EPSG:4326.
+DEFAULT_EPSG = 2227
+ORIGIN = (6000000.0, 2100000.0)
+
+
+def _polygon(i: int, vertices: int) -> dict:
+    cx, cy = ORIGIN[0] + (i % 1000) * 1000.0, ORIGIN[1] + (i // 1000) * 1000.0
+    ring = [
+        (cx + 400.0 * math.cos(2 * math.pi * k / vertices), cy + 400.0 * math.sin(2 * math.pi * k / vertices))
+        for k in range(vertices)
+    ]
+    ring.append(ring[0])
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def _schema(properties: int, width: int) -> dict:
+    """Polygon schema with `properties` columns cycling str (of `width` chars), float and int."""
+    types = (f"str:{width}", "float", "int")
+    return {
+        "geometry": "Polygon",
+        "properties": {f"FIELD_{j}": types[j % 3] for j in range(properties)},
+    }
+
+
+def _properties(i: int, properties: int, width: int) -> dict:
+    values = (lambda j: f"Feature {i} {j}".ljust(width, "x")[:width], lambda j: 1000.0 + i + j, lambda j: (i + j) % 97)
+    return {f"FIELD_{j}": values[j % 3](j) for j in range(properties)}
+
+
+def make_geodatabase(
+    path: Path,
+    driver: str = "OpenFileGDB",
+    layers: int = 2,
+    features: int = 10_000,
+    vertices: int = 32,
+    properties: int = 3,
+    width: int = 16,
+    epsg: int = DEFAULT_EPSG,
+) -> Path:
+    """Write a FileGDB (or GeoPackage, with driver="GPKG") of `layers` polygon layers.
+
+    Each layer has `features` rows of `vertices`-vertex polygons in EPSG `epsg`
+    (a projected CRS by default, so rextag reprojects them), with `properties`
+    columns whose strings are `width` characters long.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    schema = _schema(properties, width)
+    for n in range(layers):
+        with fiona.open(
+            path, "w", driver=driver, schema=schema, crs=CRS.from_epsg(epsg), layer=f"layer_{n}"
+        ) as dst:
+            dst.writerecords(
+                {"geometry": _polygon(i, vertices), "properties": _properties(i, properties, width)}
+                for i in range(features)
+            )
+    return path
+
+
+def make_filegdb(
+    path: Path,
+    layers: int = 2,
+    features: int = 10_000,
+    vertices: int = 32,
+    epsg: int = DEFAULT_EPSG,
+) -> Path:
+    """Write a FileGDB with `layers` polygon layers of `features` rows each."""
+    return make_geodatabase(path, "OpenFileGDB", layers, features, vertices, epsg=epsg)
+
+
+def zip_dir(src: Path, zip_path: Path) -> Path:
+    """Zip a directory (deflate), keeping its name as the archive's top level."""
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for f in sorted(src.rglob("*")):
+            zf.write(f, f.relative_to(src.parent))
+    return zip_path
+
+
+def dir_size(path: Path) -> int:
+    """Total bytes of regular files under path."""
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
@@ -0,0 +1,176 @@
+"""Batched layer reading through OGR's Arrow stream interface (pyogrio).
+
+Features are read as Arrow record batches instead of one fiona dict at a
+time. Geometry arrives as WKB, is reprojected for the whole batch at once
+with shapely, and is written back out as WKB (Parquet) or GeoJSON text
+(JSONL) without building per-feature coordinate lists.
+"""
+
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyogrio
+    import shapely
+except ImportError as e:  # pragma: no cover - depends on the environment
+    raise ImportError(
+        "the arrow reader requires pyogrio, pyarrow and shapely: pip install 'rextag[arrow]'"
+    ) from e
+
+from rextag.config import OutputConfig
+from rextag.convert import RowEncoder, get_transformer, needs_reprojection
+
+# Features per Arrow batch read from OGR.
+ARROW_BATCH_SIZE = 65_536
+
+
+def read_layer_batches(
+    gdb_path: Path | str,
+    layer_name: str,
+    start: int | None = None,
+    stop: int | None = None,
+    batch_size: int = ARROW_BATCH_SIZE,
+    datetime_as_string: bool = False,
+) -> Iterator[pa.RecordBatch]:
+    """Read features [start, stop) of a layer as record batches.
+
+    The geometry column, if any, is renamed to `geometry` (WKB); property
+    columns keep their names and Arrow types.
+    """
+    skip = start or 0
+    remaining = None if stop is None else stop - skip
+    with pyogrio.open_arrow(
+        str(gdb_path),
+        layer=layer_name,
+        skip_features=skip,
+        batch_size=batch_size,
+        use_pyarrow=True,
+        datetime_as_string=datetime_as_string,
+    ) as (meta, reader):
+        geometry_name = (meta["geometry_name"] or "wkb_geometry") if meta["geometry_type"] else None
+        for batch in reader:
+            # OGR's Arrow stream has no feature limit, so stop reading by hand.
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                batch = batch.slice(0, remaining)
+                remaining -= batch.num_rows
+            if geometry_name is not None and geometry_name != "geometry":
+                names = ["geometry" if n == geometry_name else n for n in batch.schema.names]
+                batch = pa.RecordBatch.from_arrays(batch.columns, names=names)
+            yield batch
+
+
+def reproject_wkb(wkb: pa.Array, crs: str) -> np.ndarray:
+    """Parse a WKB column and reproject it to EPSG:4326 in one call per batch.
+
+    Returns an array of shapely geometries (None for null geometries).
+    Z values are carried through unchanged.
+    """
+    geoms = shapely.from_wkb(wkb.to_numpy(zero_copy_only=False))
+    if not needs_reprojection(crs):
+        return geoms
+
+    transformer = get_transformer(crs)
+
+    def transform(coords: np.ndarray) -> np.ndarray:
+        out = coords.copy()
+        out[:, 0], out[:, 1] = transformer.transform(coords[:, 0], coords[:, 1])
+        return out
+
+    return shapely.transform(geoms, transform, include_z=None)
+
+
+def _property_columns(batch: pa.RecordBatch) -> pa.Table:
+    """Property columns for JSONL, with dates and times as ISO strings like fiona gives."""
+    table = pa.Table.from_batches([batch])
+    names = [n for n in batch.schema.names if n != "geometry"]
+    for i, field in enumerate(table.schema):
+        if pa.types.is_date(field.type):
+            table = table.set_column(i, field.name, pc.cast(table.column(i), pa.string()))
+        elif pa.types.is_time(field.type):
+            # Microseconds, dropped when zero, as time.isoformat() does.
+            text = pc.cast(pc.cast(table.column(i), pa.time64("us")), pa.string())
+            table = table.set_column(i, field.name, pc.replace_substring_regex(text, r"\.0+$", ""))
+    return table.select(names)
+
+
+def encode_batch_jsonl(batch: pa.RecordBatch, crs: str, encoder: RowEncoder) -> Iterator[bytes]:
+    """Encode a batch (read with datetime_as_string) as JSONL rows without newlines.
+
+    Date and time columns are written as ISO strings, matching the fiona reader.
+    """
+    if "geometry" in batch.schema.names:
+        geojson = shapely.to_geojson(reproject_wkb(batch.column("geometry"), crs)).tolist()
+    else:
+        geojson = [None] * batch.num_rows
+    rows = _property_columns(batch).to_pylist()
+    encode = encoder.encode_geojson
+    for geometry, props in zip(geojson, rows):
+        yield encode(geometry, props)
+
+
+def batch_to_parquet(
+    batch: pa.RecordBatch,
+    crs: str,
+    schema: pa.Schema,
+    source_file: str,
+    layer_name: str,
+    loaded_at: datetime | None = None,
+) -> pa.RecordBatch:
+    """Convert a batch to the layer's GeoParquet schema (see parquet.arrow_schema)."""
+    n = batch.num_rows
+    columns = []
+    for field in schema:
+        if field.name == "geometry":
+            wkb = shapely.to_wkb(reproject_wkb(batch.column("geometry"), crs))
+            columns.append(pa.array(wkb, type=field.type))
+        elif field.name == "_loaded_at":
+            columns.append(pa.array([loaded_at or datetime.now(timezone.utc)] * n, type=field.type))
+        elif field.name == "_source_file":
+            columns.append(pa.array([source_file] * n, type=field.type))
+        elif field.name == "_layer_name":
+            columns.append(pa.array([layer_name] * n, type=field.type))
+        else:
+            columns.append(pc.cast(batch.column(field.name), field.type))
+    return pa.record_batch(columns, schema=schema)
+
+
+def write_layer(
+    gdb_path: Path | str,
+    layer_name: str,
+    fiona_schema: dict,
+    crs: str,
+    source_file: str,
+    sink,
+    output: OutputConfig,
+    start: int | None = None,
+    stop: int | None = None,
+    loaded_at: datetime | None = None,
+) -> int:
+    """Read features [start, stop) in Arrow batches and write them to a sink.
+
+    Writes JSONL or GeoParquet per `output`; returns the feature count.
+    The sink is not closed.
+    """
+    if output.format == "parquet":
+        from rextag.parquet import arrow_schema, write_batches
+
+        schema = arrow_schema(fiona_schema)
+        batches = (
+            batch_to_parquet(batch, crs, schema, source_file, layer_name, loaded_at)
+            for batch in read_layer_batches(gdb_path, layer_name, start, stop)
+        )
+        return write_batches(batches, schema, sink, compression=output.compression)
+
+    encoder = RowEncoder(source_file, layer_name, backend=output.json_encoder, loaded_at=loaded_at)
+    count = 0
+    for batch in read_layer_batches(gdb_path, layer_name, start, stop, datetime_as_string=True):
+        for row in encode_batch_jsonl(batch, crs, encoder):
+            sink.write(row + b"\n")
+            count += 1
+    return count
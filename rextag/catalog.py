@@ -0,0 +1,132 @@
+"""Persistent schema catalog: the layers and schemas scan last saw in each source zip.
+
+Entries are keyed by zip URI and record the object generation they were read
+from, so a zip whose generation is unchanged never needs to be opened again.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from rextag.config import OutputConfig
+from rextag.scan import DatasetInfo, LayerInfo
+
+DEFAULT_CATALOG_PATH = Path(".rextag") / "catalog.json"
+_VERSION = 1
+
+
+@dataclass
+class CatalogLayer:
+    """A layer as recorded in the catalog."""
+
+    name: str
+    geometry_type: str | None
+    fiona_schema: dict
+
+
+@dataclass
+class CatalogEntry:
+    """What scan read from one zip, at one object generation."""
+
+    zip_uri: str
+    generation: int
+    dataset: str
+    schema_hash: str
+    layers: list[CatalogLayer] = field(default_factory=list)
+
+    def dataset_info(self, output: OutputConfig | None = None) -> DatasetInfo:
+        """Rebuild the DatasetInfo the entry was recorded from."""
+        output = output or OutputConfig()
+        return DatasetInfo(
+            name=self.dataset,
+            layers=[
+                LayerInfo(
+                    name=layer.name,
+                    geometry_type=layer.geometry_type,
+                    fiona_schema=layer.fiona_schema,
+                    output=output,
+                )
+                for layer in self.layers
+            ],
+        )
+
+
+def schema_hash(dataset: DatasetInfo) -> str:
+    """Stable hash of a dataset's layer names, geometry types and field schemas."""
+    doc = [
+        [layer.name, layer.geometry_type, list(layer.fiona_schema["properties"].items())]
+        for layer in dataset.layers
+    ]
+    return hashlib.sha256(json.dumps(doc, separators=(",", ":")).encode()).hexdigest()
+
+
+class Catalog:
+    """JSON-backed map of zip URI -> CatalogEntry.
+
+    save() only rewrites the file when an entry was added or changed.
+    """
+
+    def __init__(self, path: Path, entries: dict[str, CatalogEntry] | None = None):
+        self.path = Path(path)
+        self.entries = entries or {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> "Catalog":
+        """Read a catalog, or start an empty one if the file does not exist."""
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        data = json.loads(path.read_text())
+        if data.get("version") != _VERSION:
+            return cls(path)
+        entries = {}
+        for raw in data["entries"]:
+            layers = [CatalogLayer(**layer) for layer in raw.pop("layers")]
+            entries[raw["zip_uri"]] = CatalogEntry(**raw, layers=layers)
+        return cls(path, entries)
+
+    def get(self, zip_uri: str, generation: int | None = None) -> CatalogEntry | None:
+        """The entry for a zip; with `generation`, only if it was read from that generation."""
+        entry = self.entries.get(zip_uri)
+        if entry is None or (generation is not None and entry.generation != generation):
+            return None
+        return entry
+
+    def record(self, zip_uri: str, generation: int, dataset: DatasetInfo) -> CatalogEntry:
+        """Store what was read from a zip at `generation`."""
+        entry = CatalogEntry(
+            zip_uri=zip_uri,
+            generation=generation,
+            dataset=dataset.name,
+            schema_hash=schema_hash(dataset),
+            layers=[
+                CatalogLayer(
+                    name=layer.name,
+                    geometry_type=layer.geometry_type,
+                    fiona_schema=dict(layer.fiona_schema),
+                )
+                for layer in dataset.layers
+            ],
+        )
+        if self.entries.get(zip_uri) != entry:
+            self.entries[zip_uri] = entry
+            self._dirty = True
+        return entry
+
+    def save(self) -> bool:
+        """Write the catalog if it changed. Returns whether it was written."""
+        if not self._dirty:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        doc = {
+            "version": _VERSION,
+            "entries": [asdict(self.entries[uri]) for uri in sorted(self.entries)],
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(doc, indent=2) + "\n")
+        os.replace(tmp, self.path)
+        self._dirty = False
+        return True
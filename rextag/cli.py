@@ -1,22 +1,29 @@
 """CLI entry point for rextag pipeline."""
 
+import multiprocessing
+import signal
 import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 
 import click
+import fiona
 
-from rextag.config import load_config
+from rextag import gcs
+from rextag.catalog import DEFAULT_CATALOG_PATH, Catalog
+from rextag.config import COMPRESSIONS, FORMATS, OutputConfig, load_config
 from rextag.extract import (
+    READERS,
     download_from_gcs,
-    list_blobs,
     parse_data_drop,
-    has_geometry,
-    unzip_geodatabase,
-    list_layers,
-    extract_layer_to_jsonl,
+    open_geodatabase,
+    remote_geodatabase,
 )
-from rextag.load import upload_to_gcs
-from rextag.scan import inspect_geodatabase, generate_dbt_files
+from rextag.load import get_bq_client, load_source, partition_for
+from rextag.metrics import RunReport, StageMetrics, measure
+from rextag.pipeline import DEFAULT_WORK_DIR, ExtractScheduler, SchedulerLimits
+from rextag.profiling import DEFAULT_PROFILE_DIR, SORT_KEYS, ProfileSettings, prepare, summarize
+from rextag.scan import DatasetInfo, inspect_geodatabase, generate_dbt_files
 
 
 @click.group()
@@ -30,47 +37,282 @@ def run_scan(
     output_dir: Path,
     staging_bucket: str,
     staging_prefix: str,
+    output: OutputConfig | None = None,
+    download: bool = False,
+    catalog_path: Path = DEFAULT_CATALOG_PATH,
+    jobs: int = 1,
+    metrics_out: Path | None = None,
 ):
-    """Scan all zips under a GCS prefix, discover schemas, generate dbt files."""
+    """Scan all zips under a GCS prefix, discover schemas, generate dbt files.
+
+    `output` must match the output config that extract will use. Schemas
+    are read from the zips in place with range requests; zips GDAL cannot
+    read that way, or all zips if `download` is set, are downloaded first.
+    Zips whose generation matches the catalog at `catalog_path` are not
+    opened at all, and dbt files are only rewritten when their content
+    changes.
+
+    With `jobs` > 1, zips are inspected in that many worker processes
+    (GDAL holds the GIL while reading, so threads would not overlap).
+    Results are still reported and written in listing order, one dataset
+    at a time, so the output matches a serial scan.
+
+    With `metrics_out`, a run report of each zip's inspect (and download)
+    and dbt generate stages is written there (see RunReport.write).
+    """
+    report = RunReport("scan") if metrics_out is not None else None
     click.echo(f"Scanning {prefix}")
-    zip_uris = list_blobs(prefix, suffix=".zip")
-    click.echo(f"Found {len(zip_uris)} zip files")
+    catalog = Catalog.load(catalog_path)
+    zip_generations = gcs.list_generations(prefix, suffix=".zip")
+    click.echo(f"Found {len(zip_generations)} zip files")
+
+    stale = [uri for uri, generation in zip_generations.items() if catalog.get(uri, generation) is None]
+    pool = None
+    futures: dict[str, Future] = {}
+    if jobs > 1 and len(stale) > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=min(jobs, len(stale)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=gcs.configure,
+            initargs=(gcs.settings(),),
+        )
+        futures = {uri: pool.submit(_scan_zip, uri, output, download) for uri in stale}
+
+    try:
+        for zip_uri, generation in zip_generations.items():
+            _report_dataset(
+                zip_uri,
+                generation,
+                catalog,
+                futures.get(zip_uri),
+                output,
+                download,
+                output_dir,
+                staging_bucket,
+                staging_prefix,
+                report,
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if report is not None:
+            report.write(metrics_out)
 
-    for zip_uri in zip_uris:
-        filename = zip_uri.rsplit("/", 1)[-1]
-        dataset_name = filename.replace(".zip", "").lower()
+    catalog.save()
+    click.echo(f"\nScan complete. Review generated files in {output_dir}")
 
-        click.echo(f"\n  Dataset: {dataset_name} ({filename})")
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir = Path(tmpdir)
-            zip_path = tmpdir / filename
+def _scan_zip(
+    zip_uri: str, output: OutputConfig | None, download: bool
+) -> tuple[DatasetInfo, list[str], list[StageMetrics]]:
+    """Inspect one zip, returning its dataset, the progress lines to print and its stage metrics."""
+    log: list[str] = []
+    metrics: list[StageMetrics] = []
+    dataset_name = _dataset_name(zip_uri)
+    with measure("inspect", dataset_name) as inspect:
+        metrics.append(inspect)
+        dataset = _inspect_zip(zip_uri, dataset_name, output, download, log, metrics)
+    return dataset, log, metrics
+
+
+def _report_dataset(
+    zip_uri: str,
+    generation: int,
+    catalog: Catalog,
+    future: Future | None,
+    output: OutputConfig | None,
+    download: bool,
+    output_dir: Path,
+    staging_bucket: str,
+    staging_prefix: str,
+    report: RunReport | None = None,
+) -> None:
+    """Print one dataset's scan results and write its dbt files."""
+    filename = zip_uri.rsplit("/", 1)[-1]
+    click.echo(f"\n  Dataset: {_dataset_name(zip_uri)} ({filename})")
+    entry = catalog.get(zip_uri, generation)
+    if entry is not None:
+        click.echo(f"    Unchanged since last scan (generation {generation})")
+        dataset = entry.dataset_info(output)
+    else:
+        previous = catalog.get(zip_uri)
+        dataset, log, metrics = future.result() if future is not None else _scan_zip(zip_uri, output, download)
+        for line in log:
+            click.echo(line)
+        if report is not None:
+            report.add(*metrics)
+        entry = catalog.record(zip_uri, generation, dataset)
+        if previous is not None:
+            changed = previous.schema_hash != entry.schema_hash
+            click.echo(f"    New generation {generation}, schema {'changed' if changed else 'unchanged'}")
+
+    for layer in dataset.layers:
+        ext = layer.file_extension
+        geom_str = layer.geometry_type or "no geometry"
+        n_cols = len(layer.fiona_schema["properties"])
+        click.echo(f"      {layer.name}: {geom_str}, {n_cols} fields -> .{ext}")
+
+    click.echo("    Generating dbt files...")
+    with measure("generate", dataset.name) as metrics:
+        out_path = generate_dbt_files(dataset, output_dir, staging_bucket, staging_prefix)
+    if report is not None:
+        report.add(metrics)
+    click.echo(f"    Written to {out_path}")
+
+
+def _dataset_name(zip_uri: str) -> str:
+    return zip_uri.rsplit("/", 1)[-1].replace(".zip", "").lower()
+
+
+def _inspect_zip(
+    zip_uri: str,
+    dataset_name: str,
+    output: OutputConfig | None,
+    download: bool,
+    log: list[str],
+    metrics: list[StageMetrics] | None = None,
+) -> DatasetInfo:
+    if not download:
+        with fiona.Env(**gcs.gdal_http_options()):
+            gdb_path = remote_geodatabase(zip_uri)
+            if gdb_path is not None:
+                log.append("    Inspecting layers in place...")
+                return inspect_geodatabase(gdb_path, dataset_name, output=output)
+        log.append("    Cannot read in place")
+
+    filename = zip_uri.rsplit("/", 1)[-1]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        zip_path = tmpdir / filename
 
-            click.echo("    Downloading...")
+        log.append("    Downloading...")
+        with measure("download", dataset_name) as download_metrics:
             download_from_gcs(zip_uri, zip_path)
+            download_metrics.bytes_in = zip_path.stat().st_size
+        if metrics is not None:
+            metrics.append(download_metrics)
+
+        log.append("    Opening...")
+        gdb_path = open_geodatabase(zip_path, tmpdir / "extracted")
+
+        log.append("    Inspecting layers...")
+        return inspect_geodatabase(gdb_path, dataset_name, output=output)
+
+
+def run_extract(
+    config_path: Path,
+    source_name: str | None = None,
+    jobs: int = 1,
+    splits: int = 1,
+    max_sources: int = 1,
+    downloads: int = 2,
+    uploads: int = 4,
+    gdb_mode: str = "vsizip",
+    stream: bool = False,
+    reader: str = "fiona",
+    force: bool = False,
+    resume: bool = False,
+    work_dir: Path | None = DEFAULT_WORK_DIR,
+    metrics_out: Path | None = None,
+    profile: bool = False,
+    profile_memory: bool = False,
+):
+    """Run extraction for all (or one) configured sources.
+
+    Up to `max_sources` sources are in flight at once. Downloads, layer
+    conversions (`jobs` worker processes) and uploads each have their own
+    cap, and large layers are converted in up to `splits` parallel ranges.
+    Geodatabases are read in place from the zip unless `gdb_mode` is
+    "extract" (or GDAL cannot read them that way). With `stream`, converted
+    output goes straight into resumable GCS uploads with no local staging file.
+    Layers are read feature by feature through fiona, or in Arrow batches
+    when `reader` asks for it (see resolve_reader). Sources whose zip
+    is unchanged since it was last fully staged are skipped unless `force`.
+
+    Each staged layer is checkpointed, and downloads stay in `work_dir` until
+    their source is done, so after a crash `resume` picks up where the last
+    run stopped. SIGTERM stops the run once in-flight layers are staged.
+
+    With `metrics_out`, a run report of each source's and layer's stages
+    is written there, even if the run fails (see RunReport.write).
+
+    With `profile`, each layer's conversion is profiled with cProfile (and
+    tracemalloc, with `profile_memory`). Dumps go to a profile directory
+    next to the run report, or DEFAULT_PROFILE_DIR without one.
+    """
+    config = load_config(config_path)
+    gcs.configure(config.transport)
+    sources = config.sources
 
-            click.echo("    Extracting...")
-            gdb_path = unzip_geodatabase(zip_path, tmpdir / "extracted")
-
-            click.echo("    Inspecting layers...")
-            dataset = inspect_geodatabase(gdb_path, dataset_name)
-
-            for layer in dataset.layers:
-                ext = layer.file_extension
-                geom_str = layer.geometry_type or "no geometry"
-                n_cols = len(layer.fiona_schema["properties"])
-                click.echo(f"      {layer.name}: {geom_str}, {n_cols} fields -> .{ext}")
-
-            click.echo("    Generating dbt files...")
-            out_path = generate_dbt_files(dataset, output_dir, staging_bucket, staging_prefix)
-            click.echo(f"    Written to {out_path}")
-
-    click.echo(f"\nScan complete. Review generated files in {output_dir}")
+    if source_name:
+        sources = [s for s in sources if s.name == source_name]
+        if not sources:
+            raise click.ClickException(f"Source '{source_name}' not found in config")
 
+    for source in sources:
+        if parse_data_drop(source.uri) is None:
+            raise click.ClickException(
+                f"Could not parse data_drop from URI: {source.uri}. "
+                "Expected format: .../data_drop=VALUE/..."
+            )
 
-def run_extract(config_path: Path, source_name: str | None = None):
-    """Run extraction for all (or one) configured sources."""
+    limits = SchedulerLimits(sources=max_sources, downloads=downloads, conversions=jobs, uploads=uploads)
+    report = RunReport("extract") if metrics_out is not None else None
+    profile_settings = None
+    if profile or profile_memory:
+        profile_dir = Path(metrics_out).parent / "profile" if metrics_out is not None else DEFAULT_PROFILE_DIR
+        prepare(profile_dir)
+        profile_settings = ProfileSettings(profile_dir, memory=profile_memory)
+    try:
+        scheduler = ExtractScheduler(
+            config,
+            limits,
+            splits=splits,
+            gdb_mode=gdb_mode,
+            stream=stream,
+            reader=reader,
+            force=force,
+            resume=resume,
+            work_dir=work_dir,
+            echo=click.echo,
+            report=report,
+            profile=profile_settings,
+        )
+    except ImportError as e:
+        raise click.ClickException(str(e))
+
+    def on_sigterm(signum, frame):
+        click.echo("SIGTERM received: finishing in-flight layers, then stopping", err=True)
+        scheduler.stop()
+
+    previous_handler = signal.signal(signal.SIGTERM, on_sigterm)
+    failed = []
+    try:
+        failed = scheduler.run(sources)
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        if report is not None:
+            report.failures = failed
+            report.write(metrics_out)
+
+    if profile_settings is not None:
+        click.echo(f"Profiles written to {profile_settings.directory}; see rextag profile-summary")
+    if scheduler.stopped:
+        raise click.ClickException("Stopped by SIGTERM; rerun with --resume to continue from the last checkpoint")
+    if failed:
+        raise click.ClickException(f"{len(failed)} source(s)/layer(s) failed: {', '.join(failed)}")
+
+
+def run_load(config_path: Path, source_name: str | None = None):
+    """Load the layers extract staged for all (or one) configured sources into BigQuery.
+
+    Each layer replaces its data drop's partition of a native table (see
+    rextag.load), so a load can be rerun safely.
+    """
     config = load_config(config_path)
+    if config.bigquery is None:
+        raise click.ClickException("No bigquery section in config; add one with the dataset to load into")
+    gcs.configure(config.transport)
     sources = config.sources
 
     if source_name:
@@ -79,64 +321,44 @@ def run_extract(config_path: Path, source_name: str | None = None):
             raise click.ClickException(f"Source '{source_name}' not found in config")
 
     for source in sources:
-        click.echo(f"Processing source: {source.name} ({source.uri})")
-
         data_drop = parse_data_drop(source.uri)
         if data_drop is None:
             raise click.ClickException(
                 f"Could not parse data_drop from URI: {source.uri}. "
                 "Expected format: .../data_drop=VALUE/..."
             )
+        try:
+            partition_for(data_drop)
+        except ValueError as e:
+            raise click.ClickException(str(e))
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir = Path(tmpdir)
-
-            zip_path = tmpdir / f"{source.name}.zip"
-            click.echo(f"  Downloading {source.uri}...")
-            download_from_gcs(source.uri, zip_path)
-
-            click.echo("  Extracting geodatabase...")
-            gdb_path = unzip_geodatabase(zip_path, tmpdir / "extracted")
-
-            layers = list_layers(gdb_path)
-            click.echo(f"  Found {len(layers)} layers: {', '.join(layers)}")
-
-            import fiona
-
-            for layer in layers:
-                click.echo(f"  Converting layer: {layer}")
-
-                with fiona.open(gdb_path, layer=layer) as collection:
-                    ext = "geojsonl" if has_geometry(collection.schema) else "jsonl"
-
-                local_path = tmpdir / f"data.{ext}"
-                count = extract_layer_to_jsonl(gdb_path, layer, local_path, source.name)
-                click.echo(f"    Wrote {count} features ({ext})")
-
-                gcs_uri = config.hive_staging_path(source.name, layer, data_drop, ext)
-                click.echo(f"    Uploading to {gcs_uri}")
-                upload_to_gcs(local_path, gcs_uri)
-
-                click.echo(f"    Done: {layer}")
-
-        click.echo(f"Completed: {source.name}")
-
+    client = get_bq_client(config.bigquery)
+    failed = []
+    for source in sources:
+        failed.extend(load_source(client, config, source, echo=click.echo))
+    if failed:
+        raise click.ClickException(f"{len(failed)} source(s)/layer(s) failed to load: {', '.join(failed)}")
 
-def run_list(source_uri: str):
-    """List layers in a geodatabase from GCS."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir = Path(tmpdir)
-        zip_path = tmpdir / "source.zip"
 
-        click.echo(f"Downloading {source_uri}...")
-        download_from_gcs(source_uri, zip_path)
+def run_list(source_uri: str, catalog_path: Path = DEFAULT_CATALOG_PATH):
+    """List layers in a geodatabase from GCS.
 
-        gdb_path = unzip_geodatabase(zip_path, tmpdir / "extracted")
-        layers = list_layers(gdb_path)
+    Answers from the scan catalog when it holds the zip's current generation;
+    otherwise inspects the zip and records it there.
+    """
+    catalog = Catalog.load(catalog_path)
+    generation = gcs.generation(source_uri)
+    entry = catalog.get(source_uri, generation)
+    if entry is None:
+        dataset, log, _ = _scan_zip(source_uri, None, download=False)
+        for line in log:
+            click.echo(line)
+        entry = catalog.record(source_uri, generation, dataset)
+        catalog.save()
 
-        click.echo(f"\nLayers in {source_uri}:")
-        for layer in layers:
-            click.echo(f"  - {layer}")
+    click.echo(f"\nLayers in {source_uri}:")
+    for layer in entry.layers:
+        click.echo(f"  - {layer.name}")
 
 
 @main.command()
@@ -144,21 +366,173 @@ def run_list(source_uri: str):
 @click.option("--output-dir", type=click.Path(path_type=Path), required=True, help="Directory to write generated dbt files")
 @click.option("--staging-bucket", required=True, help="GCS bucket for staged data")
 @click.option("--staging-prefix", default="staged/", help="GCS prefix under bucket for staged data")
-def scan(prefix: str, output_dir: Path, staging_bucket: str, staging_prefix: str):
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(FORMATS),
+    default="jsonl",
+    help="Staging file format (must match output.format used by extract)",
+)
+@click.option(
+    "--compression",
+    type=click.Choice(COMPRESSIONS),
+    default="none",
+    help="Staging file compression (must match output.compression used by extract)",
+)
+@click.option("--download", is_flag=True, help="Download each zip instead of reading schemas in place")
+@click.option(
+    "--catalog",
+    "catalog_path",
+    type=click.Path(path_type=Path),
+    default=DEFAULT_CATALOG_PATH,
+    help="Schema catalog of previously scanned zips",
+)
+@click.option("--jobs", type=click.IntRange(min=1), default=1, help="Zips inspected concurrently")
+@click.option(
+    "--metrics-out",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write a per-stage run report here (Prometheus text if it ends in .prom, else JSON)",
+)
+def scan(
+    prefix: str,
+    output_dir: Path,
+    staging_bucket: str,
+    staging_prefix: str,
+    fmt: str,
+    compression: str,
+    download: bool,
+    catalog_path: Path,
+    jobs: int,
+    metrics_out: Path | None,
+):
     """Scan geodatabases in GCS and generate dbt source definitions."""
-    run_scan(prefix, output_dir, staging_bucket, staging_prefix)
+    try:
+        output = OutputConfig(format=fmt, compression=compression)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--compression")
+    run_scan(
+        prefix,
+        output_dir,
+        staging_bucket,
+        staging_prefix,
+        output=output,
+        download=download,
+        catalog_path=catalog_path,
+        jobs=jobs,
+        metrics_out=metrics_out,
+    )
 
 
 @main.command()
 @click.option("--config", "config_path", type=click.Path(exists=True, path_type=Path), default="config.yml")
 @click.option("--source", "source_name", default=None, help="Extract a single source by name")
-def extract(config_path: Path, source_name: str | None):
+@click.option("--jobs", type=click.IntRange(min=1), default=1, help="Worker processes for layer conversion")
+@click.option("--splits", type=click.IntRange(min=1), default=1, help="Max parallel ranges for large layers")
+@click.option("--sources", "max_sources", type=click.IntRange(min=1), default=1, help="Sources processed concurrently")
+@click.option("--downloads", type=click.IntRange(min=1), default=2, help="Concurrent source downloads")
+@click.option("--uploads", type=click.IntRange(min=1), default=4, help="Concurrent staging uploads")
+@click.option(
+    "--gdb-mode",
+    type=click.Choice(["vsizip", "extract"]),
+    default="vsizip",
+    help="Read geodatabases in place from the zip, or unzip them first",
+)
+@click.option("--stream-upload", "stream", is_flag=True, help="Stream output to GCS without local staging files")
+@click.option(
+    "--reader",
+    type=click.Choice(READERS),
+    default="fiona",
+    help="Read layers per feature with fiona, or in Arrow batches (needs pyogrio; compact geometry JSON)",
+)
+@click.option("--force", is_flag=True, help="Re-extract and re-upload sources even if unchanged")
+@click.option("--resume", is_flag=True, help="Skip checkpointed layers and reuse the last run's downloads")
+@click.option(
+    "--work-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=DEFAULT_WORK_DIR,
+    help="Where downloads and converted layers are kept until staged",
+)
+@click.option(
+    "--metrics-out",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write a per-stage run report here (Prometheus text if it ends in .prom, else JSON)",
+)
+@click.option("--profile", is_flag=True, help="Profile each layer's conversion with cProfile")
+@click.option("--profile-memory", is_flag=True, help="Also trace allocations with tracemalloc (implies --profile)")
+def extract(
+    config_path: Path,
+    source_name: str | None,
+    jobs: int,
+    splits: int,
+    max_sources: int,
+    downloads: int,
+    uploads: int,
+    gdb_mode: str,
+    stream: bool,
+    reader: str,
+    force: bool,
+    resume: bool,
+    work_dir: Path,
+    metrics_out: Path | None,
+    profile: bool,
+    profile_memory: bool,
+):
     """Extract geodatabases from GCS to hive-partitioned staging paths."""
-    run_extract(config_path, source_name)
+    run_extract(
+        config_path,
+        source_name,
+        jobs=jobs,
+        splits=splits,
+        max_sources=max_sources,
+        downloads=downloads,
+        uploads=uploads,
+        gdb_mode=gdb_mode,
+        stream=stream,
+        reader=reader,
+        force=force,
+        resume=resume,
+        work_dir=work_dir,
+        metrics_out=metrics_out,
+        profile=profile,
+        profile_memory=profile_memory,
+    )
+
+
+@main.command()
+@click.option("--config", "config_path", type=click.Path(exists=True, path_type=Path), default="config.yml")
+@click.option("--source", "source_name", default=None, help="Load a single source by name")
+def load(config_path: Path, source_name: str | None):
+    """Load staged layers into native BigQuery tables partitioned by data drop."""
+    run_load(config_path, source_name)
+
+
+@main.command("profile-summary")
+@click.argument(
+    "directory",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=DEFAULT_PROFILE_DIR,
+)
+@click.option("--top", type=click.IntRange(min=1), default=25, help="Functions (and allocation sites) to show")
+@click.option("--sort", type=click.Choice(SORT_KEYS), default="cumulative", help="Rank functions by this")
+def profile_summary(directory: Path, top: int, sort: str):
+    """Print the top functions across the layer profiles written by extract --profile."""
+    try:
+        click.echo(summarize(directory, top=top, sort=sort), nl=False)
+    except FileNotFoundError as e:
+        raise click.ClickException(str(e))
 
 
 @main.command("list")
 @click.option("--source", required=True, help="GCS URI of a geodatabase zip file")
-def list_cmd(source: str):
+@click.option(
+    "--catalog",
+    "catalog_path",
+    type=click.Path(path_type=Path),
+    default=DEFAULT_CATALOG_PATH,
+    help="Schema catalog written by scan",
+)
+def list_cmd(source: str, catalog_path: Path):
     """List layers in a geodatabase."""
-    run_list(source)
+    run_list(source, catalog_path=catalog_path)
@@ -1,10 +1,21 @@
 """Pipeline configuration loading and validation."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import yaml
 
+FORMATS = ("jsonl", "parquet")
+# BigQuery reads JSON staging files either uncompressed or gzipped; it has
+# no zstd support for JSON. Parquet compresses column chunks internally.
+_FORMAT_COMPRESSIONS = {
+    "jsonl": ("none", "gzip"),
+    "parquet": ("none", "snappy", "gzip", "zstd"),
+}
+COMPRESSIONS = ("none", "gzip", "snappy", "zstd")
+JSON_ENCODERS = ("stdlib", "orjson")
+_COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz"}
+
 
 @dataclass(frozen=True)
 class SourceConfig:
@@ -14,6 +25,151 @@ class SourceConfig:
     uri: str
 
 
+@dataclass(frozen=True)
+class OutputConfig:
+    """How staging files are written.
+
+    `format` is "jsonl" (GeoJSONL, or JSONL for layers without geometry) or
+    "parquet" (GeoParquet with WKB geometry). For jsonl, `compression`
+    gzips the whole file; for parquet it is the column chunk codec.
+    `json_encoder` picks the JSONL row encoder: "stdlib", or the faster
+    "orjson", which writes compact rather than byte-identical JSON.
+
+    With `shard_mb` and/or `shard_rows` set, each layer is written as
+    data-00000.EXT, data-00001.EXT, ... rolling over to a new file once
+    the current one holds that many (uncompressed) MB or rows.
+    """
+
+    format: str = "jsonl"
+    compression: str = "none"
+    json_encoder: str = "stdlib"
+    shard_mb: int | None = None
+    shard_rows: int | None = None
+
+    def __post_init__(self):
+        if self.format not in FORMATS:
+            raise ValueError(
+                f"Unsupported output format '{self.format}'. "
+                f"Expected one of: {', '.join(FORMATS)}"
+            )
+        allowed = _FORMAT_COMPRESSIONS[self.format]
+        if self.compression not in allowed:
+            raise ValueError(
+                f"Unsupported output compression '{self.compression}' for {self.format}. "
+                f"Expected one of: {', '.join(allowed)}"
+            )
+        if self.json_encoder not in JSON_ENCODERS:
+            raise ValueError(
+                f"Unsupported JSON encoder '{self.json_encoder}'. "
+                f"Expected one of: {', '.join(JSON_ENCODERS)}"
+            )
+        if (self.shard_mb is not None and self.shard_mb < 1) or (self.shard_rows is not None and self.shard_rows < 1):
+            raise ValueError("output shard_mb and shard_rows must be at least 1")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OutputConfig":
+        return cls(
+            format=data.get("format", "jsonl"),
+            compression=data.get("compression", "none"),
+            json_encoder=data.get("json_encoder", "stdlib"),
+            shard_mb=data.get("shard_mb"),
+            shard_rows=data.get("shard_rows"),
+        )
+
+    @property
+    def rolls_over(self) -> bool:
+        """Whether layers are written as size- or row-limited shards."""
+        return self.shard_mb is not None or self.shard_rows is not None
+
+    @property
+    def sink_compression(self) -> str:
+        """Compression applied to the file as a byte stream ("none" for parquet)."""
+        return self.compression if self.format == "jsonl" else "none"
+
+    def file_extension(self, geometry: bool) -> str:
+        """File extension for a layer: parquet, or geojsonl/jsonl plus .gz when gzipped."""
+        if self.format == "parquet":
+            return "parquet"
+        base = "geojsonl" if geometry else "jsonl"
+        return base + _COMPRESSION_SUFFIXES[self.compression]
+
+
+@dataclass(frozen=True)
+class GCSTransportConfig:
+    """Connection pooling, concurrency and retry settings for GCS requests.
+
+    `max_in_flight` caps concurrent GCS operations per process; failed
+    requests are retried with exponential backoff for up to `retry_timeout`
+    seconds. Objects larger than `download_slice_mb` are downloaded as
+    byte-range slices, `download_slices` at a time; files larger than
+    `upload_part_mb` are uploaded as parts, `upload_parts` at a time, and
+    composed.
+    """
+
+    pool_size: int = 32
+    max_in_flight: int = 16
+    retry_timeout: float = 300.0
+    initial_backoff: float = 1.0
+    max_backoff: float = 60.0
+    download_slice_mb: int = 64
+    download_slices: int = 8
+    upload_part_mb: int = 64
+    upload_parts: int = 8
+
+    def __post_init__(self):
+        if self.pool_size < 1 or self.max_in_flight < 1:
+            raise ValueError("gcs pool_size and max_in_flight must be at least 1")
+        if self.download_slice_mb < 1 or self.download_slices < 1:
+            raise ValueError("gcs download_slice_mb and download_slices must be at least 1")
+        if self.upload_part_mb < 1 or self.upload_parts < 1:
+            raise ValueError("gcs upload_part_mb and upload_parts must be at least 1")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GCSTransportConfig":
+        defaults = cls()
+        return cls(
+            pool_size=data.get("pool_size", defaults.pool_size),
+            max_in_flight=data.get("max_in_flight", defaults.max_in_flight),
+            retry_timeout=data.get("retry_timeout", defaults.retry_timeout),
+            initial_backoff=data.get("initial_backoff", defaults.initial_backoff),
+            max_backoff=data.get("max_backoff", defaults.max_backoff),
+            download_slice_mb=data.get("download_slice_mb", defaults.download_slice_mb),
+            download_slices=data.get("download_slices", defaults.download_slices),
+            upload_part_mb=data.get("upload_part_mb", defaults.upload_part_mb),
+            upload_parts=data.get("upload_parts", defaults.upload_parts),
+        )
+
+
+@dataclass(frozen=True)
+class BigQueryConfig:
+    """Where `rextag load` writes native tables.
+
+    Each layer is loaded into `project.dataset.SOURCE__LAYER` (the client's
+    default project if `project` is unset), partitioned by data drop.
+    """
+
+    dataset: str
+    project: str | None = None
+    location: str | None = None
+
+    def __post_init__(self):
+        if not self.dataset:
+            raise ValueError("bigquery dataset is required")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BigQueryConfig":
+        return cls(
+            dataset=data.get("dataset"),
+            project=data.get("project"),
+            location=data.get("location"),
+        )
+
+    def table_id(self, dataset_name: str, layer_name: str) -> str:
+        """Table ID for one layer: [project.]dataset.SOURCE__LAYER."""
+        table = f"{self.dataset}.{dataset_name}__{layer_name}"
+        return f"{self.project}.{table}" if self.project else table
+
+
 @dataclass(frozen=True)
 class PipelineConfig:
     """Full pipeline configuration."""
@@ -23,6 +179,9 @@ class PipelineConfig:
     sources: list[SourceConfig]
     scan_source_prefix: str | None = None
     scan_dbt_output_dir: str | None = None
+    output: OutputConfig = field(default_factory=OutputConfig)
+    transport: GCSTransportConfig = field(default_factory=GCSTransportConfig)
+    bigquery: BigQueryConfig | None = None
 
     @classmethod
     def from_dict(cls, data: dict) -> "PipelineConfig":
@@ -37,21 +196,40 @@ class PipelineConfig:
             sources=sources,
             scan_source_prefix=scan.get("source_prefix"),
             scan_dbt_output_dir=scan.get("dbt_output_dir"),
+            output=OutputConfig.from_dict(data.get("output") or {}),
+            transport=GCSTransportConfig.from_dict(gcs),
+            bigquery=BigQueryConfig.from_dict(data["bigquery"]) if data.get("bigquery") else None,
         )
 
     def hive_staging_path(
-        self, dataset_name: str, layer_name: str, data_drop: str, extension: str
+        self,
+        dataset_name: str,
+        layer_name: str,
+        data_drop: str,
+        extension: str,
+        shard: int | None = None,
     ) -> str:
         """GCS URI for a hive-partitioned staging file.
 
-        Returns: gs://bucket/prefix/dataset/layer/data_drop=VALUE/data.EXT
+        Returns: gs://bucket/prefix/dataset/layer/data_drop=VALUE/data.EXT,
+        or .../data-NNNNN.EXT when a shard index is given.
         """
         prefix = self.gcs_staging_prefix.rstrip("/")
+        filename = "data" if shard is None else f"data-{shard:05d}"
         return (
             f"gs://{self.gcs_staging_bucket}/{prefix}/"
-            f"{dataset_name}/{layer_name}/data_drop={data_drop}/data.{extension}"
+            f"{dataset_name}/{layer_name}/data_drop={data_drop}/{filename}.{extension}"
         )
 
+    def manifest_path(self, dataset_name: str, data_drop: str) -> str:
+        """GCS URI of a source's extract state manifest for one data drop.
+
+        Returns: gs://bucket/prefix/dataset/_rextag_state/data_drop=VALUE.json,
+        beside (not inside) the dataset's layer directories.
+        """
+        prefix = self.gcs_staging_prefix.rstrip("/")
+        return f"gs://{self.gcs_staging_bucket}/{prefix}/{dataset_name}/_rextag_state/data_drop={data_drop}.json"
+
     def staging_gcs_path(self, dataset_name: str, layer_name: str) -> str:
         """GCS URI for a staging JSONL file (legacy flat layout)."""
         prefix = self.gcs_staging_prefix.rstrip("/")
@@ -1,31 +1,234 @@
 """Convert geodatabase features to GeoJSONL rows for BigQuery loading."""
 
 import json
+import re
+import threading
+from collections import OrderedDict
 from collections.abc import Iterable, Iterator
 from datetime import datetime, timezone
+from itertools import chain, islice
+from json.encoder import encode_basestring_ascii
+from typing import NamedTuple
 
+import numpy as np
 from pyproj import Transformer
 
+from rextag.config import JSON_ENCODERS
+
+# Features reprojected per Transformer.transform call in convert_features.
+REPROJECT_BATCH_SIZE = 1024
+
+# Transformers kept by get_transformer, across layers and sources.
+TRANSFORMER_CACHE_SIZE = 32
+
+# Row keys written by the converter; a property with one of these names
+# shadows it, which the fast encoding path does not reproduce.
+_RESERVED_KEYS = frozenset({"geometry", "_loaded_at", "_source_file", "_layer_name"})
+
+# Nesting depth of position lists for each GeoJSON geometry type.
+# Point is a bare position; MultiPolygon is polygons -> rings -> positions.
+_COORD_DEPTH = {
+    "Point": 0,
+    "MultiPoint": 1,
+    "LineString": 1,
+    "MultiLineString": 2,
+    "Polygon": 2,
+    "MultiPolygon": 3,
+}
+
 
 def needs_reprojection(crs: str) -> bool:
     """Check if CRS needs reprojection to WGS84 (EPSG:4326)."""
     return crs.upper() != "EPSG:4326"
 
 
+class TransformerCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _TransformerCache:
+    """Bounded LRU of pyproj Transformers, keyed on normalized (source, target, always_xy).
+
+    Building a Transformer resolves a PROJ pipeline (tens of milliseconds and
+    database lookups), while a few CRSs recur across every layer. pyproj
+    objects must not be shared between threads, so entries are also keyed
+    by thread: each conversion thread reuses its own Transformers.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple, Transformer] = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = self.misses = 0
+
+    def get(self, source_crs: str, target_crs: str, always_xy: bool) -> Transformer:
+        key = (threading.get_ident(), _normalize_crs(source_crs), _normalize_crs(target_crs), always_xy)
+        with self._lock:
+            transformer = self._entries.get(key)
+            if transformer is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._local.hits = getattr(self._local, "hits", 0) + 1
+                return transformer
+            self.misses += 1
+        self._local.misses = getattr(self._local, "misses", 0) + 1
+        # Built outside the lock: other threads need not wait on PROJ.
+        transformer = Transformer.from_crs(source_crs, target_crs, always_xy=always_xy)
+        with self._lock:
+            self._entries[key] = transformer
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return transformer
+
+    def info(self, this_thread: bool = False) -> TransformerCacheInfo:
+        with self._lock:
+            if this_thread:
+                hits, misses = getattr(self._local, "hits", 0), getattr(self._local, "misses", 0)
+            else:
+                hits, misses = self.hits, self.misses
+            return TransformerCacheInfo(hits, misses, self.maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self._local = threading.local()
+
+
+def _normalize_crs(crs) -> str:
+    """Cache key for a CRS: authority codes upper-cased ("epsg:2227" -> "EPSG:2227"), others as text."""
+    text = str(crs).strip()
+    return text.upper() if re.fullmatch(r"[A-Za-z]+:\d+", text) else text
+
+
+_transformers = _TransformerCache(TRANSFORMER_CACHE_SIZE)
+
+
+def get_transformer(source_crs, target_crs="EPSG:4326", always_xy: bool = True) -> Transformer:
+    """A Transformer from source_crs to target_crs, reused from this process's cache when possible."""
+    return _transformers.get(source_crs, target_crs, always_xy)
+
+
+def transformer_cache_info(this_thread: bool = False) -> TransformerCacheInfo:
+    """Hit and miss counts and size of this process's Transformer cache.
+
+    With `this_thread`, hits and misses count only the calling thread's
+    lookups, so a stage can measure its own use while others run alongside.
+    """
+    return _transformers.info(this_thread)
+
+
+def clear_transformer_cache() -> None:
+    """Drop every cached Transformer and reset the counters."""
+    _transformers.clear()
+
+
 def reproject_geometry(geometry: dict, source_crs: str) -> dict:
     """Reproject a GeoJSON geometry dict from source_crs to EPSG:4326."""
-    transformer = Transformer.from_crs(source_crs, "EPSG:4326", always_xy=True)
+    return _reproject_with_transformer(geometry, get_transformer(source_crs))
 
-    def transform_coords(coords):
-        if isinstance(coords[0], (int, float)):
-            x, y = transformer.transform(coords[0], coords[1])
-            return [x, y] if len(coords) == 2 else [x, y] + list(coords[2:])
-        return [transform_coords(c) for c in coords]
 
-    return {
-        "type": geometry["type"],
-        "coordinates": transform_coords(geometry["coordinates"]),
-    }
+def reproject_geometries(
+    geometries: list[dict | None], transformer: Transformer
+) -> list[dict | None]:
+    """Reproject a batch of GeoJSON geometries with one Transformer call.
+
+    Every position list (ring, line, point set) in the batch is flattened into
+    a single contiguous array, x/y are transformed in one call, and each
+    geometry is rebuilt from the recorded offsets. Values beyond x/y (z, m)
+    are carried through unchanged. None geometries stay None.
+    """
+    templates = []
+    parts: list[list] = []
+    for geom in geometries:
+        templates.append(None if geom is None else _flatten_geometry(geom, parts))
+
+    out_parts = _transform_parts(parts, transformer)
+    return [
+        None if template is None else _rebuild_geometry(template, out_parts)
+        for template in templates
+    ]
+
+
+def _flatten_geometry(geometry, parts: list[list]):
+    """Append a geometry's position lists to parts; return a rebuild template."""
+    geom_type = geometry["type"]
+    if geom_type == "GeometryCollection":
+        return (geom_type, [_flatten_geometry(g, parts) for g in geometry["geometries"]])
+    depth = _COORD_DEPTH[geom_type]
+    return (geom_type, _flatten_coords(geometry["coordinates"], depth, parts))
+
+
+def _flatten_coords(coords, depth: int, parts: list[list]):
+    if depth == 0:
+        parts.append([coords])
+        return len(parts) - 1
+    if depth == 1:
+        parts.append(coords)
+        return len(parts) - 1
+    return [_flatten_coords(c, depth - 1, parts) for c in coords]
+
+
+def _rebuild_geometry(template, out_parts: list[list]) -> dict:
+    geom_type, body = template
+    if geom_type == "GeometryCollection":
+        return {
+            "type": geom_type,
+            "geometries": [_rebuild_geometry(t, out_parts) for t in body],
+        }
+    depth = _COORD_DEPTH[geom_type]
+    return {"type": geom_type, "coordinates": _rebuild_coords(body, depth, out_parts)}
+
+
+def _rebuild_coords(body, depth: int, out_parts: list[list]):
+    if depth == 0:
+        return out_parts[body][0]
+    if depth == 1:
+        return out_parts[body]
+    return [_rebuild_coords(b, depth - 1, out_parts) for b in body]
+
+
+def _transform_parts(parts: list[list], transformer: Transformer) -> list[list]:
+    """Transform flattened position lists, returning them as nested lists."""
+    if not parts:
+        return []
+
+    lengths = [len(p) for p in parts]
+    try:
+        coords = np.asarray(list(chain.from_iterable(parts)), dtype=np.float64)
+    except ValueError:
+        coords = None
+    if coords is None or coords.ndim != 2 or coords.shape[1] < 2:
+        # Mixed 2D/3D positions: fall back to transforming each part separately.
+        return [_transform_ragged(p, transformer) for p in parts]
+
+    xx, yy = transformer.transform(coords[:, 0], coords[:, 1])
+    coords[:, 0] = xx
+    coords[:, 1] = yy
+    flat = coords.tolist()
+
+    out_parts = []
+    offset = 0
+    for n in lengths:
+        out_parts.append(flat[offset:offset + n])
+        offset += n
+    return out_parts
+
+
+def _transform_ragged(positions: list, transformer: Transformer) -> list:
+    if not positions:
+        return []
+    xy = np.asarray([p[:2] for p in positions], dtype=np.float64)
+    xx, yy = transformer.transform(xy[:, 0], xy[:, 1])
+    return [
+        [x, y] + list(p[2:])
+        for x, y, p in zip(xx.tolist(), yy.tolist(), positions)
+    ]
 
 
 def feature_to_row(
@@ -39,43 +242,165 @@ def feature_to_row(
     Geometry is serialized as a JSON string. Properties are flattened to
     top-level keys. Metadata columns are added.
     """
+    geom = feature.get("geometry")
+    if geom is not None and transformer is not None:
+        geom = _reproject_with_transformer(geom, transformer)
+    return _build_row(feature, geom, source_file, layer_name)
+
+
+def _build_row(
+    feature: dict,
+    geom: dict | None,
+    source_file: str,
+    layer_name: str,
+) -> dict:
+    """Assemble the output row for a feature whose geometry is already final."""
     row = {}
 
     # Geometry
-    geom = feature.get("geometry")
-    if geom is not None:
-        if transformer is not None:
-            geom = _reproject_with_transformer(geom, transformer)
-        row["geometry"] = json.dumps(geom)
-    else:
-        row["geometry"] = None
+    row["geometry"] = json.dumps(_geometry_dict(geom)) if geom is not None else None
 
     # Flatten properties
-    props = feature.get("properties", {})
+    props = feature.get("properties") or {}
     for key, value in props.items():
         row[key] = value
 
     # Metadata
-    row["_loaded_at"] = datetime.now(timezone.utc).isoformat()
-    row["_source_file"] = source_file
-    row["_layer_name"] = layer_name
+    row.update(_metadata_columns(source_file, layer_name))
 
     return row
 
 
+def _metadata_columns(source_file: str, layer_name: str, loaded_at: datetime | None = None) -> dict:
+    """The metadata columns ending every row, stamped with `loaded_at` (default: now)."""
+    return {
+        "_loaded_at": (loaded_at or datetime.now(timezone.utc)).isoformat(),
+        "_source_file": source_file,
+        "_layer_name": layer_name,
+    }
+
+
+def _geometry_dict(geometry) -> dict:
+    """Plain dict for a geometry; fiona's Geometry objects are not JSON serializable."""
+    if isinstance(geometry, dict):
+        return geometry
+    if geometry["type"] == "GeometryCollection":
+        return {"type": "GeometryCollection", "geometries": [_geometry_dict(g) for g in geometry["geometries"]]}
+    return {"type": geometry["type"], "coordinates": geometry["coordinates"]}
+
+
+class RowEncoder:
+    """Encode features of one layer as JSONL rows, one pass per feature.
+
+    Produces the same rows as json.dumps(feature_to_row(...)) without
+    building a row dict: the geometry is serialized once and escaped as a
+    string, the properties are serialized as one mapping, and the metadata
+    columns are a suffix computed once per layer (so every row of a layer
+    shares one _loaded_at).
+
+    encode_geojson(geometry, properties) takes geometry that is already
+    GeoJSON text, for readers that produce it in bulk.
+
+    The "stdlib" backend is byte-identical to json.dumps. The "orjson"
+    backend is faster but writes compact JSON (no spaces after separators,
+    non-ASCII as UTF-8, NaN as null), so its bytes differ.
+    """
+
+    def __init__(
+        self,
+        source_file: str,
+        layer_name: str,
+        backend: str = "stdlib",
+        loaded_at: datetime | None = None,
+    ):
+        if backend not in JSON_ENCODERS:
+            raise ValueError(f"Unknown JSON encoder: {backend}")
+        self.backend = backend
+        self._metadata = metadata = _metadata_columns(source_file, layer_name, loaded_at)
+        if backend == "orjson":
+            import orjson
+
+            self._dumps = orjson.dumps
+            self._suffix = b"," + orjson.dumps(metadata)[1:]
+            self.encode_geojson = self._encode_orjson
+        else:
+            self._suffix = (", " + json.dumps(metadata)[1:]).encode()
+            self.encode_geojson = self._encode_stdlib
+
+    def encode(self, feature: dict, geom: dict | None) -> bytes:
+        """Encode a feature whose geometry is already in its final CRS."""
+        if geom is None:
+            geometry = None
+        elif self.backend == "orjson":
+            geometry = self._dumps(_geometry_dict(geom)).decode()
+        else:
+            geometry = json.dumps(_geometry_dict(geom))
+        return self.encode_geojson(geometry, feature.get("properties") or {})
+
+    def _encode_stdlib(self, geometry: str | None, props) -> bytes:
+        if not _RESERVED_KEYS.isdisjoint(props):
+            return json.dumps(self._row(geometry, props)).encode()
+        geometry = "null" if geometry is None else encode_basestring_ascii(geometry)
+        body = json.dumps(dict(props))[1:-1]
+        head = '{"geometry": ' + geometry + (", " + body if body else "")
+        return head.encode() + self._suffix
+
+    def _encode_orjson(self, geometry: str | None, props) -> bytes:
+        dumps = self._dumps
+        if not _RESERVED_KEYS.isdisjoint(props):
+            return dumps(self._row(geometry, props))
+        body = dumps(dict(props))[1:-1]
+        return b'{"geometry":' + dumps(geometry) + (b"," + body if body else b"") + self._suffix
+
+    def _row(self, geometry: str | None, props) -> dict:
+        row = {"geometry": geometry}
+        row.update(props)
+        row.update(self._metadata)
+        return row
+
+
 def _reproject_with_transformer(geometry: dict, transformer: Transformer) -> dict:
     """Reproject geometry using a pre-built Transformer."""
+    return reproject_geometries([geometry], transformer)[0]
 
-    def transform_coords(coords):
-        if isinstance(coords[0], (int, float)):
-            x, y = transformer.transform(coords[0], coords[1])
-            return [x, y] if len(coords) == 2 else [x, y] + list(coords[2:])
-        return [transform_coords(c) for c in coords]
 
-    return {
-        "type": geometry["type"],
-        "coordinates": transform_coords(geometry["coordinates"]),
-    }
+def reproject_features(
+    features: Iterable[dict],
+    crs: str,
+) -> Iterator[tuple[dict, dict | None]]:
+    """Yield (feature, geometry in EPSG:4326) pairs.
+
+    Geometries are reprojected REPROJECT_BATCH_SIZE features per
+    Transformer call, or passed through when already in WGS84.
+    """
+    if not needs_reprojection(crs):
+        for feature in features:
+            yield feature, feature.get("geometry")
+        return
+
+    transformer = get_transformer(crs)
+    it = iter(features)
+    while batch := list(islice(it, REPROJECT_BATCH_SIZE)):
+        geoms = reproject_geometries([f.get("geometry") for f in batch], transformer)
+        yield from zip(batch, geoms)
+
+
+def encode_features(
+    features: Iterable[dict],
+    crs: str,
+    source_file: str,
+    layer_name: str,
+    backend: str = "stdlib",
+    loaded_at: datetime | None = None,
+) -> Iterator[bytes]:
+    """Convert Fiona features to encoded JSONL rows (without newlines).
+
+    Reprojects like convert_features and encodes with a RowEncoder.
+    """
+    encoder = RowEncoder(source_file, layer_name, backend=backend, loaded_at=loaded_at)
+    encode = encoder.encode
+    for feature, geom in reproject_features(features, crs):
+        yield encode(feature, geom)
 
 
 def convert_features(
@@ -86,14 +411,10 @@ def convert_features(
 ) -> Iterator[str]:
     """Convert an iterable of Fiona features to JSONL lines.
 
-    Yields one JSON string per feature. Handles reprojection if needed.
+    Yields one JSON string per feature. Handles reprojection if needed,
+    transforming REPROJECT_BATCH_SIZE features per Transformer call.
     This is a streaming generator to handle large datasets without
     loading everything into memory.
     """
-    transformer = None
-    if needs_reprojection(crs):
-        transformer = Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
-
-    for feature in features:
-        row = feature_to_row(feature, source_file, layer_name, transformer)
-        yield json.dumps(row)
+    for line in encode_features(features, crs, source_file, layer_name):
+        yield line.decode()
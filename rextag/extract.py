@@ -1,11 +1,23 @@
 """Download and read geodatabase files from GCS."""
 
+import importlib.util
+import multiprocessing
+import os
 import re
+import shutil
+import signal
+import threading
+import time
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
 
 import fiona
-from google.cloud import storage
+from fiona.errors import FionaError
+from rextag import gcs
+from rextag.config import GCSTransportConfig, OutputConfig
 
 
 def download_from_gcs(gcs_uri: str, dest: Path) -> None:
@@ -15,48 +27,219 @@ def download_from_gcs(gcs_uri: str, dest: Path) -> None:
         gcs_uri: Full GCS URI like gs://bucket/path/to/file.gdb.zip
         dest: Local destination file path
     """
-    parts = gcs_uri.replace("gs://", "").split("/", 1)
-    bucket_name = parts[0]
-    blob_path = parts[1]
+    gcs.download(gcs_uri, dest)
 
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_path)
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    blob.download_to_filename(str(dest))
 
+# Members are streamed to disk in chunks of this size.
+_UNZIP_CHUNK_SIZE = 1024 * 1024
 
-def unzip_geodatabase(zip_path: Path, dest_dir: Path) -> Path:
+
+@dataclass
+class UnzipStats:
+    """Result of decompressing a geodatabase out of a zip."""
+
+    gdb_path: Path
+    files: int
+    bytes: int
+    seconds: float
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+
+def unzip_geodatabase(zip_path: Path, dest_dir: Path, workers: int | None = None) -> Path:
     """Unzip a .gdb.zip file and return the path to the .gdb directory.
 
     Args:
         zip_path: Path to the .gdb.zip file
         dest_dir: Directory to extract into
+        workers: Decompression threads (default: up to 8, one per CPU)
 
     Returns:
         Path to the extracted .gdb directory
     """
+    return decompress_geodatabase(zip_path, dest_dir, workers).gdb_path
+
+
+def decompress_geodatabase(zip_path: Path, dest_dir: Path, workers: int | None = None) -> UnzipStats:
+    """Extract only the .gdb members of a zip, decompressing them on a thread pool.
+
+    zlib releases the GIL, so members inflate in parallel. Each output file
+    is preallocated to its final size, and zipfile verifies every member's
+    CRC-32 once it has been read to the end (raising zipfile.BadZipFile on a
+    mismatch). Anything in the archive outside the .gdb is skipped.
+    """
     zip_path = Path(zip_path)
     if not zip_path.exists():
         raise FileNotFoundError(f"Zip file not found: {zip_path}")
 
-    dest_dir = Path(dest_dir)
+    dest_dir = Path(dest_dir).resolve()
     dest_dir.mkdir(parents=True, exist_ok=True)
 
+    start = time.perf_counter()
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        gdb_name = _find_gdb_name(zf.namelist())
+        if gdb_name is None:
+            raise ValueError(f"No .gdb directory found in {zip_path}")
+        members = [
+            info for info in zf.infolist()
+            if info.filename.startswith(gdb_name + "/") and not info.is_dir()
+        ]
+
+    for info in members:
+        target = (dest_dir / info.filename).resolve()
+        if not target.is_relative_to(dest_dir):
+            raise ValueError(f"Unsafe path in {zip_path}: {info.filename}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+    # Largest members first so one big table doesn't finish last on its own.
+    members.sort(key=lambda info: info.file_size, reverse=True)
+    local = threading.local()
+    handles: list[zipfile.ZipFile] = []
+
+    def extract_member(info: zipfile.ZipInfo) -> int:
+        # One ZipFile per thread so reads don't contend on a shared file position.
+        zf = getattr(local, "zf", None)
+        if zf is None:
+            zf = local.zf = zipfile.ZipFile(zip_path, "r")
+            handles.append(zf)
+        target = dest_dir / info.filename
+        with zf.open(info) as src, open(target, "wb") as dst:
+            _preallocate(dst, info.file_size)
+            shutil.copyfileobj(src, dst, _UNZIP_CHUNK_SIZE)
+        return info.file_size
+
+    workers = workers or min(8, os.cpu_count() or 1)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            total = sum(pool.map(extract_member, members))
+    finally:
+        for zf in handles:
+            zf.close()
+
+    gdb_path = dest_dir / gdb_name
+    gdb_path.mkdir(parents=True, exist_ok=True)
+    return UnzipStats(
+        gdb_path=gdb_path,
+        files=len(members),
+        bytes=total,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def _preallocate(f, size: int) -> None:
+    if size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except OSError:
+            pass
+
+
+def _find_gdb_name(names: list[str]) -> str | None:
+    for name in names:
+        head, sep, _ = name.partition(".gdb/")
+        if sep:
+            return head + ".gdb"
+    return None
+
+
+def find_gdb_in_zip(zip_path: Path) -> str | None:
+    """Return the archive path of the first .gdb directory in a zip, if any."""
     with zipfile.ZipFile(zip_path, "r") as zf:
-        zf.extractall(dest_dir)
+        return _find_gdb_name(zf.namelist())
+
+
+def vsizip_path(zip_path: Path, gdb_name: str) -> str:
+    """GDAL virtual path for a .gdb directory inside a zip archive."""
+    return f"/vsizip/{Path(zip_path).resolve()}/{gdb_name}"
 
-    gdb_dirs = list(dest_dir.glob("*.gdb"))
-    if not gdb_dirs:
-        raise ValueError(f"No .gdb directory found in {zip_path}")
-    return gdb_dirs[0]
 
+def vsizip_geodatabase(zip_path: Path) -> str | None:
+    """Return a /vsizip/ path for the zip's .gdb if GDAL can read it in place."""
+    if not Path(zip_path).exists():
+        raise FileNotFoundError(f"Zip file not found: {zip_path}")
+    gdb_name = find_gdb_in_zip(zip_path)
+    if gdb_name is None:
+        return None
+    path = vsizip_path(zip_path, gdb_name)
+    try:
+        fiona.listlayers(path)
+    except FionaError:
+        return None
+    return path
+
+
+def remote_geodatabase(gcs_uri: str) -> str | None:
+    """Return a /vsizip//vsicurl/ path for the .gdb in a zip on GCS, if GDAL can read it there.
+
+    Nothing is downloaded up front: GDAL fetches the zip's central directory
+    and then only the parts of the .gdb that are read, with HTTP range
+    requests. Call this, and read the returned path, inside
+    `fiona.Env(**gcs.gdal_http_options())`.
+    """
+    archive = f"/vsizip/{{/vsicurl/{gcs.media_url(gcs_uri)}}}"
+    try:
+        gdb_name = _find_gdb_dir(archive)
+        if gdb_name is None:
+            return None
+        path = f"{archive}/{gdb_name}"
+        fiona.listlayers(path)
+    except FionaError:
+        return None
+    return path
+
+
+def _find_gdb_dir(archive: str, max_depth: int = 3) -> str | None:
+    """Breadth-first search of a GDAL virtual archive for a .gdb directory."""
+    dirs = [""]
+    for _ in range(max_depth):
+        subdirs = []
+        for parent in dirs:
+            try:
+                names = fiona.listdir(f"{archive}/{parent}" if parent else archive)
+            except FionaError:
+                continue  # a file, not a directory
+            for name in names:
+                child = f"{parent}/{name}" if parent else name
+                if name.endswith(".gdb"):
+                    return child
+                subdirs.append(child)
+        dirs = subdirs
+    return None
+
+
+def open_geodatabase(zip_path: Path, dest_dir: Path, mode: str = "vsizip") -> Path | str:
+    """Return a path fiona can read the geodatabase in a zip from.
+
+    In "vsizip" mode the .gdb is read in place through GDAL's /vsizip/
+    handler, so nothing is written to disk; if GDAL cannot open it that way
+    the archive is extracted as a fallback. "extract" mode always unzips.
 
-def list_layers(gdb_path: Path) -> list[str]:
+    Args:
+        zip_path: Path to the .gdb.zip file
+        dest_dir: Directory to extract into if extraction is needed
+        mode: "vsizip" or "extract"
+
+    Returns:
+        A /vsizip/ path string, or the Path of the extracted .gdb directory
+    """
+    if mode not in ("vsizip", "extract"):
+        raise ValueError(f"Unknown geodatabase read mode: {mode}")
+
+    if mode == "vsizip":
+        path = vsizip_geodatabase(zip_path)
+        if path is not None:
+            return path
+
+    return unzip_geodatabase(zip_path, dest_dir)
+
+
+def list_layers(gdb_path: Path | str) -> list[str]:
     """List all layer names in a geodatabase.
 
     Args:
-        gdb_path: Path to the .gdb directory
+        gdb_path: Path to the .gdb directory, or a /vsizip/ path
 
     Returns:
         List of layer name strings
@@ -66,20 +249,7 @@ def list_layers(gdb_path: Path) -> list[str]:
 
 def list_blobs(gcs_prefix: str, suffix: str | None = None) -> list[str]:
     """List blob URIs under a GCS prefix."""
-    parts = gcs_prefix.replace("gs://", "").split("/", 1)
-    bucket_name = parts[0]
-    prefix = parts[1] if len(parts) > 1 else ""
-
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blobs = bucket.list_blobs(prefix=prefix)
-
-    uris = []
-    for blob in blobs:
-        uri = f"gs://{bucket_name}/{blob.name}"
-        if suffix is None or blob.name.endswith(suffix):
-            uris.append(uri)
-    return uris
+    return gcs.list_uris(gcs_prefix, suffix)
 
 
 def parse_data_drop(uri: str) -> str | None:
@@ -94,40 +264,285 @@ def has_geometry(fiona_schema: dict) -> bool:
     return geom_type is not None and str(geom_type) != "None"
 
 
+@dataclass
+class LayerOutput:
+    """Files written for one extracted layer, in feature order.
+
+    `bytes` counts what was written before any gzip compression.
+    `worker_cpu_s` is CPU time spent in split-range worker processes,
+    which the caller's own CPU time does not include.
+    """
+
+    count: int = 0
+    paths: list[Path] = field(default_factory=list)
+    bytes: int = 0
+    worker_cpu_s: float = 0.0
+
+
+# Layers are only split when each range gets at least this many features.
+MIN_SPLIT_FEATURES = 100_000
+
+
+def split_ranges(total: int, splits: int) -> list[tuple[int, int]]:
+    """Divide [0, total) into up to `splits` contiguous, near-equal offset ranges."""
+    splits = max(1, min(splits, total))
+    bounds = [total * i // splits for i in range(splits + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(splits)]
+
+
+def shard_path(output_path: Path | str, index: int) -> Path | str:
+    """Shard `index` of an output path or gs:// URI: data.geojsonl -> data-00000.geojsonl."""
+    if isinstance(output_path, str):
+        head, _, name = output_path.rpartition("/")
+        stem, dot, ext = name.partition(".")
+        return f"{head}/{stem}-{index:05d}{dot}{ext}"
+    stem, dot, ext = output_path.name.partition(".")
+    return output_path.with_name(f"{stem}-{index:05d}{dot}{ext}")
+
+
+READERS = ("auto", "arrow", "fiona")
+_ARROW_READER_MODULES = ("pyogrio", "pyarrow", "shapely")
+
+
+def resolve_reader(reader: str = "fiona") -> str:
+    """Pick how layers are read: "fiona" (the default) or "arrow" (batched, via pyogrio).
+
+    "auto" uses the Arrow reader when its optional dependencies are
+    installed and falls back to fiona's per-feature iterator otherwise.
+    The Arrow reader writes compact GeoJSON geometry text, so its JSONL
+    bytes differ from fiona's; it is opt-in so that installing the extra
+    does not change output (or the hashes that let reruns skip uploads).
+    """
+    if reader not in READERS:
+        raise ValueError(f"Unknown layer reader: {reader}")
+    available = all(importlib.util.find_spec(m) is not None for m in _ARROW_READER_MODULES)
+    if reader == "auto":
+        return "arrow" if available else "fiona"
+    if reader == "arrow" and not available:
+        raise ImportError(
+            "the arrow reader requires pyogrio, pyarrow and shapely: pip install 'rextag[arrow]'"
+        )
+    return reader
+
+
+def _layer_crs(collection) -> str:
+    if has_geometry(collection.schema) and collection.crs:
+        crs = collection.crs.get("init", "EPSG:4326") if isinstance(collection.crs, dict) else str(collection.crs)
+        if not crs or crs.strip() == "":
+            crs = "EPSG:4326"
+    else:
+        crs = "EPSG:4326"
+    return crs
+
+
 def extract_layer_to_jsonl(
-    gdb_path: Path,
+    gdb_path: Path | str,
     layer_name: str,
-    output_path: Path,
+    output_path: Path | str,
     source_file: str,
-) -> int:
-    """Extract a single layer from a geodatabase to a JSONL file.
+    splits: int = 1,
+    output: OutputConfig | None = None,
+    reader: str = "fiona",
+    loaded_at: datetime | None = None,
+    upload_to: str | None = None,
+) -> LayerOutput:
+    """Extract a single layer from a geodatabase to JSONL (or GeoParquet).
+
+    With splits > 1, a layer large enough to give every range at least
+    MIN_SPLIT_FEATURES features is divided into contiguous offset ranges.
+    Each range is converted by its own process into a shard next to
+    output_path (data-00000.geojsonl, data-00001.geojsonl, ...). Otherwise
+    the whole layer is written to output_path.
+
+    When `output` rolls over (shard_mb / shard_rows), each of those files is
+    itself written as a series of shards: data-00000.geojsonl, ... or, per
+    range, data-00000-00000.geojsonl, ...
 
     Args:
-        gdb_path: Path to the .gdb directory
+        gdb_path: Path to the .gdb directory, or a /vsizip/ path
         layer_name: Name of the layer to extract
-        output_path: Path to write the JSONL output file
+        output_path: Local path, or a gs:// URI to stream the output to
+            directly without a local staging file
         source_file: Name of the source file (for metadata)
+        splits: Maximum number of ranges to convert in parallel
+        output: File format and compression (default: uncompressed JSONL);
+            the caller picks a matching file extension
+        reader: "fiona" (per-feature) or "arrow" (batched); see resolve_reader
+        loaded_at: _loaded_at for every row (default: when conversion starts),
+            so a rerun can reproduce the same bytes
+        upload_to: gs:// URI matching a local output_path; each local file is
+            uploaded to the object of the same name beside it as soon as it
+            is closed (skipped if that object is already identical), then
+            deleted
 
     Returns:
-        Number of features written
+        LayerOutput with the feature count and the files (or URIs) written
+    """
+    if splits > 1:
+        with fiona.open(gdb_path, layer=layer_name) as collection:
+            total = len(collection)
+        splits = min(splits, total // MIN_SPLIT_FEATURES)
+
+    loaded_at = loaded_at or datetime.now(timezone.utc)
+    if splits <= 1:
+        return _extract_range(
+            gdb_path, layer_name, output_path, source_file, output,
+            reader=reader, loaded_at=loaded_at, upload_to=upload_to,
+        )
+
+    ranges = split_ranges(total, splits)
+    paths = [shard_path(output_path, i) for i in range(len(ranges))]
+
+    # spawn rather than fork: GDAL is not fork-safe.
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=len(ranges), mp_context=ctx, initializer=init_worker, initargs=(gcs.settings(),)
+    ) as pool:
+        futures = [
+            pool.submit(
+                _extract_range_in_worker,
+                gdb_path, layer_name, path, source_file, output, reader, start, stop, loaded_at, upload_to,
+            )
+            for path, (start, stop) in zip(paths, ranges)
+        ]
+        outputs = [f.result() for f in futures]
+
+    return LayerOutput(
+        count=sum(o.count for o in outputs),
+        paths=[p for o in outputs for p in o.paths],
+        bytes=sum(o.bytes for o in outputs),
+        worker_cpu_s=sum(o.worker_cpu_s for o in outputs),
+    )
+
+
+def init_worker(transport: GCSTransportConfig) -> None:
+    """Worker process setup: shared GCS settings, and SIGTERM left to the parent.
+
+    The parent drains in-flight layers when it is asked to stop, so conversion
+    and split-range workers must not die mid-layer when the whole process
+    group gets the signal.
     """
-    from rextag.convert import convert_features
+    gcs.configure(transport)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    count = 0
 
+def _extract_range_in_worker(*args) -> LayerOutput:
+    """_extract_range in a split-range worker process, recording the CPU time it used."""
+    start = time.process_time()
+    output = _extract_range(*args)
+    output.worker_cpu_s = time.process_time() - start
+    return output
+
+
+def _extract_range(
+    gdb_path: Path | str,
+    layer_name: str,
+    output_path: Path | str,
+    source_file: str,
+    output: OutputConfig | None = None,
+    reader: str = "fiona",
+    start: int | None = None,
+    stop: int | None = None,
+    loaded_at: datetime | None = None,
+    upload_to: str | None = None,
+) -> LayerOutput:
+    """Convert features [start, stop) of a layer to one output file (or rolling shards).
+
+    A failed conversion aborts the sink, so no partial file or object is left.
+    """
+    from rextag.sinks import RollingSink, open_sink
+
+    output = output or OutputConfig()
+    uploader = _ShardUploader(upload_to) if upload_to is not None else None
     with fiona.open(gdb_path, layer=layer_name) as collection:
-        if has_geometry(collection.schema) and collection.crs:
-            crs = collection.crs.get("init", "EPSG:4326") if isinstance(collection.crs, dict) else str(collection.crs)
-            if not crs or crs.strip() == "":
-                crs = "EPSG:4326"
+        crs = _layer_crs(collection)
+        features = collection if start is None else collection.filter(start, stop)
+
+        if output.rolls_over:
+            sink = RollingSink(
+                lambda n: shard_path(output_path, n),
+                compression=output.sink_compression,
+                max_bytes=output.shard_mb * 1024 * 1024 if output.shard_mb else None,
+                max_rows=output.shard_rows,
+                row_writes=output.format == "jsonl",
+                on_close=uploader.submit if uploader else None,
+            )
         else:
-            crs = "EPSG:4326"
-        lines = convert_features(collection, crs=crs, source_file=source_file, layer_name=layer_name)
+            sink = open_sink(output_path, compression=output.sink_compression)
+        try:
+            if reader == "arrow":
+                from rextag.arrow_reader import write_layer
+
+                count = write_layer(
+                    gdb_path, layer_name, collection.schema, crs, source_file, sink, output, start, stop, loaded_at
+                )
+            elif output.format == "parquet":
+                from rextag.parquet import write_parquet
+
+                count = write_parquet(
+                    features, collection.schema, crs, source_file, layer_name, sink,
+                    compression=output.compression, loaded_at=loaded_at,
+                )
+            else:
+                count = _write_jsonl(features, crs, source_file, layer_name, sink, output.json_encoder, loaded_at)
+            sink.close()
+        except BaseException:
+            sink.abort()
+            if uploader is not None:
+                uploader.abort()
+            raise
+
+    paths = sink.targets if output.rolls_over else [output_path]
+    if uploader is None:
+        return LayerOutput(count=count, paths=paths, bytes=sink.bytes_written)
+    if not output.rolls_over:
+        uploader.submit(output_path)
+    return LayerOutput(count=count, paths=uploader.wait(), bytes=sink.bytes_written)
+
+
+class _ShardUploader:
+    """Upload closed local shards in the background while the next one is written.
+
+    Each file goes to the object of the same name beside `upload_to`, and is
+    deleted locally once uploaded (or found already staged). A writer more
+    than `workers` shards ahead of the uploads waits, bounding local disk use.
+    """
+
+    def __init__(self, upload_to: str, workers: int = 2):
+        self._prefix = upload_to.rpartition("/")[0]
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard-upload")
+        self._max_pending = workers
+        self._futures = []
 
-        with open(output_path, "w") as f:
-            for line in lines:
-                f.write(line + "\n")
-                count += 1
+    def submit(self, path: Path) -> None:
+        self._futures.append(self._pool.submit(self._upload, Path(path), f"{self._prefix}/{Path(path).name}"))
+        if len(self._futures) > self._max_pending:
+            self._futures[-self._max_pending - 1].result()
 
+    def wait(self) -> list[str]:
+        """URIs of every shard, in order, once all are uploaded."""
+        try:
+            return [f.result() for f in self._futures]
+        finally:
+            self._pool.shutdown()
+
+    def abort(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _upload(path: Path, gcs_uri: str) -> str:
+        gcs.upload_if_changed(path, gcs_uri)
+        path.unlink()
+        return gcs_uri
+
+
+def _write_jsonl(
+    features, crs: str, source_file: str, layer_name: str, sink, encoder: str, loaded_at: datetime | None = None
+) -> int:
+    from rextag.convert import encode_features
+
+    count = 0
+    for row in encode_features(features, crs, source_file, layer_name, backend=encoder, loaded_at=loaded_at):
+        sink.write(row + b"\n")
+        count += 1
     return count
@@ -0,0 +1,529 @@
+"""Shared GCS transport: one client per process over a pooled HTTP session.
+
+Every GCS call in rextag goes through this module. The storage client (and
+its credential discovery) is created lazily once per process, requests share
+a connection pool of `pool_size`, at most `max_in_flight` operations run at
+once, and transient failures (429, 5xx, connection errors) are retried with
+exponential backoff. Set STORAGE_EMULATOR_HOST to point it at a local fake.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import quote
+
+import google.auth
+import google_crc32c
+import requests.adapters
+from google.api_core.exceptions import NotFound
+from google.api_core.retry import Retry
+from google.auth.credentials import AnonymousCredentials, Credentials
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.cloud import storage
+from google.cloud.storage.retry import DEFAULT_RETRY
+
+from rextag.config import GCSTransportConfig
+
+_lock = threading.Lock()
+_settings = GCSTransportConfig()
+_slots = threading.BoundedSemaphore(_settings.max_in_flight)
+_client: storage.Client | None = None
+_client_pid: int | None = None
+_credentials: Credentials | None = None
+
+
+def configure(settings: GCSTransportConfig) -> None:
+    """Apply transport settings for this process; the next call builds a new client.
+
+    Also used as the initializer of worker processes, so they share the
+    parent's settings.
+    """
+    global _settings, _slots, _client
+    with _lock:
+        _settings = settings
+        _slots = threading.BoundedSemaphore(settings.max_in_flight)
+        _client = None
+
+
+def settings() -> GCSTransportConfig:
+    """The transport settings in effect for this process."""
+    return _settings
+
+
+def get_client() -> storage.Client:
+    """The process-wide storage client, created on first use."""
+    global _client, _client_pid, _credentials
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            _client, _credentials = _new_client(_settings)
+            _client_pid = os.getpid()
+        return _client
+
+
+def _new_client(settings: GCSTransportConfig) -> tuple[storage.Client, Credentials]:
+    if os.environ.get("STORAGE_EMULATOR_HOST"):
+        credentials, project = AnonymousCredentials(), os.environ.get("GOOGLE_CLOUD_PROJECT")
+    else:
+        credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+
+    session = AuthorizedSession(credentials)
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=settings.pool_size, pool_maxsize=settings.pool_size
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return storage.Client(project=project, credentials=credentials, _http=session), credentials
+
+
+def retry_policy() -> Retry:
+    """Backoff policy for GCS requests under the current settings."""
+    return DEFAULT_RETRY.with_delay(
+        initial=_settings.initial_backoff, maximum=_settings.max_backoff
+    ).with_timeout(_settings.retry_timeout)
+
+
+@contextmanager
+def request_slot() -> Iterator[None]:
+    """Hold one of the process's `max_in_flight` GCS operation slots."""
+    slots = _slots
+    with slots:
+        yield
+
+
+def parse_uri(gcs_uri: str) -> tuple[str, str]:
+    """Split gs://bucket/path into (bucket, path)."""
+    parts = gcs_uri.replace("gs://", "").split("/", 1)
+    return parts[0], parts[1] if len(parts) > 1 else ""
+
+
+def blob(gcs_uri: str) -> storage.Blob:
+    """Blob handle for a gs:// URI on the shared client."""
+    bucket_name, blob_path = parse_uri(gcs_uri)
+    return get_client().bucket(bucket_name).blob(blob_path)
+
+
+def media_url(gcs_uri: str) -> str:
+    """HTTP URL serving an object's bytes (on the emulator if STORAGE_EMULATOR_HOST is set)."""
+    bucket_name, blob_path = parse_uri(gcs_uri)
+    endpoint = os.environ.get("STORAGE_EMULATOR_HOST") or "https://storage.googleapis.com"
+    if "://" not in endpoint:
+        endpoint = f"http://{endpoint}"
+    return f"{endpoint.rstrip('/')}/download/storage/v1/b/{bucket_name}/o/{quote(blob_path, safe='')}?alt=media"
+
+
+def gdal_http_options() -> dict[str, str]:
+    """GDAL config options for reading `media_url`s through /vsicurl/ as this process.
+
+    Sends the client's OAuth token as a bearer header, and stops GDAL from
+    listing the parent "directory" of each URL it opens.
+    """
+    get_client()
+    options = {"GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR"}
+    with _lock:
+        if not isinstance(_credentials, AnonymousCredentials):
+            if not _credentials.valid:
+                _credentials.refresh(Request())
+            options["GDAL_HTTP_HEADERS"] = f"Authorization: Bearer {_credentials.token}"
+    return options
+
+
+def download(gcs_uri: str, dest: Path) -> None:
+    """Download an object to a local file.
+
+    Objects larger than one slice are fetched as concurrent byte ranges
+    (see `download_sliced`); smaller ones use a single request.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    bucket_name, blob_path = parse_uri(gcs_uri)
+    with request_slot():
+        meta = get_client().bucket(bucket_name).get_blob(blob_path, retry=retry_policy())
+    if meta is None:
+        raise FileNotFoundError(f"GCS object not found: {gcs_uri}")
+
+    slice_size = _settings.download_slice_mb * 1024 * 1024
+    # Ranges of a transcoded (gzip-encoded) object are served decompressed.
+    if meta.size <= slice_size or meta.content_encoding == "gzip":
+        with request_slot():
+            meta.download_to_filename(str(dest), retry=retry_policy())
+        return
+    download_sliced(meta, dest, slice_size, _settings.download_slices)
+
+
+def download_sliced(meta: storage.Blob, dest: Path, slice_size: int, concurrency: int) -> None:
+    """Download an object as concurrent byte-range slices into a preallocated file.
+
+    Each slice is written at its offset as it streams in and checksummed on
+    the way, and the slice CRCs are combined to verify the object's crc32c
+    without reading the file back. All slices are pinned to the generation
+    read in `meta`. The file is removed if any slice fails or the checksum
+    does not match.
+    """
+    ranges = [(start, min(start + slice_size, meta.size)) for start in range(0, meta.size, slice_size)]
+    fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, meta.size)
+
+        def fetch(byte_range: tuple[int, int]) -> int:
+            start, stop = byte_range
+            writer = _SliceWriter(fd, start)
+            with request_slot():
+                meta.download_to_file(
+                    writer,
+                    start=start,
+                    end=stop - 1,
+                    raw_download=True,
+                    if_generation_match=meta.generation,
+                    checksum=None,
+                    retry=retry_policy(),
+                )
+            if writer.length != stop - start:
+                raise ValueError(f"Short read for bytes {start}-{stop - 1} of gs://{meta.bucket.name}/{meta.name}")
+            return writer.crc
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(ranges))) as pool:
+            crcs = list(pool.map(fetch, ranges))
+    except BaseException:
+        os.close(fd)
+        dest.unlink(missing_ok=True)
+        raise
+    os.close(fd)
+
+    if meta.crc32c is not None:
+        crc = crcs[0]
+        for (start, stop), slice_crc in zip(ranges[1:], crcs[1:]):
+            crc = crc32c_combine(crc, slice_crc, stop - start)
+        expected = int.from_bytes(base64.b64decode(meta.crc32c), "big")
+        if crc != expected:
+            dest.unlink(missing_ok=True)
+            raise ValueError(
+                f"crc32c mismatch downloading gs://{meta.bucket.name}/{meta.name}: "
+                f"got {crc:08x}, expected {expected:08x}"
+            )
+
+
+class _SliceWriter:
+    """File-like target for one byte range: positional writes plus a running crc32c."""
+
+    def __init__(self, fd: int, offset: int):
+        self._fd = fd
+        self._offset = offset
+        self._checksum = google_crc32c.Checksum()
+        self.length = 0
+
+    def write(self, data: bytes) -> int:
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(self._fd, view, self._offset + self.length)
+            self.length += written
+            view = view[written:]
+        self._checksum.update(data)
+        return len(data)
+
+    @property
+    def crc(self) -> int:
+        return int.from_bytes(self._checksum.digest(), "big")
+
+
+_CRC32C_POLY = 0x82F63B78  # reflected Castagnoli polynomial
+
+
+def _gf2_times(matrix: list[int], vector: int) -> int:
+    total = 0
+    i = 0
+    while vector:
+        if vector & 1:
+            total ^= matrix[i]
+        vector >>= 1
+        i += 1
+    return total
+
+
+def _gf2_square(matrix: list[int]) -> list[int]:
+    return [_gf2_times(matrix, row) for row in matrix]
+
+
+def crc32c_combine(crc1: int, crc2: int, len2: int) -> int:
+    """CRC32C of A+B from crc(A), crc(B) and len(B), as zlib's crc32_combine."""
+    if len2 <= 0:
+        return crc1
+    odd = [_CRC32C_POLY] + [1 << n for n in range(31)]  # one zero bit
+    even = _gf2_square(odd)  # two zero bits
+    odd = _gf2_square(even)  # four zero bits
+    # Apply len2 zero bytes to crc1, squaring the operator per bit of len2.
+    while True:
+        even = _gf2_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+        odd = _gf2_square(even)
+        if len2 & 1:
+            crc1 = _gf2_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+    return crc1 ^ crc2
+
+
+def upload(local_path: Path, gcs_uri: str) -> None:
+    """Upload a local file, replacing any object at the URI.
+
+    Staging objects are always rewritten whole, so retrying an upload is safe.
+    Files larger than one part are uploaded in parallel (see `upload_composite`).
+    """
+    part_size = _settings.upload_part_mb * 1024 * 1024
+    if local_path.stat().st_size > part_size:
+        upload_composite(local_path, gcs_uri, part_size, _settings.upload_parts)
+        return
+    with request_slot():
+        blob(gcs_uri).upload_from_filename(str(local_path), retry=retry_policy())
+
+
+def upload_if_changed(local_path: Path, gcs_uri: str) -> bool:
+    """Upload a file unless the object already holds the same bytes; return whether it uploaded.
+
+    Compares size and crc32c, which every object has (composed ones have no md5).
+    """
+    bucket_name, blob_path = parse_uri(gcs_uri)
+    with request_slot():
+        meta = get_client().bucket(bucket_name).get_blob(blob_path, retry=retry_policy())
+    if meta is not None and meta.size == local_path.stat().st_size and meta.crc32c is not None:
+        checksum = google_crc32c.Checksum()
+        with open(local_path, "rb") as f:
+            while chunk := f.read(_PART_CHUNK_SIZE):
+                checksum.update(chunk)
+        if base64.b64encode(checksum.digest()).decode() == meta.crc32c:
+            return False
+    upload(local_path, gcs_uri)
+    return True
+
+
+def delete(gcs_uris: list[str]) -> None:
+    """Delete objects; ones already gone are ignored."""
+    for gcs_uri in gcs_uris:
+        try:
+            with request_slot():
+                blob(gcs_uri).delete(retry=retry_policy())
+        except NotFound:
+            pass
+
+
+# GCS composes at most this many source objects per request.
+_MAX_COMPOSE_SOURCES = 32
+# Parts larger than this go up as resumable uploads in chunks of this size.
+_PART_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def upload_composite(local_path: Path, gcs_uri: str, part_size: int, concurrency: int) -> None:
+    """Upload a file as parallel part objects and compose them into `gcs_uri`.
+
+    Parts are staged under `<object>.parts/`, `concurrency` at a time, and
+    recorded in a state file next to the local file as they finish. Calling
+    again after an interruption re-uploads only the parts that are missing,
+    as long as the local file has the same contents: the state is keyed on
+    its sha256, not its mtime, so a layer converted again to the same bytes
+    by a resumed extract reuses the parts. The composed object's crc32c is
+    checked against the parts', then the parts and state file are removed.
+    """
+    bucket_name, blob_path = parse_uri(gcs_uri)
+    bucket = get_client().bucket(bucket_name)
+    size = local_path.stat().st_size
+    ranges = [(start, min(start + part_size, size)) for start in range(0, size, part_size)]
+    parts_prefix = f"{blob_path}.parts/"
+
+    state_path = upload_state_path(local_path)
+    state = _load_upload_state(state_path)
+    key = {"uri": gcs_uri, "size": size, "sha256": _file_sha256(local_path), "part_size": part_size}
+    if state.get("key") != key:
+        state = {"key": key, "parts": {}}
+    parts: dict[str, dict] = state["parts"]
+    if parts:
+        with request_slot():
+            staged = {b.name: b.generation for b in bucket.list_blobs(prefix=parts_prefix, retry=retry_policy())}
+        for index, part in list(parts.items()):
+            if staged.get(part["name"]) != part["generation"]:
+                del parts[index]
+
+    lock = threading.Lock()
+
+    def send(index: int) -> None:
+        start, stop = ranges[index]
+        part = _upload_part(bucket, f"{parts_prefix}{index:05d}", local_path, start, stop)
+        with lock:
+            parts[str(index)] = {"name": part.name, "generation": part.generation, "crc32c": part.crc32c}
+            _save_upload_state(state_path, state)
+
+    pending = [i for i in range(len(ranges)) if str(i) not in parts]
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(pending))) as pool:
+            list(pool.map(send, pending))
+
+    sources = [bucket.blob(parts[str(i)]["name"], generation=parts[str(i)]["generation"]) for i in range(len(ranges))]
+    final = _compose(bucket, sources, blob_path, parts_prefix)
+
+    crc = None
+    for index, (start, stop) in enumerate(ranges):
+        part_crc = int.from_bytes(base64.b64decode(parts[str(index)]["crc32c"]), "big")
+        crc = part_crc if crc is None else crc32c_combine(crc, part_crc, stop - start)
+    if final.crc32c is not None and int.from_bytes(base64.b64decode(final.crc32c), "big") != crc:
+        raise ValueError(f"crc32c mismatch composing {gcs_uri} from {len(ranges)} parts")
+
+    _delete_prefix(bucket, parts_prefix)
+    state_path.unlink(missing_ok=True)
+
+
+def upload_state_path(local_path: Path) -> Path:
+    """Where the part state of a composite upload of `local_path` is kept."""
+    return local_path.with_name(local_path.name + ".upload.json")
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_PART_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_upload_state(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_upload_state(path: Path, state: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+def _upload_part(bucket: storage.Bucket, name: str, local_path: Path, start: int, stop: int) -> storage.Blob:
+    part = bucket.blob(name, chunk_size=_PART_CHUNK_SIZE)
+    with open(local_path, "rb") as f, request_slot():
+        part.upload_from_file(
+            _FileRange(f, start, stop - start), size=stop - start, checksum="crc32c", retry=retry_policy()
+        )
+    return part
+
+
+def _compose(bucket: storage.Bucket, sources: list[storage.Blob], blob_path: str, parts_prefix: str) -> storage.Blob:
+    """Compose sources into `blob_path`, via intermediate objects past the per-request limit."""
+    level = 0
+    while len(sources) > _MAX_COMPOSE_SOURCES:
+        grouped = []
+        for n, i in enumerate(range(0, len(sources), _MAX_COMPOSE_SOURCES)):
+            intermediate = bucket.blob(f"{parts_prefix}compose-{level}-{n:05d}")
+            with request_slot():
+                intermediate.compose(sources[i:i + _MAX_COMPOSE_SOURCES], retry=retry_policy())
+            grouped.append(intermediate)
+        sources = grouped
+        level += 1
+    final = bucket.blob(blob_path)
+    with request_slot():
+        final.compose(sources, retry=retry_policy())
+    return final
+
+
+def _delete_prefix(bucket: storage.Bucket, prefix: str) -> None:
+    with request_slot():
+        names = [b.name for b in bucket.list_blobs(prefix=prefix, retry=retry_policy())]
+    for name in names:
+        with request_slot():
+            try:
+                bucket.blob(name).delete(retry=retry_policy())
+            except NotFound:
+                pass
+
+
+class _FileRange:
+    """Read-only, seekable view of bytes [offset, offset + length) of an open file."""
+
+    def __init__(self, f, offset: int, length: int):
+        self._f = f
+        self._offset = offset
+        self._length = length
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self._length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        self._f.seek(self._offset + self._pos)
+        data = self._f.read(size)
+        self._pos += len(data)
+        return data
+
+    def seek(self, pos: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            pos += self._pos
+        elif whence == os.SEEK_END:
+            pos += self._length
+        self._pos = max(0, min(pos, self._length))
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def list_uris(gcs_prefix: str, suffix: str | None = None) -> list[str]:
+    """URIs of the objects under a prefix, optionally filtered by suffix."""
+    bucket_name, prefix = parse_uri(gcs_prefix)
+    with request_slot():
+        blobs = get_client().bucket(bucket_name).list_blobs(prefix=prefix, retry=retry_policy())
+        names = [b.name for b in blobs]
+    return [
+        f"gs://{bucket_name}/{name}"
+        for name in names
+        if suffix is None or name.endswith(suffix)
+    ]
+
+
+def list_generations(gcs_prefix: str, suffix: str | None = None) -> dict[str, int]:
+    """Generation of each object under a prefix, by URI, optionally filtered by suffix."""
+    bucket_name, prefix = parse_uri(gcs_prefix)
+    with request_slot():
+        blobs = get_client().bucket(bucket_name).list_blobs(prefix=prefix, retry=retry_policy())
+        generations = {b.name: b.generation for b in blobs}
+    return {
+        f"gs://{bucket_name}/{name}": generation
+        for name, generation in generations.items()
+        if suffix is None or name.endswith(suffix)
+    }
+
+
+def metadata(gcs_uri: str) -> storage.Blob:
+    """An object's current metadata (generation, size, md5, ...)."""
+    bucket_name, blob_path = parse_uri(gcs_uri)
+    with request_slot():
+        meta = get_client().bucket(bucket_name).get_blob(blob_path, retry=retry_policy())
+    if meta is None:
+        raise FileNotFoundError(f"GCS object not found: {gcs_uri}")
+    return meta
+
+
+def generation(gcs_uri: str) -> int:
+    """Current generation of an object."""
+    return metadata(gcs_uri).generation
+
+
+def read_bytes(gcs_uri: str) -> bytes | None:
+    """An object's contents, or None if it does not exist."""
+    try:
+        with request_slot():
+            return blob(gcs_uri).download_as_bytes(retry=retry_policy())
+    except NotFound:
+        return None
+
+
+def write_bytes(gcs_uri: str, data: bytes, content_type: str = "application/json") -> None:
+    """Write a small object in one request."""
+    with request_slot():
+        blob(gcs_uri).upload_from_string(data, content_type=content_type, retry=retry_policy())
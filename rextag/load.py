@@ -1,8 +1,26 @@
-"""Upload files to GCS."""
+"""Upload files to GCS, and load staged layers into native BigQuery tables."""
 
+import os
+from collections.abc import Callable
+from datetime import datetime
 from pathlib import Path
 
-from google.cloud import storage
+from google.api_core.client_options import ClientOptions
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import bigquery
+
+from rextag import gcs
+from rextag.config import BigQueryConfig, OutputConfig, PipelineConfig, SourceConfig
+from rextag.extract import has_geometry, parse_data_drop
+from rextag.schema import build_bq_schema
+from rextag.state import LayerState, load_state
+
+# data_drop format -> (partition type, partition decorator format), most specific first.
+_PARTITIONS = (
+    ("%Y-%m-%d", bigquery.TimePartitioningType.DAY, "%Y%m%d"),
+    ("%Y-%m", bigquery.TimePartitioningType.MONTH, "%Y%m"),
+    ("%Y", bigquery.TimePartitioningType.YEAR, "%Y"),
+)
 
 
 def upload_to_gcs(local_path: Path, gcs_uri: str) -> None:
@@ -12,11 +30,132 @@ def upload_to_gcs(local_path: Path, gcs_uri: str) -> None:
         local_path: Path to the local file
         gcs_uri: Full GCS URI like gs://bucket/path/to/file.jsonl
     """
-    parts = gcs_uri.replace("gs://", "").split("/", 1)
-    bucket_name = parts[0]
-    blob_path = parts[1]
-
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_path)
-    blob.upload_from_filename(str(local_path))
+    gcs.upload(local_path, gcs_uri)
+
+
+def staged_schema(fiona_schema: dict, output: OutputConfig) -> list[dict]:
+    """BigQuery schema of a layer's staging files, as API field resources.
+
+    JSONL rows always carry a GeoJSON text `geometry` (null without one);
+    Parquet files have a WKB `geometry` column only for layers with geometry.
+    """
+    if output.format == "parquet":
+        geometry_type = "BYTES" if has_geometry(fiona_schema) else None
+    else:
+        geometry_type = "STRING"
+    return [f.to_api_repr() for f in build_bq_schema(fiona_schema, geometry_type=geometry_type)]
+
+
+def partition_for(data_drop: str) -> tuple[str, str]:
+    """Time partitioning type and partition decorator for a data drop.
+
+    "2026-01" is the MONTH partition 202601, "2026-01-15" the DAY partition
+    20260115, and "2026" the YEAR partition 2026.
+    """
+    for fmt, partition_type, decorator in _PARTITIONS:
+        try:
+            value = datetime.strptime(data_drop, fmt)
+        except ValueError:
+            continue
+        return partition_type, value.strftime(decorator)
+    raise ValueError(
+        f"Cannot map data_drop '{data_drop}' to a partition. Expected YYYY, YYYY-MM or YYYY-MM-DD"
+    )
+
+
+def get_bq_client(settings: BigQueryConfig) -> bigquery.Client:
+    """BigQuery client for `settings` (on the emulator if BIGQUERY_EMULATOR_HOST is set)."""
+    endpoint = os.environ.get("BIGQUERY_EMULATOR_HOST")
+    if not endpoint:
+        return bigquery.Client(project=settings.project, location=settings.location)
+    if "://" not in endpoint:
+        endpoint = f"http://{endpoint}"
+    return bigquery.Client(
+        project=settings.project or os.environ.get("GOOGLE_CLOUD_PROJECT"),
+        location=settings.location,
+        credentials=AnonymousCredentials(),
+        client_options=ClientOptions(api_endpoint=endpoint),
+    )
+
+
+def start_layer_load(
+    client: bigquery.Client,
+    layer: LayerState,
+    table_id: str,
+    data_drop: str,
+    output: OutputConfig,
+) -> bigquery.LoadJob:
+    """Start a load job replacing one data drop's partition of a layer's table.
+
+    The table is created if needed, partitioned by ingestion time at the
+    data drop's granularity, and the job writes to the partition decorator
+    with WRITE_TRUNCATE, so rerunning it replaces the partition rather than
+    appending to it. Columns added in a later data drop are added to the table.
+    """
+    partition_type, decorator = partition_for(data_drop)
+    schema = [bigquery.SchemaField.from_api_repr(f) for f in layer.schema]
+    table = bigquery.Table(table_id, schema=schema)
+    table.time_partitioning = bigquery.TimePartitioning(type_=partition_type)
+    client.create_table(table, exists_ok=True)
+
+    job_config = bigquery.LoadJobConfig(
+        schema=schema,
+        source_format=(
+            bigquery.SourceFormat.PARQUET if output.format == "parquet"
+            else bigquery.SourceFormat.NEWLINE_DELIMITED_JSON
+        ),
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
+    )
+    return client.load_table_from_uri(layer.uris, f"{table_id}${decorator}", job_config=job_config)
+
+
+def load_source(
+    client: bigquery.Client,
+    config: PipelineConfig,
+    source: SourceConfig,
+    echo: Callable[[str], None] = print,
+) -> list[str]:
+    """Load every layer extract staged for a source; return descriptions of what failed.
+
+    Layers and their schemas come from the source's state manifest, which
+    must be complete. All of the source's load jobs are started before any
+    is waited on, so BigQuery runs them concurrently.
+    """
+    echo(f"Loading source: {source.name}")
+    data_drop = parse_data_drop(source.uri)
+    state = load_state(config.manifest_path(source.name, data_drop))
+    if state is None or not state.complete or state.source_uri != source.uri:
+        echo(f"  Not fully staged from {source.uri}; run extract first")
+        return [source.name]
+    output = OutputConfig(**state.output)
+    _, partition = partition_for(data_drop)
+
+    failed = []
+    jobs = {}
+    for layer_name, layer in state.layers.items():
+        table_id = config.bigquery.table_id(source.name, layer_name)
+        if layer.schema is None:
+            echo(f"  No schema recorded for layer {layer_name}; rerun extract with --force")
+            failed.append(f"{source.name}/{layer_name}")
+            continue
+        try:
+            jobs[layer_name] = (table_id, layer, start_layer_load(client, layer, table_id, data_drop, output))
+        except Exception as e:
+            echo(f"  Failed to start load of {layer_name}: {e}")
+            failed.append(f"{source.name}/{layer_name}")
+
+    for layer_name, (table_id, layer, job) in jobs.items():
+        try:
+            job.result()
+        except Exception as e:
+            echo(f"  Failed: {layer_name} -> {table_id}: {e}")
+            failed.append(f"{source.name}/{layer_name}")
+            continue
+        if job.output_rows != layer.count:
+            echo(f"  Loaded {job.output_rows} rows into {table_id}${partition}, but {layer.count} were staged")
+            failed.append(f"{source.name}/{layer_name}")
+        else:
+            echo(f"  Loaded {job.output_rows} rows into {table_id}${partition}")
+    echo(f"Completed: {source.name}" if not failed else f"Completed with errors: {source.name}")
+    return failed
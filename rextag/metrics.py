@@ -0,0 +1,189 @@
+"""Per-stage instrumentation and the run report written by --metrics-out.
+
+Each stage of a run (download, unzip, convert, upload, inspect, ...) is
+timed with `measure`, which records wall and CPU time and the peak RSS
+of the process that ran it; the stage fills in bytes and features as it
+goes. Stages may run in worker processes: StageMetrics is a plain
+dataclass, so it travels back to the parent with the stage's result and
+is added to the RunReport there.
+"""
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+@dataclass
+class StageMetrics:
+    """One stage for one source (and layer, for per-layer stages).
+
+    `cpu_s` is CPU time of the thread that ran the stage, plus any worker
+    processes it waited on; `peak_rss_bytes` is the running process's peak
+    RSS when the stage ended. Bytes and features are None where a stage has
+    nothing to count. The convert stage also counts its reprojection
+    Transformer cache lookups (those in its own thread; split-range worker
+    processes keep their own caches).
+    """
+
+    stage: str
+    source: str
+    layer: str | None = None
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    bytes_in: int | None = None
+    bytes_out: int | None = None
+    features: int | None = None
+    transformer_cache_hits: int | None = None
+    transformer_cache_misses: int | None = None
+    peak_rss_bytes: int = 0
+    ok: bool = True
+
+    @property
+    def features_per_s(self) -> float | None:
+        if self.features is None or not self.wall_s:
+            return None
+        return self.features / self.wall_s
+
+    def to_dict(self) -> dict:
+        doc = asdict(self)
+        doc["features_per_s"] = round(self.features_per_s, 1) if self.features_per_s is not None else None
+        doc["wall_s"] = round(self.wall_s, 4)
+        doc["cpu_s"] = round(self.cpu_s, 4)
+        return doc
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@contextmanager
+def measure(stage: str, source: str, layer: str | None = None) -> Iterator[StageMetrics]:
+    """Time a stage; the caller sets bytes_in/bytes_out/features on the yielded metrics.
+
+    If the block raises, the metrics are still completed, with `ok` False.
+    """
+    metrics = StageMetrics(stage=stage, source=source, layer=layer)
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield metrics
+    except BaseException:
+        metrics.ok = False
+        raise
+    finally:
+        metrics.wall_s = time.perf_counter() - wall
+        metrics.cpu_s += time.thread_time() - cpu
+        metrics.peak_rss_bytes = peak_rss_bytes()
+
+
+class RunReport:
+    """Stage metrics collected over one `rextag extract` or `rextag scan` run."""
+
+    def __init__(self, command: str):
+        self.command = command
+        self.started_at = datetime.now(timezone.utc)
+        self.stages: list[StageMetrics] = []
+        self.failures: list[str] = []
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._lock = threading.Lock()
+
+    def add(self, *metrics: StageMetrics) -> None:
+        with self._lock:
+            self.stages.extend(metrics)
+
+    def _snapshot(self) -> list[StageMetrics]:
+        with self._lock:
+            return list(self.stages)
+
+    def to_dict(self) -> dict:
+        """The JSON run report: run totals, each source's totals by stage, and every stage."""
+        stages = self._snapshot()
+        sources: dict[str, dict] = {}
+        for m in stages:
+            totals = sources.setdefault(m.source, {}).setdefault(m.stage, {"count": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            totals["count"] += 1
+            totals["wall_s"] = round(totals["wall_s"] + m.wall_s, 4)
+            totals["cpu_s"] = round(totals["cpu_s"] + m.cpu_s, 4)
+            for key in ("bytes_in", "bytes_out", "features", "transformer_cache_hits", "transformer_cache_misses"):
+                if getattr(m, key) is not None:
+                    totals[key] = totals.get(key, 0) + getattr(m, key)
+        return {
+            "command": self.command,
+            "started_at": self.started_at.isoformat(),
+            "wall_s": round(time.perf_counter() - self._wall, 4),
+            "cpu_s": round(time.process_time() - self._cpu, 4),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "failures": list(self.failures),
+            "sources": sources,
+            "stages": [m.to_dict() for m in stages],
+        }
+
+    def to_prometheus(self) -> str:
+        """The report as Prometheus text exposition format, for node_exporter's textfile collector."""
+        doc = self.to_dict()
+        run = {"command": self.command}
+        lines = []
+
+        def gauge(name: str, help_text: str, samples: list[tuple[dict, float]]) -> None:
+            lines.append(f"# HELP rextag_{name} {help_text}")
+            lines.append(f"# TYPE rextag_{name} gauge")
+            for labels, value in samples:
+                lines.append(f"rextag_{name}{_labels(labels)} {value}")
+
+        gauge("run_start_timestamp_seconds", "Unix time the run started.", [(run, self.started_at.timestamp())])
+        gauge("run_wall_seconds", "Wall time of the whole run.", [(run, doc["wall_s"])])
+        gauge("run_cpu_seconds", "CPU time of the run's main process.", [(run, doc["cpu_s"])])
+        gauge("run_failures", "Sources or layers that failed.", [(run, len(doc["failures"]))])
+
+        def stage_labels(m: StageMetrics) -> dict:
+            return {**run, "stage": m.stage, "source": m.source, "layer": m.layer or ""}
+
+        for name, attr, help_text in (
+            ("stage_wall_seconds", "wall_s", "Wall time of a stage."),
+            ("stage_cpu_seconds", "cpu_s", "CPU time of a stage."),
+            ("stage_bytes_in", "bytes_in", "Bytes read by a stage."),
+            ("stage_bytes_out", "bytes_out", "Bytes written by a stage."),
+            ("stage_features", "features", "Features processed by a stage."),
+            ("stage_features_per_second", "features_per_s", "Features processed per second of wall time."),
+            ("stage_transformer_cache_hits", "transformer_cache_hits", "Reprojection Transformers reused."),
+            ("stage_transformer_cache_misses", "transformer_cache_misses", "Reprojection Transformers built."),
+            ("stage_peak_rss_bytes", "peak_rss_bytes", "Peak RSS of the process that ran a stage."),
+        ):
+            samples = [(stage_labels(m), getattr(m, attr)) for m in self._snapshot() if getattr(m, attr) is not None]
+            if samples:
+                gauge(name, help_text, samples)
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Write the report: Prometheus text if `path` ends in .prom, JSON otherwise.
+
+        Written to a temporary file and renamed into place, so a textfile
+        collector never reads a partial file.
+        """
+        path = Path(path)
+        if path.suffix == ".prom":
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.to_dict(), indent=2) + "\n"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        partial.write_text(text)
+        partial.replace(path)
+
+
+def _labels(labels: dict) -> str:
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,297 @@
+"""Write converted layers as GeoParquet with WKB geometry."""
+
+import json
+import struct
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, time, timezone
+from itertools import islice
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError as e:  # pragma: no cover - depends on the environment
+    raise ImportError(
+        "output.format 'parquet' requires pyarrow: pip install 'rextag[parquet]'"
+    ) from e
+
+from rextag.convert import _COORD_DEPTH, reproject_features
+from rextag.extract import has_geometry
+from rextag.schema import fiona_type_to_bq
+from rextag.sinks import RollingSink
+
+# Features per row group (and per record batch built in memory).
+ROW_GROUP_SIZE = 65_536
+
+GEOPARQUET_VERSION = "1.0.0"
+
+_ARROW_TYPES = {
+    "STRING": pa.string(),
+    "INT64": pa.int64(),
+    "FLOAT64": pa.float64(),
+    "DATE": pa.date32(),
+    "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+    "TIME": pa.time64("us"),
+    "BOOL": pa.bool_(),
+}
+
+_WKB_TYPES = {
+    "Point": 1,
+    "LineString": 2,
+    "Polygon": 3,
+    "MultiPoint": 4,
+    "MultiLineString": 5,
+    "MultiPolygon": 6,
+    "GeometryCollection": 7,
+}
+# ISO WKB adds 1000 to the type code for geometries with Z values.
+_WKB_Z_OFFSET = 1000
+
+
+def arrow_schema(fiona_schema: dict) -> pa.Schema:
+    """Arrow schema for a layer, using the BigQuery types from fiona_type_to_bq.
+
+    Layers with geometry get a WKB `geometry` column and GeoParquet `geo`
+    metadata; layers without geometry are written as plain Parquet.
+    """
+    fields = []
+    geometry = has_geometry(fiona_schema)
+    if geometry:
+        fields.append(pa.field("geometry", pa.binary()))
+    for name, ftype in fiona_schema["properties"].items():
+        fields.append(pa.field(name, _ARROW_TYPES[fiona_type_to_bq(ftype)]))
+    fields.append(pa.field("_loaded_at", _ARROW_TYPES["TIMESTAMP"]))
+    fields.append(pa.field("_source_file", pa.string()))
+    fields.append(pa.field("_layer_name", pa.string()))
+
+    metadata = {b"geo": json.dumps(geo_metadata()).encode()} if geometry else None
+    return pa.schema(fields, metadata=metadata)
+
+
+def geo_metadata() -> dict:
+    """GeoParquet file metadata for the WKB geometry column.
+
+    CRS is omitted, which GeoParquet defines as OGC:CRS84 (WGS84 lon/lat,
+    what convert always produces). Geometry types are left open because
+    FileGDB layers declared as multi-part often hold single-part features.
+    """
+    return {
+        "version": GEOPARQUET_VERSION,
+        "primary_column": "geometry",
+        "columns": {
+            "geometry": {"encoding": "WKB", "geometry_types": []},
+        },
+    }
+
+
+def geometry_to_wkb(geometry) -> bytes:
+    """Encode a GeoJSON geometry as little-endian ISO WKB."""
+    out = bytearray()
+    _write_wkb(geometry, out)
+    return bytes(out)
+
+
+def _write_wkb(geometry, out: bytearray) -> None:
+    geom_type = geometry["type"]
+    if geom_type == "GeometryCollection":
+        members = geometry["geometries"]
+        out += struct.pack("<BII", 1, _WKB_TYPES[geom_type], len(members))
+        for member in members:
+            _write_wkb(member, out)
+        return
+
+    coords = geometry["coordinates"]
+    dims = _dimensions(coords, _COORD_DEPTH[geom_type])
+    _write_coords(geom_type, coords, dims, out)
+
+
+def _write_coords(geom_type: str, coords, dims: int, out: bytearray) -> None:
+    code = _WKB_TYPES[geom_type] + (_WKB_Z_OFFSET if dims == 3 else 0)
+    out += struct.pack("<BI", 1, code)
+    if geom_type == "Point":
+        # An empty point is encoded with NaN coordinates.
+        _write_position(coords or [], dims, out)
+    elif geom_type == "LineString":
+        _write_positions(coords, dims, out)
+    elif geom_type == "Polygon":
+        out += struct.pack("<I", len(coords))
+        for ring in coords:
+            _write_positions(ring, dims, out)
+    else:
+        part_type = geom_type[len("Multi"):]
+        out += struct.pack("<I", len(coords))
+        for part in coords:
+            _write_coords(part_type, part, dims, out)
+
+
+def _write_positions(positions, dims: int, out: bytearray) -> None:
+    out += struct.pack("<I", len(positions))
+    for position in positions:
+        _write_position(position, dims, out)
+
+
+def _write_position(position, dims: int, out: bytearray) -> None:
+    values = list(position[:dims])
+    values += [float("nan")] * (dims - len(values))
+    out += struct.pack(f"<{dims}d", *values)
+
+
+def _dimensions(coords, depth: int) -> int:
+    """2 or 3, from the first position in a coordinate array."""
+    while depth > 0:
+        if not coords:
+            return 2
+        coords = coords[0]
+        depth -= 1
+    return 3 if len(coords) >= 3 else 2
+
+
+def _to_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _to_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def _to_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _to_time(value):
+    if value is None or isinstance(value, time):
+        return value
+    return time.fromisoformat(value)
+
+
+# Fiona returns dates and times as ISO strings; unknown types become strings.
+_CONVERTERS = {
+    "STRING": _to_string,
+    "DATE": _to_date,
+    "TIMESTAMP": _to_datetime,
+    "TIME": _to_time,
+}
+
+
+def convert_features_to_batches(
+    features: Iterable[dict],
+    fiona_schema: dict,
+    crs: str,
+    source_file: str,
+    layer_name: str,
+    batch_size: int = ROW_GROUP_SIZE,
+    loaded_at: datetime | None = None,
+) -> Iterator[pa.RecordBatch]:
+    """Convert Fiona features to Arrow record batches of up to batch_size rows.
+
+    Geometry is reprojected to EPSG:4326 and encoded as WKB; properties are
+    typed per arrow_schema; metadata columns are added as in convert.
+    `loaded_at` defaults to the time each batch is built.
+    """
+    schema = arrow_schema(fiona_schema)
+    props = fiona_schema["properties"]
+    converters = {name: _CONVERTERS.get(fiona_type_to_bq(ftype)) for name, ftype in props.items()}
+    geometry = has_geometry(fiona_schema)
+
+    pairs = reproject_features(features, crs)
+    while batch := list(islice(pairs, batch_size)):
+        columns = []
+        if geometry:
+            columns.append([geometry_to_wkb(g) if g is not None else None for _, g in batch])
+        for name, convert in converters.items():
+            values = [(f.get("properties") or {}).get(name) for f, _ in batch]
+            columns.append([convert(v) for v in values] if convert else values)
+        columns.append([loaded_at or datetime.now(timezone.utc)] * len(batch))
+        columns.append([source_file] * len(batch))
+        columns.append([layer_name] * len(batch))
+        yield pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema,
+        )
+
+
+class _SinkFile:
+    """Present a sink to pyarrow as a writable file; closing stays with the caller."""
+
+    closed = False
+
+    def __init__(self, sink):
+        self._sink = sink
+
+    def write(self, data) -> int:
+        self._sink.write(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def write_parquet(
+    features: Iterable[dict],
+    fiona_schema: dict,
+    crs: str,
+    source_file: str,
+    layer_name: str,
+    sink,
+    compression: str = "none",
+    row_group_size: int = ROW_GROUP_SIZE,
+    loaded_at: datetime | None = None,
+) -> int:
+    """Write features to a sink as one GeoParquet file; return the feature count.
+
+    Each row group is built and written as one record batch, so memory use is
+    bounded by row_group_size. The sink is not closed.
+    """
+    batches = convert_features_to_batches(
+        features, fiona_schema, crs, source_file, layer_name, batch_size=row_group_size, loaded_at=loaded_at
+    )
+    return write_batches(batches, arrow_schema(fiona_schema), sink, compression, row_group_size)
+
+
+def write_batches(
+    batches: Iterable[pa.RecordBatch],
+    schema: pa.Schema,
+    sink,
+    compression: str = "none",
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> int:
+    """Write record batches to a sink as one Parquet file; return the row count.
+
+    A RollingSink gets one complete Parquet file per shard instead: batches
+    are cut at its row limit, and a full shard is closed after its footer.
+    """
+    rolling = isinstance(sink, RollingSink)
+    count = 0
+    writer = None
+    try:
+        for batch in batches:
+            while batch.num_rows:
+                if writer is None:
+                    writer = _parquet_writer(sink, schema, compression)
+                part = batch
+                if rolling and sink.rows_remaining is not None:
+                    part = batch.slice(0, sink.rows_remaining)
+                writer.write_batch(part, row_group_size=row_group_size)
+                count += part.num_rows
+                batch = batch.slice(part.num_rows)
+                if rolling and sink.end_rows(part.num_rows):
+                    writer.close()
+                    writer = None
+                    sink.roll()
+        if writer is None and count == 0:
+            writer = _parquet_writer(sink, schema, compression)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def _parquet_writer(sink, schema: pa.Schema, compression: str) -> pq.ParquetWriter:
+    return pq.ParquetWriter(pa.PythonFile(_SinkFile(sink), mode="w"), schema, compression=compression)
@@ -0,0 +1,552 @@
+"""Extraction work units and the scheduler that runs sources concurrently."""
+
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import traceback
+from collections.abc import Callable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import fiona
+
+from rextag import gcs
+from rextag.config import OutputConfig, PipelineConfig, SourceConfig
+from rextag.convert import transformer_cache_info
+from rextag.extract import (
+    download_from_gcs,
+    extract_layer_to_jsonl,
+    has_geometry,
+    decompress_geodatabase,
+    init_worker,
+    list_layers,
+    parse_data_drop,
+    resolve_reader,
+    vsizip_geodatabase,
+)
+from rextag.load import staged_schema, upload_to_gcs
+from rextag.metrics import RunReport, StageMetrics, measure
+from rextag.profiling import ProfileSettings, profile_layer
+from rextag.state import LayerState, SourceState, files_sha256, load_state, save_state
+
+DEFAULT_WORK_DIR = Path(".rextag") / "work"
+
+
+@dataclass
+class LayerResult:
+    """Outcome of converting and uploading one layer.
+
+    Progress messages are buffered in `log` so the parent can print each
+    layer's output as one block, even when layers finish out of order.
+    Stage timings travel back the same way, in `metrics`.
+    """
+
+    layer: str
+    ext: str | None = None
+    count: int = 0
+    paths: list[Path] = field(default_factory=list)
+    gcs_uris: list[str] = field(default_factory=list)
+    log: list[str] = field(default_factory=list)
+    error: str | None = None
+    sha256: str | None = None
+    schema: list[dict] | None = None
+    metrics: list[StageMetrics] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def state(self) -> LayerState:
+        """What the manifest records for this layer once staged."""
+        return LayerState(uris=list(self.gcs_uris), count=self.count, sha256=self.sha256, schema=self.schema)
+
+
+@dataclass(frozen=True)
+class SchedulerLimits:
+    """Concurrency caps for each extraction stage."""
+
+    sources: int = 1
+    downloads: int = 2
+    conversions: int = 1
+    uploads: int = 4
+
+
+def convert_layer(
+    gdb_path: Path | str,
+    layer: str,
+    source_name: str,
+    work_dir: Path,
+    splits: int = 1,
+    output: OutputConfig = OutputConfig(),
+    config: PipelineConfig | None = None,
+    data_drop: str | None = None,
+    reader: str = "fiona",
+    loaded_at: datetime | None = None,
+    upload: bool = False,
+    profile: ProfileSettings | None = None,
+) -> LayerResult:
+    """Convert one layer to local JSONL or GeoParquet file(s), per `output`.
+
+    Opens its own fiona handle so it can run in a worker process. Errors are
+    captured in the result rather than raised. When `config` and `data_drop`
+    are given, output is streamed straight to the layer's hive staging path
+    instead, leaving nothing for upload_layer to do. With `upload` (and
+    `config` and `data_drop`), output is still written locally, but each
+    file is uploaded as soon as it is closed, so shards of a layer that rolls
+    over are staged while the next is converted. Rows are stamped with
+    `loaded_at` (default: now). With `profile`, the conversion runs under
+    cProfile (see rextag.profiling).
+    """
+    result = LayerResult(layer=layer)
+    result.log.append(f"  Converting layer: {layer}")
+    try:
+        with measure("convert", source_name, layer) as metrics:
+            result.metrics.append(metrics)
+            with fiona.open(gdb_path, layer=layer) as collection:
+                result.ext = output.file_extension(has_geometry(collection.schema))
+                result.schema = staged_schema(collection.schema, output)
+
+            upload_to = None
+            if config is not None and data_drop is not None:
+                target = config.hive_staging_path(source_name, layer, data_drop, result.ext)
+                if upload:
+                    target, upload_to = Path(work_dir) / layer / f"data.{result.ext}", target
+                    result.log.append(f"    Uploading shards to {upload_to.rsplit('/', 1)[0]}/")
+                else:
+                    result.log.append(f"    Streaming to {target}")
+            else:
+                target = Path(work_dir) / layer / f"data.{result.ext}"
+            cache_before = transformer_cache_info(this_thread=True)
+            with profile_layer(profile, source_name, layer):
+                written = extract_layer_to_jsonl(
+                    gdb_path, layer, target, source_name,
+                    splits=splits, output=output, reader=reader, loaded_at=loaded_at, upload_to=upload_to,
+                )
+            cache_after = transformer_cache_info(this_thread=True)
+            metrics.transformer_cache_hits = cache_after.hits - cache_before.hits
+            metrics.transformer_cache_misses = cache_after.misses - cache_before.misses
+            metrics.features, metrics.bytes_out = written.count, written.bytes
+            metrics.cpu_s += written.worker_cpu_s
+        result.count = written.count
+        if isinstance(target, str) or upload_to is not None:
+            result.gcs_uris = written.paths
+        else:
+            result.paths = written.paths
+        result.log.append(f"    Wrote {result.count} features ({result.ext})")
+    except Exception:
+        result.error = traceback.format_exc()
+        result.log.append(f"    Failed: {layer}")
+    return result
+
+
+def upload_layer(
+    result: LayerResult,
+    config: PipelineConfig,
+    source_name: str,
+    data_drop: str,
+    previous: LayerState | None = None,
+) -> LayerResult:
+    """Upload a converted layer to its hive staging path(s), then delete the local files.
+
+    Layers converted as several shards are uploaded as data-NNNNN objects.
+    Streamed layers have no local files and are only marked done. When the
+    files hash the same as `previous` (the layer's last staged state) and
+    those objects are still staged, the upload is skipped. Data files left
+    in the partition by an earlier run that wrote more shards are deleted.
+    """
+    try:
+        with measure("upload", source_name, result.layer) as metrics:
+            result.metrics.append(metrics)
+            sharded = len(result.paths) > 1
+            uris = [
+                config.hive_staging_path(source_name, result.layer, data_drop, result.ext, shard=i if sharded else None)
+                for i in range(len(result.paths))
+            ]
+            if result.paths:
+                result.sha256 = files_sha256(result.paths)
+            metrics.bytes_out = 0
+            if _already_staged(result.sha256, uris, previous):
+                result.log.append("    Unchanged output, upload skipped")
+                for path in result.paths:
+                    path.unlink()
+                result.gcs_uris.extend(uris)
+            else:
+                for path, gcs_uri in zip(result.paths, uris):
+                    result.log.append(f"    Uploading to {gcs_uri}")
+                    metrics.bytes_out += path.stat().st_size
+                    upload_to_gcs(path, gcs_uri)
+                    path.unlink()
+                    result.gcs_uris.append(gcs_uri)
+            stale = _stale_shards(result.gcs_uris)
+            if stale:
+                result.log.append(f"    Removing {len(stale)} stale file(s) from an earlier run")
+                gcs.delete(stale)
+        result.log.append(f"    Done: {result.layer}")
+    except Exception:
+        result.error = traceback.format_exc()
+        result.log.append(f"    Failed: {result.layer}")
+    return result
+
+
+def _staged(uris: list[str]) -> bool:
+    """Whether all of `uris` (one layer's objects) currently exist."""
+    if not uris:
+        return False
+    prefix = uris[0].rsplit("/", 1)[0] + "/"
+    return set(uris) <= set(gcs.list_uris(prefix))
+
+
+def _stale_shards(uris: list[str]) -> list[str]:
+    """Data files in the partition of `uris` (one layer's staged objects) that are not among them."""
+    if not uris:
+        return []
+    prefix = uris[0].rsplit("/", 1)[0] + "/"
+    keep = set(uris)
+    return [
+        uri for uri in gcs.list_uris(prefix)
+        if uri not in keep and "/" not in uri[len(prefix):] and uri[len(prefix):].startswith("data")
+    ]
+
+
+def _already_staged(sha256: str | None, uris: list[str], previous: LayerState | None) -> bool:
+    """Whether files hashing to `sha256` are already staged at `uris`."""
+    if sha256 is None or previous is None or (previous.sha256, previous.uris) != (sha256, uris):
+        return False
+    return _staged(uris)
+
+
+class ExtractScheduler:
+    """Run several sources at once with separate caps per stage.
+
+    Each source runs download -> open -> convert -> upload on its own thread,
+    with at most `limits.sources` sources in flight. Downloads (including
+    any unzip) share a semaphore of `limits.downloads`, layer conversions
+    share one pool of `limits.conversions` worker processes, and uploads share
+    a pool of `limits.uploads` threads. So while one source is converting,
+    the next source's zip is already downloading.
+
+    With `stream` set, conversions write straight into resumable uploads,
+    so the upload cap does not apply and nothing is staged on local disk.
+    Layers are read with `reader` (see resolve_reader).
+
+    Each source's state manifest (see rextag.state) lets a rerun skip zips
+    whose generation has not changed since they were fully staged, and skip
+    uploading layers whose output is unchanged; `force` redoes everything.
+    The manifest is checkpointed after every staged layer. Downloads and
+    unzipped geodatabases are kept under `work_dir` (a temporary directory
+    if None) until their source is fully staged; with `resume`, a rerun
+    reuses them and skips the layers already checkpointed.
+
+    stop() (e.g. on SIGTERM) starts no new sources or layers: conversions
+    already running finish and upload, their checkpoints are written, and
+    run() returns with `stopped` set.
+
+    With a `report`, the timings, byte and feature counts of each source's
+    download, unzip and source stages, and each layer's convert and upload,
+    are added to it. With `profile`, each layer's conversion is profiled
+    (see rextag.profiling).
+    """
+
+    def __init__(
+        self,
+        config: PipelineConfig,
+        limits: SchedulerLimits = SchedulerLimits(),
+        splits: int = 1,
+        gdb_mode: str = "vsizip",
+        stream: bool = False,
+        reader: str = "fiona",
+        force: bool = False,
+        resume: bool = False,
+        work_dir: Path | None = None,
+        echo: Callable[[str], None] = print,
+        report: RunReport | None = None,
+        profile: ProfileSettings | None = None,
+    ):
+        self.config = config
+        self.limits = limits
+        self.splits = splits
+        self.gdb_mode = gdb_mode
+        self.stream = stream
+        self.reader = resolve_reader(reader)
+        self.force = force
+        self.resume = resume
+        self.work_dir = Path(work_dir) if work_dir is not None else None
+        self._echo = echo
+        self.report = report
+        self.profile = profile
+        self._echo_lock = threading.Lock()
+        self._download_slots = threading.BoundedSemaphore(limits.downloads)
+        self._stopping = threading.Event()
+        self._cancellable: set[Future] = set()
+        # Reentrant: stop() may run in a signal handler on the thread holding it.
+        self._cancellable_lock = threading.RLock()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopping.is_set()
+
+    def stop(self) -> None:
+        """Start no new sources or layers; let in-flight layers finish and checkpoint.
+
+        Only sets flags and cancels queued futures, so it is safe to call
+        from a signal handler.
+        """
+        self._stopping.set()
+        with self._cancellable_lock:
+            queued = list(self._cancellable)
+        # Outside the lock: cancel() runs _untrack straight away.
+        for future in queued:
+            future.cancel()
+
+    def _track(self, future: Future) -> Future:
+        """Register a queued source or conversion for stop() to cancel."""
+        with self._cancellable_lock:
+            self._cancellable.add(future)
+        if self._stopping.is_set():
+            future.cancel()
+        future.add_done_callback(self._untrack)
+        return future
+
+    def _untrack(self, future: Future) -> None:
+        with self._cancellable_lock:
+            self._cancellable.discard(future)
+
+    def run(self, sources: list[SourceConfig]) -> list[str]:
+        """Extract all sources; return descriptions of what failed."""
+        failures = []
+        with (
+            self._conversion_pool() as convert_pool,
+            ThreadPoolExecutor(max_workers=self.limits.uploads) as upload_pool,
+            ThreadPoolExecutor(max_workers=self.limits.sources) as source_pool,
+        ):
+            futures = [
+                self._track(source_pool.submit(self._run_source, source, convert_pool, upload_pool))
+                for source in sources
+            ]
+            for future in as_completed(futures):
+                if not future.cancelled():
+                    failures.extend(future.result())
+        return failures
+
+    def _conversion_pool(self) -> Executor:
+        if self.limits.conversions <= 1:
+            return ThreadPoolExecutor(max_workers=1)
+        # spawn rather than fork: GDAL and the GCS client are not fork-safe,
+        # and the parent is multi-threaded.
+        ctx = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(
+            max_workers=self.limits.conversions,
+            mp_context=ctx,
+            initializer=init_worker,
+            initargs=(self.config.transport,),
+        )
+
+    def _record(self, *metrics: StageMetrics) -> None:
+        if self.report is not None:
+            self.report.add(*metrics)
+
+    def _log(self, source: SourceConfig, lines: list[str]) -> None:
+        """Print lines as one uninterrupted block, tagged by source when several run."""
+        prefix = f"[{source.name}] " if self.limits.sources > 1 else ""
+        with self._echo_lock:
+            for line in lines:
+                self._echo(prefix + line)
+
+    def _source_dir(self, source: SourceConfig, generation: int) -> Path:
+        """Local working directory for one source zip generation.
+
+        Under `work_dir`, leftovers from other generations are removed, and
+        so is this generation's unless resuming.
+        """
+        if self.work_dir is None:
+            return Path(tempfile.mkdtemp(prefix=f"rextag-{source.name}-"))
+        base = self.work_dir / source.name
+        source_dir = base / f"generation={generation}"
+        if base.exists():
+            for stale in base.iterdir():
+                if stale != source_dir or not self.resume:
+                    shutil.rmtree(stale)
+        source_dir.mkdir(parents=True, exist_ok=True)
+        return source_dir
+
+    def _open_source(self, source: SourceConfig, meta, source_dir: Path) -> Path | str:
+        """Download (or reuse) a source zip and return its geodatabase path."""
+        zip_path = source_dir / f"{source.name}.zip"
+        extracted = source_dir / "extracted"
+        # Written once extraction finishes; holds the .gdb path inside `extracted`.
+        extracted_marker = source_dir / "extracted.done"
+
+        if self.resume and extracted_marker.exists():
+            self._log(source, [f"  Reusing extracted geodatabase in {extracted}"])
+            return extracted / extracted_marker.read_text()
+
+        with self._download_slots:
+            if self.resume and zip_path.exists() and zip_path.stat().st_size == meta.size:
+                self._log(source, [f"  Reusing download {zip_path}"])
+            else:
+                self._log(source, [f"  Downloading {source.uri}..."])
+                partial = zip_path.with_name(zip_path.name + ".part")
+                with measure("download", source.name) as metrics:
+                    self._record(metrics)
+                    metrics.bytes_in = meta.size
+                    download_from_gcs(source.uri, partial)
+                partial.replace(zip_path)
+
+            gdb_path = vsizip_geodatabase(zip_path) if self.gdb_mode == "vsizip" else None
+            if gdb_path is None:
+                self._log(source, ["  Extracting geodatabase..."])
+                shutil.rmtree(extracted, ignore_errors=True)
+                with measure("unzip", source.name) as metrics:
+                    self._record(metrics)
+                    metrics.bytes_in = zip_path.stat().st_size
+                    stats = decompress_geodatabase(zip_path, extracted)
+                    metrics.bytes_out = stats.bytes
+                self._log(source, [
+                    f"  Extracted {stats.files} files ({stats.bytes / 1e6:.1f} MB)"
+                    f" at {stats.mb_per_sec:.1f} MB/s"
+                ])
+                gdb_path = stats.gdb_path
+                extracted_marker.write_text(str(gdb_path.relative_to(extracted.resolve())))
+                zip_path.unlink()
+        return gdb_path
+
+    def _run_source(
+        self,
+        source: SourceConfig,
+        convert_pool: Executor,
+        upload_pool: Executor,
+    ) -> list[str]:
+        with measure("source", source.name) as metrics:
+            self._record(metrics)
+            failed = self._stage_source(source, convert_pool, upload_pool)
+            metrics.ok = not failed
+        return failed
+
+    def _stage_source(
+        self,
+        source: SourceConfig,
+        convert_pool: Executor,
+        upload_pool: Executor,
+    ) -> list[str]:
+        self._log(source, [f"Processing source: {source.name} ({source.uri})"])
+        data_drop = parse_data_drop(source.uri)
+        failed = []
+        source_dir = None
+        complete = False
+
+        try:
+            meta = gcs.metadata(source.uri)
+            manifest_uri = self.config.manifest_path(source.name, data_drop)
+            output = asdict(self.config.output)
+            previous = None if self.force else load_state(manifest_uri)
+            if previous is not None and not previous.matches(source.uri, meta.generation, meta.md5_hash, output):
+                previous = None
+            if previous is not None and previous.complete:
+                missing = [name for name, layer in previous.layers.items() if layer.uris and not _staged(layer.uris)]
+                if not missing:
+                    self._log(source, [f"  Unchanged since last extract (generation {previous.generation}), skipping"])
+                    return []
+                # Staged files were deleted: rerun as a partly staged source.
+                self._log(source, [f"  Staged files missing for layer(s) {', '.join(missing)}, restaging"])
+                previous.complete = False
+            # Rerunning a partly staged zip keeps its _loaded_at, so the
+            # layers that were staged convert to the same bytes.
+            loaded_at = (
+                datetime.fromisoformat(previous.loaded_at) if previous is not None
+                else datetime.now(timezone.utc)
+            )
+            state = SourceState(
+                source_uri=source.uri,
+                generation=meta.generation,
+                md5=meta.md5_hash,
+                loaded_at=loaded_at.isoformat(),
+                output=output,
+            )
+            previous_layers = previous.layers if previous is not None else {}
+
+            source_dir = self._source_dir(source, meta.generation)
+            gdb_path = self._open_source(source, meta, source_dir)
+            layers = list_layers(gdb_path)
+            self._log(source, [f"  Found {len(layers)} layers: {', '.join(layers)}"])
+
+            if self.resume:
+                for layer in layers:
+                    checkpoint = previous_layers.get(layer)
+                    if checkpoint is not None and _staged(checkpoint.uris):
+                        state.layers[layer] = checkpoint
+                        self._log(source, [f"  Skipping layer {layer}: checkpointed with {checkpoint.count} rows"])
+
+            # Layers that roll over into shards upload each one as it is closed.
+            stage_to = {}
+            if self.stream or self.config.output.rolls_over:
+                stage_to = {"config": self.config, "data_drop": data_drop, "upload": not self.stream}
+            pending = {
+                self._track(convert_pool.submit(
+                    convert_layer,
+                    gdb_path,
+                    layer,
+                    source.name,
+                    source_dir / "layers",
+                    self.splits,
+                    self.config.output,
+                    reader=self.reader,
+                    loaded_at=loaded_at,
+                    profile=self.profile,
+                    **stage_to,
+                ))
+                for layer in layers
+                if layer not in state.layers
+            }
+            uploads = set()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.cancelled():
+                        continue
+                    result = future.result()
+                    if not result.ok:
+                        self._record(*result.metrics)
+                        failed.append(self._report(source, result))
+                    elif future in uploads:
+                        self._record(*result.metrics)
+                        state.layers[result.layer] = result.state()
+                        save_state(manifest_uri, state)
+                        self._log(source, result.log)
+                    else:
+                        upload = upload_pool.submit(
+                            upload_layer, result, self.config, source.name, data_drop,
+                            previous_layers.get(result.layer),
+                        )
+                        uploads.add(upload)
+                        pending.add(upload)
+
+            complete = state.complete = not failed and all(layer in state.layers for layer in layers)
+            save_state(manifest_uri, state)
+        except Exception:
+            self._log(source, [f"  Failed: {source.name}", traceback.format_exc()])
+            return [source.name]
+        finally:
+            # A partly staged source keeps its download for a resumed run.
+            if source_dir is not None and (self.work_dir is None or complete):
+                shutil.rmtree(source_dir, ignore_errors=True)
+
+        if not complete and self.stopped:
+            self._log(source, [f"Stopped: {source.name} ({len(state.layers)} of {len(layers)} layers checkpointed)"])
+        else:
+            self._log(source, [f"Completed: {source.name}" if not failed else f"Completed with errors: {source.name}"])
+        return failed
+
+    def _report(self, source: SourceConfig, result: LayerResult) -> str:
+        self._log(source, result.log + [result.error])
+        return f"{source.name}/{result.layer}"
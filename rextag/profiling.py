@@ -0,0 +1,126 @@
+"""Per-layer profiling for `rextag extract --profile`, and the profile-summary report.
+
+Each layer's conversion (the fiona read loop, reprojection and row
+encoding) runs under cProfile, and its stats are dumped to
+SOURCE__LAYER.prof in the profile directory. With memory profiling on,
+tracemalloc also runs, and the layer's top allocation sites are written
+to SOURCE__LAYER.tracemalloc.json. summarize() merges every dump in a
+directory, so hot functions can be compared across layers.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import re
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_PROFILE_DIR = Path(".rextag") / "profile"
+SORT_KEYS = ("cumulative", "tottime", "calls")
+_PROF_SUFFIX = ".prof"
+_MEMORY_SUFFIX = ".tracemalloc.json"
+
+
+@dataclass(frozen=True)
+class ProfileSettings:
+    """Where profile dumps go, and whether to trace allocations (and how many sites to keep)."""
+
+    directory: Path
+    memory: bool = False
+    top_allocations: int = 25
+
+
+def dump_name(source_name: str, layer: str) -> str:
+    """File name stem for one layer's dumps; characters unsafe in file names become _."""
+    return re.sub(r"[^\w.-]", "_", f"{source_name}__{layer}")
+
+
+def prepare(directory: Path) -> None:
+    """Create the profile directory, removing dumps left by an earlier run."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for pattern in (f"*{_PROF_SUFFIX}", f"*{_MEMORY_SUFFIX}"):
+        for path in directory.glob(pattern):
+            path.unlink()
+
+
+@contextmanager
+def profile_layer(settings: ProfileSettings | None, source_name: str, layer: str) -> Iterator[None]:
+    """Profile the block for one layer and write its dumps; a no-op when settings is None.
+
+    cProfile only sees the calling thread, so split-range worker processes
+    are not included. Dumps are written even if the block raises.
+    """
+    if settings is None:
+        yield
+        return
+
+    stem = Path(settings.directory) / dump_name(source_name, layer)
+    # tracemalloc is process-wide; leave it running if someone else started it.
+    trace = settings.memory and not tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(stem.with_name(stem.name + _PROF_SUFFIX))
+        if settings.memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if trace:
+                tracemalloc.stop()
+            _write_allocations(stem.with_name(stem.name + _MEMORY_SUFFIX), snapshot, peak, settings.top_allocations)
+
+
+def _write_allocations(path: Path, snapshot: tracemalloc.Snapshot, peak: int, top: int) -> None:
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    top_sites = []
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        top_sites.append({"file": frame.filename, "line": frame.lineno, "size": stat.size, "count": stat.count})
+    doc = {"peak_bytes": peak, "top": top_sites}
+    path.write_text(json.dumps(doc, indent=2) + "\n")
+
+
+def summarize(directory: Path, top: int = 25, sort: str = "cumulative") -> str:
+    """Top functions across every layer's profile in `directory`, plus allocation sites if traced."""
+    directory = Path(directory)
+    profiles = sorted(directory.glob(f"*{_PROF_SUFFIX}"))
+    if not profiles:
+        raise FileNotFoundError(f"No profile dumps in {directory}")
+
+    out = io.StringIO()
+    out.write(f"Profiles: {len(profiles)} layer(s) in {directory}\n")
+    for path in profiles:
+        layer_stats = pstats.Stats(str(path))
+        out.write(f"  {path.name.removesuffix(_PROF_SUFFIX)}: {layer_stats.total_tt:.3f}s\n")
+    out.write(f"\nTop {top} functions by {sort}, all layers:\n")
+    stats = pstats.Stats(*(str(p) for p in profiles), stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+    dumps = sorted(directory.glob(f"*{_MEMORY_SUFFIX}"))
+    if dumps:
+        sites: dict[tuple[str, int], list[int]] = {}
+        out.write("Peak traced memory per layer:\n")
+        for path in dumps:
+            doc = json.loads(path.read_text())
+            out.write(f"  {path.name.removesuffix(_MEMORY_SUFFIX)}: {doc['peak_bytes'] / 1e6:.1f} MB\n")
+            for site in doc["top"]:
+                totals = sites.setdefault((site["file"], site["line"]), [0, 0])
+                totals[0] += site["size"]
+                totals[1] += site["count"]
+        out.write(f"\nTop {top} allocation sites, all layers:\n")
+        ranked = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        for (filename, line), (size, count) in ranked:
+            out.write(f"  {size / 1e6:10.2f} MB {count:10d} blocks  {filename}:{line}\n")
+    return out.getvalue()
@@ -6,6 +6,7 @@ from pathlib import Path
 import fiona
 import yaml
 
+from rextag.config import OutputConfig
 from rextag.extract import has_geometry
 from rextag.schema import fiona_type_to_bq
 
@@ -17,11 +18,12 @@ class LayerInfo:
     name: str
     geometry_type: str | None
     fiona_schema: dict
+    output: OutputConfig = field(default_factory=OutputConfig)
 
     @property
     def file_extension(self) -> str:
-        """File extension based on geometry presence: geojsonl or jsonl."""
-        return "geojsonl" if has_geometry(self.fiona_schema) else "jsonl"
+        """File extension from the output format, geometry presence and compression."""
+        return self.output.file_extension(has_geometry(self.fiona_schema))
 
     @property
     def bq_columns(self) -> list[dict]:
@@ -53,8 +55,16 @@ class DatasetInfo:
     layers: list[LayerInfo] = field(default_factory=list)
 
 
-def inspect_geodatabase(gdb_path: Path, dataset_name: str) -> DatasetInfo:
-    """Inspect a geodatabase and return metadata about all its layers."""
+def inspect_geodatabase(
+    gdb_path: Path | str,
+    dataset_name: str,
+    output: OutputConfig | None = None,
+) -> DatasetInfo:
+    """Inspect a geodatabase (directory or /vsizip/ path) and return metadata about all its layers.
+
+    `output` records how the layers' staging files will be written.
+    """
+    output = output or OutputConfig()
     layer_names = fiona.listlayers(gdb_path)
     layers = []
 
@@ -69,6 +79,7 @@ def inspect_geodatabase(gdb_path: Path, dataset_name: str) -> DatasetInfo:
                 name=layer_name,
                 geometry_type=str(geom_type) if geom_type else None,
                 fiona_schema=schema,
+                output=output,
             ))
 
     return DatasetInfo(name=dataset_name, layers=layers)
@@ -88,15 +99,20 @@ def generate_sources_yml(
         base_path = f"gs://{staging_bucket}/{prefix}/{dataset.name}/{layer.name}"
 
         external_config = {
-            "location": f"{base_path}/data_drop=*/data.{ext}",
+            # Single trailing wildcard: matches data.EXT and data-NNNNN.EXT shards.
+            "location": f"{base_path}/*.{ext}",
             "options": {
-                "format": "JSON",
+                "format": "PARQUET" if layer.output.format == "parquet" else "JSON",
                 "hive_partition_uri_prefix": f"{base_path}/",
             },
         }
 
-        if ext == "geojsonl":
-            external_config["options"]["json_extension"] = "GEOJSON"
+        if layer.output.format == "jsonl":
+            if has_geometry(layer.fiona_schema):
+                external_config["options"]["json_extension"] = "GEOJSON"
+
+            if layer.output.compression == "gzip":
+                external_config["options"]["compression"] = "GZIP"
 
         columns = []
         for col in layer.bq_columns:
@@ -155,16 +171,28 @@ def generate_dbt_files(
     staging_bucket: str,
     staging_prefix: str,
 ) -> Path:
-    """Write dbt source YAML and staging SQL files for a dataset."""
+    """Write dbt source YAML and staging SQL files for a dataset.
+
+    Files whose content is unchanged are left alone, so their mtimes (and
+    dbt's partial parsing) are not disturbed.
+    """
     dataset_dir = output_dir / dataset.name
     dataset_dir.mkdir(parents=True, exist_ok=True)
 
     sources_content = generate_sources_yml(dataset, staging_bucket, staging_prefix)
-    (dataset_dir / "_sources.yml").write_text(sources_content)
+    write_if_changed(dataset_dir / "_sources.yml", sources_content)
 
     for layer in dataset.layers:
         sql_content = generate_staging_sql(dataset.name, layer)
         filename = f"stg_{dataset.name}_{layer.name}.sql"
-        (dataset_dir / filename).write_text(sql_content)
+        write_if_changed(dataset_dir / filename, sql_content)
 
     return dataset_dir
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """Write `content` unless the file already holds it. Returns whether it was written."""
+    if path.exists() and path.read_text() == content:
+        return False
+    path.write_text(content)
+    return True
@@ -24,15 +24,17 @@ def fiona_type_to_bq(fiona_type: str) -> str:
     return _TYPE_MAP.get(base_type, "STRING")
 
 
-def build_bq_schema(fiona_schema: dict) -> list[SchemaField]:
+def build_bq_schema(fiona_schema: dict, geometry_type: str | None = "STRING") -> list[SchemaField]:
     """Build a BigQuery schema from a Fiona collection schema.
 
-    Adds a geometry column (STRING for GeoJSON text) and metadata columns.
+    Adds a geometry column (STRING for GeoJSON text, or `geometry_type`,
+    e.g. BYTES for WKB; omitted if None) and metadata columns.
     """
     fields = []
 
     # Geometry as STRING (will be cast to GEOGRAPHY in dbt)
-    fields.append(SchemaField("geometry", "STRING", mode="NULLABLE"))
+    if geometry_type is not None:
+        fields.append(SchemaField("geometry", geometry_type, mode="NULLABLE"))
 
     # Property columns
     for name, ftype in fiona_schema["properties"].items():
@@ -0,0 +1,291 @@
+"""Byte sinks that converted output is written to: local files or streaming GCS uploads."""
+
+import gzip
+import os
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from rextag import gcs
+
+# Resumable upload chunks must be a multiple of 256 KiB.
+_RESUMABLE_CHUNK_MULTIPLE = 256 * 1024
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+# Uncompressed bytes per independently compressed gzip member.
+DEFAULT_GZIP_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Compressions open_sink applies to the byte stream (Parquet compresses column chunks itself).
+STREAM_COMPRESSIONS = ("none", "gzip")
+
+_ABORT = object()
+
+
+class LocalFileSink:
+    """Write output to a local file. Also the stand-in for GCS in tests."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.bytes_written = 0
+        self._f = open(self.path, "wb")
+
+    def write(self, data: bytes) -> None:
+        self._f.write(data)
+        self.bytes_written += len(data)
+
+    def close(self) -> None:
+        self._f.close()
+
+    def abort(self) -> None:
+        """Discard the partial file."""
+        self._f.close()
+        self.path.unlink(missing_ok=True)
+
+
+class GCSStreamSink:
+    """Stream output into a resumable GCS upload without a local staging file.
+
+    Writes are buffered into fixed-size chunks and handed to a background
+    thread that pushes them to the upload, so conversion and upload overlap.
+    At most `queue_depth` chunks wait in memory; a writer that gets further
+    ahead blocks until the upload catches up. The object is only finalized
+    by close(); abort() abandons the upload and leaves no object behind.
+    """
+
+    def __init__(
+        self,
+        gcs_uri: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        queue_depth: int = 4,
+        blob=None,
+    ):
+        if chunk_size <= 0 or chunk_size % _RESUMABLE_CHUNK_MULTIPLE:
+            raise ValueError(f"chunk_size must be a positive multiple of {_RESUMABLE_CHUNK_MULTIPLE}")
+        self.gcs_uri = gcs_uri
+        self.bytes_written = 0
+        self._blob = blob if blob is not None else gcs.blob(gcs_uri)
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._upload, name=f"upload:{gcs_uri}", daemon=True)
+        self._thread.start()
+
+    def write(self, data: bytes) -> None:
+        self._raise_upload_error()
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self._chunk_size:
+            chunk = bytes(self._buffer[:self._chunk_size])
+            del self._buffer[:self._chunk_size]
+            self._put(chunk)
+
+    def close(self) -> None:
+        """Flush the last partial chunk and finalize the object."""
+        if self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+        self._put(None)
+        self._thread.join()
+        self._raise_upload_error()
+
+    def abort(self) -> None:
+        """Stop uploading without finalizing the object."""
+        if self._thread.is_alive() and self._error is None:
+            self._put(_ABORT)
+        self._thread.join()
+
+    def _put(self, item) -> None:
+        # Poll so a writer blocked on a full queue notices a dead uploader.
+        while True:
+            self._raise_upload_error()
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _raise_upload_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"Streaming upload to {self.gcs_uri} failed") from self._error
+
+    def _upload(self) -> None:
+        try:
+            # The whole upload holds one in-flight slot; chunk requests are retried.
+            with gcs.request_slot():
+                writer = self._blob.open(
+                    "wb", chunk_size=self._chunk_size, ignore_flush=True, retry=gcs.retry_policy()
+                )
+                while True:
+                    item = self._queue.get()
+                    if item is _ABORT:
+                        return
+                    if item is None:
+                        writer.close()
+                        return
+                    writer.write(item)
+        except BaseException as e:
+            self._error = e
+
+
+class GzipBlockSink:
+    """Gzip output on a thread pool before passing it to another sink.
+
+    Input is cut into fixed-size blocks, each compressed on its own as a
+    complete gzip member (zlib releases the GIL, so blocks compress in
+    parallel). Members are written in order; concatenated members form a
+    valid gzip stream. At most two blocks per worker are in flight.
+    """
+
+    def __init__(
+        self,
+        inner,
+        block_size: int = DEFAULT_GZIP_BLOCK_SIZE,
+        workers: int | None = None,
+        level: int = 6,
+    ):
+        self.bytes_written = 0
+        self._inner = inner
+        self._block_size = block_size
+        self._level = level
+        workers = workers or min(8, os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gzip")
+        self._max_pending = workers * 2
+        self._pending: deque = deque()
+        self._buffer = bytearray()
+
+    @property
+    def compressed_bytes(self) -> int:
+        return self._inner.bytes_written
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self._block_size:
+            block = bytes(self._buffer[:self._block_size])
+            del self._buffer[:self._block_size]
+            self._submit(block)
+
+    def close(self) -> None:
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._inner.write(self._pending.popleft().result())
+        self._pool.shutdown()
+        self._inner.close()
+
+    def abort(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+        self._pending.clear()
+        self._inner.abort()
+
+    def _submit(self, block: bytes) -> None:
+        # mtime=0 keeps output deterministic and lets gzip use a single zlib call.
+        self._pending.append(self._pool.submit(gzip.compress, block, self._level, mtime=0))
+        while len(self._pending) > self._max_pending:
+            self._inner.write(self._pending.popleft().result())
+
+
+class RollingSink:
+    """Write output as numbered shards, rolling over at a size or row limit.
+
+    Shard n is opened with open_sink(target_for(n), compression) when the
+    first byte for it arrives, so no empty trailing shard is left behind.
+    Rows never straddle shards: with `row_writes`, every write() is one row
+    and a full shard is closed right after it; otherwise the writer reports
+    rows with end_rows() and calls roll() where its own format allows (a
+    Parquet writer, after writing the file footer). Size is counted before
+    compression. `on_close` is called with each shard's target once that
+    shard is complete, e.g. to upload it while the next one is written.
+    """
+
+    def __init__(
+        self,
+        target_for: Callable[[int], Path | str],
+        compression: str = "none",
+        max_bytes: int | None = None,
+        max_rows: int | None = None,
+        row_writes: bool = True,
+        on_close: Callable[[Path | str], None] | None = None,
+    ):
+        self.targets: list[Path | str] = []
+        self.bytes_written = 0
+        self._target_for = target_for
+        self._compression = compression
+        self._max_bytes = max_bytes
+        self._max_rows = max_rows
+        self._row_writes = row_writes
+        self._on_close = on_close
+        self._current = None
+        self._shard_bytes = 0
+        self._shard_rows = 0
+
+    @property
+    def rows_remaining(self) -> int | None:
+        """Rows the current shard can still take, or None without a row limit."""
+        return None if self._max_rows is None else self._max_rows - self._shard_rows
+
+    def write(self, data: bytes) -> None:
+        if self._current is None:
+            self._open()
+        self._current.write(data)
+        self._shard_bytes += len(data)
+        self.bytes_written += len(data)
+        if self._row_writes and self.end_rows(1):
+            self.roll()
+
+    def end_rows(self, rows: int) -> bool:
+        """Count rows completed in the current shard; return whether it is full."""
+        self._shard_rows += rows
+        return (self._max_rows is not None and self._shard_rows >= self._max_rows) or (
+            self._max_bytes is not None and self._shard_bytes >= self._max_bytes
+        )
+
+    def roll(self) -> None:
+        """Close the current shard; the next write starts a new one."""
+        if self._current is None:
+            return
+        current, self._current = self._current, None
+        self._shard_bytes = self._shard_rows = 0
+        current.close()
+        if self._on_close is not None:
+            self._on_close(self.targets[-1])
+
+    def close(self) -> None:
+        """Close the last shard. Output with no rows still gets one (empty) shard."""
+        if not self.targets:
+            self._open()
+        self.roll()
+
+    def abort(self) -> None:
+        """Discard the shard being written; shards already closed are kept."""
+        if self._current is not None:
+            self._current.abort()
+            self._current = None
+
+    def _open(self) -> None:
+        target = self._target_for(len(self.targets))
+        self._current = open_sink(target, compression=self._compression)
+        self.targets.append(target)
+
+
+def open_sink(
+    target: Path | str,
+    compression: str = "none",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> LocalFileSink | GCSStreamSink | GzipBlockSink:
+    """Open a sink for a local path or a gs:// URI, gzipping if asked."""
+    # Checked first, so a bad value leaves no open file or upload behind.
+    if compression not in STREAM_COMPRESSIONS:
+        raise ValueError(f"Unsupported compression: {compression}")
+    if isinstance(target, str) and target.startswith("gs://"):
+        sink = GCSStreamSink(target, chunk_size=chunk_size)
+    else:
+        sink = LocalFileSink(Path(target))
+    if compression == "gzip":
+        return GzipBlockSink(sink)
+    return sink
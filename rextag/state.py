@@ -0,0 +1,90 @@
+"""Extract state manifests: what was staged from each source, and from which zip.
+
+One manifest per source and data drop sits beside its hive staging paths.
+It records the zip's generation and md5, the `_loaded_at` stamped on its
+rows, and each layer's staged URIs, row count and output hash, so a rerun
+can skip an unchanged zip outright, and skip re-uploading layers whose
+converted output is byte-identical to what is already staged.
+"""
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from rextag import gcs
+
+_VERSION = 1
+_HASH_CHUNK = 1024 * 1024
+
+
+@dataclass
+class LayerState:
+    """A layer as staged: its object URIs, row count, output hash and BigQuery schema.
+
+    `schema` is the staged files' schema as BigQuery API field resources,
+    for loading them into a native table (see rextag.load).
+    """
+
+    uris: list[str]
+    count: int
+    sha256: str | None = None
+    schema: list[dict] | None = None
+
+
+@dataclass
+class SourceState:
+    """What the last extract of a source zip staged.
+
+    `complete` is only set once every layer converted and uploaded; a
+    partial run is redone, but reuses `loaded_at` so the layers that did
+    succeed hash the same and are not uploaded again.
+    """
+
+    source_uri: str
+    generation: int
+    md5: str | None
+    loaded_at: str
+    output: dict
+    complete: bool = False
+    layers: dict[str, LayerState] = field(default_factory=dict)
+
+    def matches(self, source_uri: str, generation: int, md5: str | None, output: dict) -> bool:
+        """Whether this state was produced from the same zip, with the same output settings.
+
+        The zip counts as the same if its generation is unchanged, or if it
+        was re-uploaded with identical contents (same md5).
+        """
+        if (self.source_uri, self.output) != (source_uri, output):
+            return False
+        return self.generation == generation or (md5 is not None and self.md5 == md5)
+
+
+def load_state(uri: str) -> SourceState | None:
+    """Read a manifest, or None if there is none (or it is from another version)."""
+    data = gcs.read_bytes(uri)
+    if data is None:
+        return None
+    raw = json.loads(data)
+    if raw.pop("version", None) != _VERSION:
+        return None
+    layers = {name: LayerState(**layer) for name, layer in raw.pop("layers").items()}
+    return SourceState(**raw, layers=layers)
+
+
+def save_state(uri: str, state: SourceState) -> None:
+    """Write a manifest."""
+    doc = {"version": _VERSION, **asdict(state)}
+    gcs.write_bytes(uri, (json.dumps(doc, indent=2, sort_keys=True) + "\n").encode())
+
+
+def files_sha256(paths: list[Path]) -> str:
+    """SHA-256 over the contents of several files, in order."""
+    digest = hashlib.sha256()
+    for path in paths:
+        # Length-prefix each file so moving bytes between shards changes the hash.
+        digest.update(Path(path).stat().st_size.to_bytes(8, "big"))
+        with open(path, "rb") as f:
+            while chunk := f.read(_HASH_CHUNK):
+                digest.update(chunk)
+    return digest.hexdigest()
@@ -57,3 +57,77 @@ def sample_feature_non_wgs84():
             "NAME": "Test Point",
         },
     }
+
+
+@pytest.fixture
+def sample_gdb(tmp_path):
+    """A small real FileGDB: 'parcels' (Polygon, EPSG:2227) and 'owners' (no geometry)."""
+    import fiona
+    from fiona.crs import CRS
+
+    gdb_path = tmp_path / "sample.gdb"
+    parcels_schema = {"geometry": "Polygon", "properties": {"NAME": "str", "AREA": "float"}}
+    with fiona.open(
+        gdb_path, "w", driver="OpenFileGDB", schema=parcels_schema, crs=CRS.from_epsg(2227), layer="parcels"
+    ) as dst:
+        for i in range(25):
+            x, y = 6000000.0 + i * 100, 2100000.0
+            ring = [(x, y), (x + 50, y), (x + 50, y + 50), (x, y + 50), (x, y)]
+            dst.write({
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+                "properties": {"NAME": f"Parcel {i}", "AREA": 2500.0},
+            })
+
+    owners_schema = {"geometry": "None", "properties": {"OWNER_NAME": "str"}}
+    with fiona.open(gdb_path, "w", driver="OpenFileGDB", schema=owners_schema, layer="owners") as dst:
+        for i in range(10):
+            dst.write({"geometry": None, "properties": {"OWNER_NAME": f"Owner {i}"}})
+
+    return gdb_path
+
+
+@pytest.fixture
+def sample_gdb_zip(sample_gdb, tmp_path):
+    """sample_gdb zipped as sample.zip, with sample.gdb/ at the root."""
+    import shutil
+
+    return shutil.make_archive(str(tmp_path / "sample"), "zip", sample_gdb.parent, sample_gdb.name)
+
+
+@pytest.fixture
+def sample_gdb_zip_with_extras(sample_gdb, tmp_path):
+    """sample_gdb zipped alongside a README.txt that is not part of the geodatabase."""
+    import zipfile
+
+    zip_path = tmp_path / "sample-extras.zip"
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("README.txt", "not part of the geodatabase")
+        for f in sample_gdb.rglob("*"):
+            zf.write(f, f.relative_to(sample_gdb.parent))
+    return zip_path
+
+
+@pytest.fixture
+def fake_gcs(monkeypatch):
+    """A local fake GCS server, with rextag's shared client pointed at it."""
+    from rextag import gcs
+    from rextag.config import GCSTransportConfig
+    from tests.fake_gcs import FakeGCSServer
+
+    server = FakeGCSServer().start()
+    monkeypatch.setenv("STORAGE_EMULATOR_HOST", server.url)
+    gcs.configure(GCSTransportConfig(initial_backoff=0.01, max_backoff=0.05, retry_timeout=5.0))
+    yield server
+    gcs.configure(GCSTransportConfig())
+    server.stop()
+
+
+@pytest.fixture
+def fake_bigquery(fake_gcs, monkeypatch):
+    """A local fake BigQuery API reading load sources from the fake GCS server."""
+    from tests.fake_bigquery import FakeBigQueryServer
+
+    server = FakeBigQueryServer(fake_gcs).start()
+    monkeypatch.setenv("BIGQUERY_EMULATOR_HOST", server.url)
+    yield server
+    server.stop()
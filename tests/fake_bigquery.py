@@ -0,0 +1,158 @@
+"""A minimal in-process fake of the BigQuery REST API for load tests.
+
+Serves table create/get and load job insert/get from memory. Load jobs
+read their source URIs from a FakeGCSServer to count rows, and keep a row
+count per partition decorator, so WRITE_TRUNCATE and WRITE_APPEND can be
+told apart. Point rextag.load at it with BIGQUERY_EMULATOR_HOST.
+"""
+
+import gzip
+import io
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from tests.fake_gcs import FakeGCSServer
+
+
+class FakeBigQueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, gcs: FakeGCSServer):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.gcs = gcs
+        # (project, dataset, table) -> table resource, plus rows per partition decorator.
+        self.tables: dict[tuple[str, str, str], dict] = {}
+        self.partitions: dict[tuple[str, str, str], dict[str, int]] = {}
+        self.jobs: dict[str, dict] = {}
+        self.loads: list[dict] = []
+        self.requests: list[tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeBigQueryServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address):
+        pass
+
+    def column_names(self, project: str, dataset: str, table: str) -> list[str]:
+        return [f["name"] for f in self.tables[(project, dataset, table)]["schema"]["fields"]]
+
+    def count_rows(self, uri: str) -> int:
+        bucket, _, name = uri.removeprefix("gs://").partition("/")
+        data = self.gcs.objects[(bucket, name)]
+        if name.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            return pq.ParquetFile(io.BytesIO(data)).metadata.num_rows
+        if name.endswith(".gz"):
+            data = gzip.decompress(data)
+        return sum(1 for line in data.splitlines() if line.strip())
+
+    def run_load(self, project: str, job: dict) -> dict:
+        """Apply a load job to the in-memory tables; return its status and statistics."""
+        load = job["configuration"]["load"]
+        self.loads.append(load)
+        ref = load["destinationTable"]
+        table_id, _, decorator = ref["tableId"].partition("$")
+        key = (ref["projectId"], ref["datasetId"], table_id)
+        if key not in self.tables:
+            return {"state": "DONE", "errorResult": {"reason": "notFound", "message": f"Not found: Table {table_id}"}}
+
+        table = self.tables[key]
+        known = {f["name"] for f in table["schema"]["fields"]}
+        added = [f for f in load.get("schema", {}).get("fields", []) if f["name"] not in known]
+        if added:
+            if "ALLOW_FIELD_ADDITION" not in load.get("schemaUpdateOptions", []):
+                return {"state": "DONE", "errorResult": {"reason": "invalid", "message": "Provided Schema does not match"}}
+            table["schema"]["fields"].extend(added)
+
+        try:
+            rows = sum(self.count_rows(uri) for uri in load["sourceUris"])
+        except KeyError as e:
+            return {"state": "DONE", "errorResult": {"reason": "notFound", "message": f"Not found: URI {e}"}}
+        partitions = self.partitions.setdefault(key, {})
+        if load.get("writeDisposition") == "WRITE_TRUNCATE":
+            partitions[decorator] = rows
+        else:
+            partitions[decorator] = partitions.get(decorator, 0) + rows
+        return {"state": "DONE", "outputRows": rows}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeBigQueryServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        path = urlparse(self.path).path.removeprefix("/bigquery/v2")
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with self.server._lock:
+            self.server.requests.append((method, path))
+            status, payload = self._route(method, path, json.loads(body) if body else None)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self, method: str, path: str, body: dict | None) -> tuple[int, dict]:
+        server = self.server
+
+        if method == "POST" and (m := re.fullmatch(r"/projects/([^/]+)/datasets/([^/]+)/tables", path)):
+            ref = body["tableReference"]
+            key = (ref["projectId"], ref["datasetId"], ref["tableId"])
+            if key in server.tables:
+                return 409, _error(409, f"Already Exists: Table {ref['tableId']}")
+            server.tables[key] = {"kind": "bigquery#table", **body}
+            return 200, server.tables[key]
+
+        if m := re.fullmatch(r"/projects/([^/]+)/datasets/([^/]+)/tables/([^/]+)", path):
+            key = (m.group(1), m.group(2), m.group(3))
+            if key not in server.tables:
+                return 404, _error(404, f"Not found: Table {m.group(3)}")
+            return 200, server.tables[key]
+
+        if method == "POST" and (m := re.fullmatch(r"/projects/([^/]+)/jobs", path)):
+            outcome = server.run_load(m.group(1), body)
+            job = {
+                **body,
+                "kind": "bigquery#job",
+                "status": {k: v for k, v in outcome.items() if k != "outputRows"},
+                "statistics": {"load": {"outputRows": str(outcome.get("outputRows", 0))}},
+            }
+            server.jobs[body["jobReference"]["jobId"]] = job
+            return 200, job
+
+        if m := re.fullmatch(r"/projects/([^/]+)/jobs/([^/]+)", path):
+            if m.group(2) not in server.jobs:
+                return 404, _error(404, f"Not found: Job {m.group(2)}")
+            return 200, server.jobs[m.group(2)]
+
+        return 404, _error(404, f"Unhandled {method} {path}")
+
+
+def _error(code: int, message: str) -> dict:
+    return {"error": {"code": code, "message": message, "errors": [{"message": message}]}}
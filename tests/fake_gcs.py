@@ -0,0 +1,297 @@
+"""A minimal in-process fake of the GCS JSON API for transport tests.
+
+Serves the handful of endpoints rextag uses (list, ranged media download,
+multipart and resumable uploads, compose, delete) from an in-memory dict.
+Point the storage client at it with STORAGE_EMULATOR_HOST. It can inject
+failures and records the peak number of concurrent requests and the TCP
+connections opened.
+"""
+
+import base64
+import hashlib
+import json
+import multiprocessing
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+import google_crc32c
+
+
+class FakeGCSServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.generations: dict[tuple[str, str], int] = {}
+        self.uploads: dict[str, dict] = {}
+        self.requests: list[tuple[str, str]] = []
+        self.range_requests: list[tuple[int, int]] = []
+        self.composes: list[tuple[str, list[str]]] = []
+        self.connections = 0
+        self.bytes_sent = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.delay = 0.0
+        self._failures: list[int] = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGCSServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def put(self, bucket: str, name: str, data: bytes) -> None:
+        """Store an object as a new generation."""
+        with self._lock:
+            self.objects[(bucket, name)] = data
+            self.generations[(bucket, name)] = self.generations.get((bucket, name), 1) + 1
+
+    def fail_next(self, count: int, status: int = 503) -> None:
+        """Answer the next `count` requests with `status`."""
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def handle_error(self, request, client_address):
+        # Clients dropping pooled connections at shutdown is expected.
+        pass
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def _enter(self, method: str, path: str) -> int | None:
+        with self._lock:
+            self.requests.append((method, path))
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return self._failures.pop(0) if self._failures else None
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+
+def _object_resource(server: FakeGCSServer, bucket: str, name: str, data: bytes) -> dict:
+    return {
+        "kind": "storage#object",
+        "bucket": bucket,
+        "name": name,
+        "size": str(len(data)),
+        "generation": str(server.generations.get((bucket, name), 1)),
+        "md5Hash": base64.b64encode(hashlib.md5(data).digest()).decode(),
+        "crc32c": base64.b64encode(google_crc32c.Checksum(data).digest()).decode(),
+        "mediaLink": f"{server.url}/download/storage/v1/b/{bucket}/o/{quote(name, safe='')}?alt=media",
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeGCSServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_HEAD(self):
+        self._dispatch("HEAD")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str) -> None:
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        failure = self.server._enter(method, url.path)
+        self._in_flight = True
+        try:
+            if self.server.delay:
+                time.sleep(self.server.delay)
+            if failure is not None:
+                self._send_json(failure, {"error": {"code": failure, "message": "injected failure"}})
+                return
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            self._route(method, url.path, query, body)
+        finally:
+            self._leave()
+
+    def _leave(self) -> None:
+        # Leave before the response goes out: a client may start its next
+        # request as soon as it has read this one.
+        if self._in_flight:
+            self._in_flight = False
+            self.server._exit()
+
+    def _route(self, method: str, path: str, query: dict, body: bytes) -> None:
+        objects = self.server.objects
+
+        if m := re.fullmatch(r"/download/storage/v1/b/([^/]+)/o/(.+)", path):
+            bucket, name = m.group(1), unquote(m.group(2))
+            if (bucket, name) not in objects:
+                return self._send_json(404, {"error": {"code": 404, "message": "Not Found"}})
+            return self._send_media(objects[(bucket, name)])
+
+        if m := re.fullmatch(r"/storage/v1/b/([^/]+)", path):
+            return self._send_json(200, {"kind": "storage#bucket", "name": m.group(1)})
+
+        if m := re.fullmatch(r"/storage/v1/b/([^/]+)/o", path):
+            bucket, prefix = m.group(1), query.get("prefix", "")
+            items = [
+                _object_resource(self.server, b, n, d)
+                for (b, n), d in sorted(objects.items())
+                if b == bucket and n.startswith(prefix)
+            ]
+            return self._send_json(200, {"kind": "storage#objects", "items": items})
+
+        if method == "POST" and (m := re.fullmatch(r"/storage/v1/b/([^/]+)/o/(.+)/compose", path)):
+            bucket, name = m.group(1), unquote(m.group(2))
+            sources = [s["name"] for s in json.loads(body)["sourceObjects"]]
+            if any((bucket, s) not in objects for s in sources):
+                return self._send_json(404, {"error": {"code": 404, "message": "Not Found"}})
+            data = b"".join(objects[(bucket, s)] for s in sources)
+            self.server.put(bucket, name, data)
+            self.server.composes.append((name, sources))
+            return self._send_json(200, _object_resource(self.server, bucket, name, data))
+
+        if m := re.fullmatch(r"/storage/v1/b/([^/]+)/o/(.+)", path):
+            bucket, name = m.group(1), unquote(m.group(2))
+            if (bucket, name) not in objects:
+                return self._send_json(404, {"error": {"code": 404, "message": "Not Found"}})
+            if method == "DELETE":
+                del objects[(bucket, name)]
+                return self._send(204, b"", "text/plain")
+            resource = _object_resource(self.server, bucket, name, objects[(bucket, name)])
+            return self._send_json(200, resource)
+
+        if m := re.fullmatch(r"/upload/storage/v1/b/([^/]+)/o", path):
+            bucket = m.group(1)
+            if query.get("uploadType") == "multipart":
+                metadata, data = self._parse_multipart(body)
+                self.server.put(bucket, metadata["name"], data)
+                return self._send_json(200, _object_resource(self.server, bucket, metadata["name"], data))
+            if query.get("uploadType") == "resumable" and "upload_id" not in query:
+                name = query.get("name") or json.loads(body or b"{}").get("name")
+                upload_id = uuid.uuid4().hex
+                self.server.uploads[upload_id] = {"bucket": bucket, "name": name, "data": bytearray()}
+                location = f"{self.server.url}{path}?uploadType=resumable&upload_id={upload_id}"
+                return self._send(200, b"", "text/plain", {"Location": location})
+            if "upload_id" in query:
+                return self._resumable_chunk(query["upload_id"], body)
+
+        self._send_json(404, {"error": {"code": 404, "message": f"No route for {method} {path}"}})
+
+    def _send_media(self, data: bytes) -> None:
+        m = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if not m:
+            return self._send(200, data, "application/octet-stream", {"Accept-Ranges": "bytes"})
+        start = int(m.group(1))
+        stop = min(int(m.group(2)) + 1, len(data)) if m.group(2) else len(data)
+        self.server.range_requests.append((start, stop))
+        headers = {"Content-Range": f"bytes {start}-{stop - 1}/{len(data)}"}
+        self._send(206, data[start:stop], "application/octet-stream", headers)
+
+    def _resumable_chunk(self, upload_id: str, body: bytes) -> None:
+        upload = self.server.uploads[upload_id]
+        upload["data"] += body
+        content_range = self.headers.get("Content-Range", "")
+        total = content_range.rsplit("/", 1)[-1]
+        if total != "*" and len(upload["data"]) == int(total):
+            data = bytes(upload["data"])
+            self.server.put(upload["bucket"], upload["name"], data)
+            resource = _object_resource(self.server, upload["bucket"], upload["name"], data)
+            return self._send_json(200, resource)
+        headers = {"Range": f"bytes=0-{len(upload['data']) - 1}"} if upload["data"] else {}
+        self._send(308, b"", "text/plain", headers)
+
+    def _parse_multipart(self, body: bytes) -> tuple[dict, bytes]:
+        boundary = re.search(r'boundary="?([^";]+)"?', self.headers["Content-Type"]).group(1).encode()
+        parts = [p for p in body.split(b"--" + boundary) if p.strip() not in (b"", b"--")]
+        metadata = json.loads(parts[0].split(b"\r\n\r\n", 1)[1])
+        data = parts[1].split(b"\r\n\r\n", 1)[1]
+        return metadata, data.removesuffix(b"\r\n")
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        self._send(status, json.dumps(payload).encode(), "application/json")
+
+    def _send(self, status: int, data: bytes, content_type: str, headers: dict | None = None) -> None:
+        self._leave()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+            with self.server._lock:
+                self.server.bytes_sent += len(data)
+
+
+class FakeGCSProcess:
+    """A FakeGCSServer in a child process.
+
+    GDAL's /vsicurl/ holds the GIL while it reads through fiona, so it cannot
+    talk to a server thread in the same process.
+    """
+
+    def __init__(self, objects: dict[tuple[str, str], bytes]):
+        self._objects = objects
+        self.url = ""
+
+    def start(self) -> "FakeGCSProcess":
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        self._process = ctx.Process(target=_serve, args=(child, self._objects), daemon=True)
+        self._process.start()
+        self.url = self._conn.recv()
+        return self
+
+    def stats(self) -> dict:
+        """Requests seen and bytes sent so far."""
+        self._conn.send(("stats",))
+        return self._conn.recv()
+
+    def put(self, bucket: str, name: str, data: bytes) -> None:
+        """Store an object as a new generation."""
+        self._conn.send(("put", bucket, name, data))
+        self._conn.recv()
+
+    def stop(self) -> None:
+        self._conn.send(("stop",))
+        self._process.join()
+
+
+def _serve(conn, objects) -> None:
+    server = FakeGCSServer().start()
+    server.objects.update(objects)
+    conn.send(server.url)
+    while (command := conn.recv())[0] != "stop":
+        if command[0] == "put":
+            server.put(*command[1:])
+            conn.send(None)
+        else:
+            with server._lock:
+                conn.send({"requests": list(server.requests), "bytes_sent": server.bytes_sent})
+    server.stop()
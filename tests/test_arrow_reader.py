@@ -0,0 +1,119 @@
+"""Tests for the Arrow-batched layer reader."""
+
+import datetime
+import json
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pyogrio")
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+shapely = pytest.importorskip("shapely")
+
+from rextag.arrow_reader import _property_columns, read_layer_batches  # noqa: E402
+from rextag.config import OutputConfig  # noqa: E402
+from rextag.extract import extract_layer_to_jsonl  # noqa: E402
+
+
+def _jsonl_rows(paths):
+    rows = []
+    for path in paths:
+        rows.extend(json.loads(line) for line in path.read_text().splitlines())
+    for row in rows:
+        row.pop("_loaded_at")
+        if row["geometry"] is not None:
+            row["geometry"] = json.loads(row["geometry"])
+    return rows
+
+
+class TestReadLayerBatches:
+    def test_batches_cover_range(self, sample_gdb):
+        batches = list(read_layer_batches(sample_gdb, "parcels", start=5, stop=17, batch_size=4))
+        assert sum(b.num_rows for b in batches) == 12
+        assert batches[0].schema.names == ["NAME", "AREA", "geometry"]
+        assert batches[0].column("NAME")[0].as_py() == "Parcel 5"
+
+    def test_layer_without_geometry(self, sample_gdb):
+        batches = list(read_layer_batches(sample_gdb, "owners"))
+        assert sum(b.num_rows for b in batches) == 10
+        assert "geometry" not in batches[0].schema.names
+
+
+@pytest.fixture
+def dated_gpkg(tmp_path):
+    """A GeoPackage 'inspections' layer with a date field (OpenFileGDB cannot write one through fiona)."""
+    import fiona
+
+    path = tmp_path / "dated.gpkg"
+    schema = {"geometry": "Point", "properties": {"NAME": "str", "INSPECTED": "date"}}
+    with fiona.open(path, "w", driver="GPKG", schema=schema, crs="EPSG:2227", layer="inspections") as dst:
+        for i in range(5):
+            dst.write({
+                "geometry": {"type": "Point", "coordinates": [6000000.0 + i * 100, 2100000.0]},
+                "properties": {"NAME": f"Site {i}", "INSPECTED": f"2024-01-{i + 10}" if i % 2 else None},
+            })
+    return path
+
+
+class TestPropertyColumns:
+    def test_dates_and_times_as_iso_strings(self):
+        batch = pa.record_batch(
+            [
+                pa.array([datetime.date(2024, 1, 15), None]),
+                pa.array([datetime.time(12, 34, 56), datetime.time(1, 2, 3, 500000)], type=pa.time32("ms")),
+            ],
+            names=["D", "T"],
+        )
+        assert _property_columns(batch).to_pylist() == [
+            {"D": "2024-01-15", "T": "12:34:56"},
+            {"D": None, "T": "01:02:03.500000"},
+        ]
+
+
+class TestArrowExtract:
+    @pytest.mark.parametrize(
+        "source, layer", [("sample_gdb", "parcels"), ("sample_gdb", "owners"), ("dated_gpkg", "inspections")]
+    )
+    def test_jsonl_matches_fiona(self, request, tmp_path, source, layer):
+        path = request.getfixturevalue(source)
+        fiona_out = extract_layer_to_jsonl(path, layer, tmp_path / "fiona.jsonl", "sample")
+        arrow_out = extract_layer_to_jsonl(path, layer, tmp_path / "arrow.jsonl", "sample", reader="arrow")
+
+        assert arrow_out.count == fiona_out.count
+        fiona_rows, arrow_rows = _jsonl_rows(fiona_out.paths), _jsonl_rows(arrow_out.paths)
+        for fiona_row, arrow_row in zip(fiona_rows, arrow_rows):
+            fiona_geom, arrow_geom = fiona_row.pop("geometry"), arrow_row.pop("geometry")
+            assert arrow_row == fiona_row
+            if fiona_geom is None:
+                assert arrow_geom is None
+            else:
+                assert shapely.equals_exact(
+                    shapely.geometry.shape(arrow_geom), shapely.geometry.shape(fiona_geom), tolerance=1e-9
+                )
+
+    @patch("rextag.extract.MIN_SPLIT_FEATURES", 5)
+    def test_split_ranges_match_fiona(self, sample_gdb, tmp_path):
+        fiona_out = extract_layer_to_jsonl(sample_gdb, "parcels", tmp_path / "f" / "data.jsonl", "sample", splits=3)
+        arrow_out = extract_layer_to_jsonl(
+            sample_gdb, "parcels", tmp_path / "a" / "data.jsonl", "sample", splits=3, reader="arrow"
+        )
+
+        assert len(arrow_out.paths) == 3
+        assert [r["NAME"] for r in _jsonl_rows(arrow_out.paths)] == [r["NAME"] for r in _jsonl_rows(fiona_out.paths)]
+
+    def test_parquet_matches_fiona(self, sample_gdb, tmp_path):
+        output = OutputConfig(format="parquet")
+        extract_layer_to_jsonl(sample_gdb, "parcels", tmp_path / "fiona.parquet", "sample", output=output)
+        extract_layer_to_jsonl(
+            sample_gdb, "parcels", tmp_path / "arrow.parquet", "sample", output=output, reader="arrow"
+        )
+
+        fiona_table = pq.read_table(tmp_path / "fiona.parquet")
+        arrow_table = pq.read_table(tmp_path / "arrow.parquet")
+        assert arrow_table.schema == fiona_table.schema
+        columns = ["NAME", "AREA", "_source_file", "_layer_name"]
+        assert arrow_table.select(columns).equals(fiona_table.select(columns))
+        fiona_geoms = shapely.from_wkb(fiona_table.column("geometry").to_pylist())
+        arrow_geoms = shapely.from_wkb(arrow_table.column("geometry").to_pylist())
+        assert shapely.equals_exact(arrow_geoms, fiona_geoms, tolerance=1e-9).all()
@@ -0,0 +1,101 @@
+"""Tests for rextag.catalog."""
+
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+from rextag.catalog import Catalog, schema_hash
+from rextag.cli import main
+from rextag.config import OutputConfig
+from rextag.scan import DatasetInfo, LayerInfo
+
+
+@pytest.fixture
+def dataset():
+    return DatasetInfo(
+        name="county_data",
+        layers=[
+            LayerInfo(
+                name="parcels",
+                geometry_type="Polygon",
+                fiona_schema={"geometry": "Polygon", "properties": {"GEO_ID": "int", "NAME": "str:50"}},
+            ),
+            LayerInfo(
+                name="owners",
+                geometry_type=None,
+                fiona_schema={"geometry": None, "properties": {"OWNER_NAME": "str:100"}},
+            ),
+        ],
+    )
+
+
+class TestSchemaHash:
+    def test_stable(self, dataset):
+        assert schema_hash(dataset) == schema_hash(dataset)
+
+    def test_changes_with_field_type(self, dataset):
+        before = schema_hash(dataset)
+        dataset.layers[0].fiona_schema["properties"]["NAME"] = "str:100"
+        assert schema_hash(dataset) != before
+
+    def test_ignores_output_config(self, dataset):
+        before = schema_hash(dataset)
+        for layer in dataset.layers:
+            layer.output = OutputConfig(format="parquet")
+        assert schema_hash(dataset) == before
+
+
+class TestCatalog:
+    def test_round_trip(self, dataset, tmp_path):
+        path = tmp_path / "catalog.json"
+        catalog = Catalog.load(path)
+        catalog.record("gs://b/drop/county_data.zip", 7, dataset)
+        assert catalog.save()
+
+        loaded = Catalog.load(path)
+        entry = loaded.get("gs://b/drop/county_data.zip", 7)
+        assert entry.dataset_info() == dataset
+        assert loaded.get("gs://b/drop/county_data.zip", 8) is None
+
+    def test_save_only_when_changed(self, dataset, tmp_path):
+        path = tmp_path / "catalog.json"
+        catalog = Catalog.load(path)
+        catalog.record("gs://b/drop/county_data.zip", 7, dataset)
+        catalog.save()
+        mtime = path.stat().st_mtime_ns
+
+        catalog = Catalog.load(path)
+        catalog.record("gs://b/drop/county_data.zip", 7, dataset)
+        assert not catalog.save()
+        assert path.stat().st_mtime_ns == mtime
+
+    def test_missing_file_is_empty(self, tmp_path):
+        assert Catalog.load(tmp_path / "none.json").entries == {}
+
+
+class TestListFromCatalog:
+    @patch("rextag.cli._inspect_zip")
+    @patch("rextag.gcs.generation", return_value=7)
+    def test_answers_from_catalog(self, mock_generation, mock_inspect, dataset, tmp_path):
+        path = tmp_path / "catalog.json"
+        catalog = Catalog.load(path)
+        catalog.record("gs://b/drop/county_data.zip", 7, dataset)
+        catalog.save()
+
+        result = CliRunner().invoke(main, ["list", "--source", "gs://b/drop/county_data.zip", "--catalog", str(path)])
+
+        assert result.exit_code == 0, result.output
+        assert "  - parcels\n  - owners\n" in result.output
+        mock_inspect.assert_not_called()
+
+    @patch("rextag.cli._inspect_zip")
+    @patch("rextag.gcs.generation", return_value=8)
+    def test_stale_entry_is_refreshed(self, mock_generation, mock_inspect, dataset, tmp_path):
+        path = tmp_path / "catalog.json"
+        mock_inspect.return_value = dataset
+
+        result = CliRunner().invoke(main, ["list", "--source", "gs://b/drop/county_data.zip", "--catalog", str(path)])
+
+        assert result.exit_code == 0, result.output
+        mock_inspect.assert_called_once()
+        assert Catalog.load(path).get("gs://b/drop/county_data.zip", 8) is not None
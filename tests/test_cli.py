@@ -1,10 +1,14 @@
 """Tests for rextag.cli."""
 
+import os
+import signal
+
 import yaml
 from unittest.mock import patch
 from click.testing import CliRunner
 
 import pytest
+from rextag.catalog import DEFAULT_CATALOG_PATH
 from rextag.cli import main
 
 
@@ -39,12 +43,16 @@ class TestCliHelp:
         result = runner.invoke(main, ["scan", "--help"])
         assert result.exit_code == 0
         assert "--prefix" in result.output
+        assert "--compression" in result.output
+        assert "--format" in result.output
 
     def test_extract_help(self):
         runner = CliRunner()
         result = runner.invoke(main, ["extract", "--help"])
         assert result.exit_code == 0
         assert "--config" in result.output
+        assert "--jobs" in result.output
+        assert "--reader" in result.output
 
     def test_list_help(self):
         runner = CliRunner()
@@ -67,6 +75,20 @@ class TestScanCommand:
         assert result.exit_code == 0
         mock_run.assert_called_once()
 
+    @patch("rextag.cli.run_scan")
+    def test_rejects_compression_for_format(self, mock_run):
+        runner = CliRunner()
+        result = runner.invoke(main, [
+            "scan",
+            "--prefix", "gs://bucket/path/data_drop=2026-01/",
+            "--output-dir", "/tmp/output",
+            "--staging-bucket", "my-bucket",
+            "--compression", "zstd",
+        ])
+        assert result.exit_code != 0
+        assert "zstd" in result.output
+        mock_run.assert_not_called()
+
 
 class TestExtractCommand:
     @patch("rextag.cli.run_extract")
@@ -76,6 +98,120 @@ class TestExtractCommand:
         assert result.exit_code == 0
         mock_run.assert_called_once()
 
+    @patch("rextag.cli.run_extract")
+    def test_extract_passes_metrics_out(self, mock_run, config_file, tmp_path):
+        runner = CliRunner()
+        result = runner.invoke(main, ["extract", "--config", str(config_file), "--metrics-out", str(tmp_path / "m.prom")])
+        assert result.exit_code == 0
+        assert mock_run.call_args.kwargs["metrics_out"] == tmp_path / "m.prom"
+
+    @patch("rextag.cli.run_extract")
+    def test_extract_passes_profile_flags(self, mock_run, config_file):
+        result = CliRunner().invoke(main, ["extract", "--config", str(config_file), "--profile-memory"])
+        assert result.exit_code == 0
+        assert (mock_run.call_args.kwargs["profile"], mock_run.call_args.kwargs["profile_memory"]) == (False, True)
+
+    @patch("rextag.cli.run_extract")
+    def test_extract_reads_with_fiona_by_default(self, mock_run, config_file):
+        result = CliRunner().invoke(main, ["extract", "--config", str(config_file)])
+        assert result.exit_code == 0
+        assert mock_run.call_args.kwargs["reader"] == "fiona"
+
+    @patch("rextag.cli.run_extract")
+    def test_extract_passes_jobs(self, mock_run, config_file):
+        runner = CliRunner()
+        result = runner.invoke(main, ["extract", "--config", str(config_file), "--jobs", "4"])
+        assert result.exit_code == 0
+        assert mock_run.call_args.kwargs["jobs"] == 4
+
+    @patch("rextag.cli.run_extract")
+    def test_extract_passes_stage_limits(self, mock_run, config_file):
+        runner = CliRunner()
+        result = runner.invoke(main, [
+            "extract", "--config", str(config_file),
+            "--sources", "3", "--downloads", "1", "--uploads", "8",
+        ])
+        assert result.exit_code == 0
+        kwargs = mock_run.call_args.kwargs
+        assert (kwargs["max_sources"], kwargs["downloads"], kwargs["uploads"]) == (3, 1, 8)
+
+    @patch("rextag.cli.run_extract")
+    def test_extract_passes_resume(self, mock_run, config_file, tmp_path):
+        runner = CliRunner()
+        result = runner.invoke(main, [
+            "extract", "--config", str(config_file), "--resume", "--work-dir", str(tmp_path / "work"),
+        ])
+        assert result.exit_code == 0
+        kwargs = mock_run.call_args.kwargs
+        assert (kwargs["resume"], kwargs["work_dir"]) == (True, tmp_path / "work")
+
+    @patch("rextag.cli.ExtractScheduler")
+    def test_sigterm_stops_scheduler(self, mock_scheduler, config_file):
+        scheduler = mock_scheduler.return_value
+        scheduler.stopped = False
+        scheduler.stop.side_effect = lambda: setattr(scheduler, "stopped", True)
+        scheduler.run.side_effect = lambda sources: os.kill(os.getpid(), signal.SIGTERM) or []
+
+        runner = CliRunner()
+        result = runner.invoke(main, ["extract", "--config", str(config_file)])
+
+        scheduler.stop.assert_called_once()
+        assert result.exit_code == 1
+        assert "--resume" in result.output
+        assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+
+
+class TestProfileSummaryCommand:
+    def test_prints_summary(self, tmp_path):
+        from rextag.profiling import ProfileSettings, profile_layer
+
+        with profile_layer(ProfileSettings(tmp_path), "parcels", "boundaries"):
+            sorted(range(1000))
+
+        result = CliRunner().invoke(main, ["profile-summary", str(tmp_path), "--top", "3", "--sort", "tottime"])
+
+        assert result.exit_code == 0, result.output
+        assert "parcels__boundaries" in result.output
+        assert "Top 3 functions by tottime" in result.output
+
+    def test_missing_dumps(self, tmp_path):
+        result = CliRunner().invoke(main, ["profile-summary", str(tmp_path)])
+        assert result.exit_code != 0
+        assert "No profile dumps" in result.output
+
+
+class TestLoadCommand:
+    def test_requires_bigquery_config(self, config_file):
+        result = CliRunner().invoke(main, ["load", "--config", str(config_file)])
+        assert result.exit_code != 0
+        assert "bigquery" in result.output
+
+    @patch("rextag.cli.load_source", return_value=[])
+    @patch("rextag.cli.get_bq_client")
+    def test_loads_each_source(self, mock_client, mock_load, config_file):
+        config = yaml.safe_load(config_file.read_text())
+        config["bigquery"] = {"dataset": "rextag_raw"}
+        config_file.write_text(yaml.dump(config))
+
+        result = CliRunner().invoke(main, ["load", "--config", str(config_file)])
+
+        assert result.exit_code == 0, result.output
+        assert [c.args[2].name for c in mock_load.call_args_list] == ["parcels"]
+
+    @patch("rextag.cli.load_source", return_value=[])
+    @patch("rextag.cli.get_bq_client")
+    def test_rejects_non_date_data_drop(self, mock_client, mock_load, config_file):
+        config = yaml.safe_load(config_file.read_text())
+        config["bigquery"] = {"dataset": "rextag_raw"}
+        config["sources"][0]["uri"] = "gs://test-source/data_drop=latest/parcels.zip"
+        config_file.write_text(yaml.dump(config))
+
+        result = CliRunner().invoke(main, ["load", "--config", str(config_file)])
+
+        assert result.exit_code != 0
+        assert "latest" in result.output
+        mock_load.assert_not_called()
+
 
 class TestListCommand:
     @patch("rextag.cli.run_list")
@@ -83,4 +219,4 @@ class TestListCommand:
         runner = CliRunner()
         result = runner.invoke(main, ["list", "--source", "gs://bucket/test.gdb.zip"])
         assert result.exit_code == 0
-        mock_run.assert_called_once_with("gs://bucket/test.gdb.zip")
+        mock_run.assert_called_once_with("gs://bucket/test.gdb.zip", catalog_path=DEFAULT_CATALOG_PATH)
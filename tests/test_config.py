@@ -2,7 +2,7 @@
 
 import pytest
 import yaml
-from rextag.config import PipelineConfig, load_config
+from rextag.config import BigQueryConfig, OutputConfig, PipelineConfig, load_config
 
 
 @pytest.fixture
@@ -50,6 +50,81 @@ class TestPipelineConfig:
         path = config.hive_staging_path("parcels", "owners", "2026-01", "jsonl")
         assert path == "gs://test-staging/staged/parcels/owners/data_drop=2026-01/data.jsonl"
 
+    def test_hive_staging_path_shard(self, config_dict):
+        config = PipelineConfig.from_dict(config_dict)
+        path = config.hive_staging_path("parcels", "boundaries", "2026-01", "geojsonl", shard=3)
+        assert path == "gs://test-staging/staged/parcels/boundaries/data_drop=2026-01/data-00003.geojsonl"
+
+    def test_manifest_path(self, config_dict):
+        config = PipelineConfig.from_dict(config_dict)
+        path = config.manifest_path("parcels", "2026-01")
+        assert path == "gs://test-staging/staged/parcels/_rextag_state/data_drop=2026-01.json"
+
+
+class TestOutputConfig:
+    def test_defaults_to_uncompressed(self, config_dict):
+        config = PipelineConfig.from_dict(config_dict)
+        assert config.output.compression == "none"
+        assert config.output.file_extension(geometry=True) == "geojsonl"
+        assert config.output.file_extension(geometry=False) == "jsonl"
+
+    def test_gzip_extension(self, config_dict):
+        config_dict["output"] = {"compression": "gzip"}
+        config = PipelineConfig.from_dict(config_dict)
+        assert config.output.file_extension(geometry=True) == "geojsonl.gz"
+        assert config.output.file_extension(geometry=False) == "jsonl.gz"
+        path = config.hive_staging_path("parcels", "boundaries", "2026-01", "geojsonl.gz", shard=1)
+        assert path.endswith("/data-00001.geojsonl.gz")
+
+    def test_shard_limits(self, config_dict):
+        config_dict["output"] = {"shard_mb": 256, "shard_rows": 1_000_000}
+        config = PipelineConfig.from_dict(config_dict)
+        assert (config.output.shard_mb, config.output.shard_rows) == (256, 1_000_000)
+        assert config.output.rolls_over
+        assert not OutputConfig().rolls_over
+
+    def test_rejects_zero_shard_limit(self):
+        with pytest.raises(ValueError, match="shard"):
+            OutputConfig(shard_rows=0)
+
+    def test_rejects_unsupported_compression(self):
+        with pytest.raises(ValueError, match="zstd"):
+            OutputConfig(compression="zstd")
+
+    def test_parquet_format(self, config_dict):
+        config_dict["output"] = {"format": "parquet", "compression": "zstd"}
+        config = PipelineConfig.from_dict(config_dict)
+        assert config.output.file_extension(geometry=True) == "parquet"
+        assert config.output.file_extension(geometry=False) == "parquet"
+        assert config.output.sink_compression == "none"
+
+    def test_json_encoder(self, config_dict):
+        assert PipelineConfig.from_dict(config_dict).output.json_encoder == "stdlib"
+        config_dict["output"] = {"json_encoder": "orjson"}
+        assert PipelineConfig.from_dict(config_dict).output.json_encoder == "orjson"
+        with pytest.raises(ValueError, match="ujson"):
+            OutputConfig(json_encoder="ujson")
+
+    def test_rejects_unknown_format(self):
+        with pytest.raises(ValueError, match="csv"):
+            OutputConfig(format="csv")
+
+
+class TestBigQueryConfig:
+    def test_absent_by_default(self, config_dict):
+        assert PipelineConfig.from_dict(config_dict).bigquery is None
+
+    def test_table_id(self, config_dict):
+        config_dict["bigquery"] = {"project": "my-project", "dataset": "rextag_raw", "location": "US"}
+        config = PipelineConfig.from_dict(config_dict)
+        assert config.bigquery.location == "US"
+        assert config.bigquery.table_id("parcels", "boundaries") == "my-project.rextag_raw.parcels__boundaries"
+        assert BigQueryConfig(dataset="raw").table_id("parcels", "owners") == "raw.parcels__owners"
+
+    def test_requires_dataset(self):
+        with pytest.raises(ValueError, match="dataset"):
+            BigQueryConfig.from_dict({"project": "my-project"})
+
 
 class TestPipelineConfigV2:
     def test_backward_compat_without_scan(self):
@@ -1,7 +1,39 @@
 """Tests for rextag.convert."""
 
 import json
-from rextag.convert import feature_to_row, convert_features, needs_reprojection, reproject_geometry
+import threading
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import fiona.model
+import pytest
+from pyproj import Transformer
+
+from rextag import convert
+from rextag.convert import (
+    RowEncoder,
+    feature_to_row,
+    clear_transformer_cache,
+    convert_features,
+    get_transformer,
+    needs_reprojection,
+    reproject_geometry,
+    reproject_geometries,
+    transformer_cache_info,
+)
+
+
+@pytest.fixture
+def ca_transformer():
+    return Transformer.from_crs("EPSG:2227", "EPSG:4326", always_xy=True)
+
+
+def _per_point(coords, transformer):
+    """Reference implementation: one Transformer call per vertex."""
+    if isinstance(coords[0], (int, float)):
+        x, y = transformer.transform(coords[0], coords[1])
+        return [x, y] + list(coords[2:])
+    return [_per_point(c, transformer) for c in coords]
 
 
 class TestFeatureToRow:
@@ -59,6 +91,94 @@ class TestReprojectGeometry:
         assert 32.0 < lat < 42.0     # California latitude range
 
 
+class TestTransformerCache:
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        clear_transformer_cache()
+        yield
+        clear_transformer_cache()
+
+    def test_reuses_transformer(self):
+        first = get_transformer("EPSG:2227")
+        assert get_transformer("EPSG:2227", "EPSG:4326", always_xy=True) is first
+        assert transformer_cache_info() == (1, 1, convert.TRANSFORMER_CACHE_SIZE, 1)
+
+    def test_normalizes_authority_codes(self):
+        assert get_transformer(" epsg:2227") is get_transformer("EPSG:2227")
+        assert transformer_cache_info().misses == 1
+
+    def test_keys_on_target_and_axis_order(self):
+        get_transformer("EPSG:2227")
+        get_transformer("EPSG:2227", "EPSG:3857")
+        get_transformer("EPSG:2227", always_xy=False)
+        assert transformer_cache_info().misses == 3
+
+    @patch.object(convert._transformers, "maxsize", 2)
+    def test_evicts_least_recently_used(self):
+        first = get_transformer("EPSG:2227")
+        get_transformer("EPSG:2228")
+        get_transformer("EPSG:2227")
+        get_transformer("EPSG:2229")
+
+        assert transformer_cache_info().currsize == 2
+        assert get_transformer("EPSG:2227") is first
+        get_transformer("EPSG:2228")
+        assert transformer_cache_info().misses == 4
+
+    def test_threads_get_their_own_transformers(self):
+        mine = get_transformer("EPSG:2227")
+        theirs = []
+        thread = threading.Thread(target=lambda: theirs.append(get_transformer("EPSG:2227")))
+        thread.start()
+        thread.join()
+
+        assert theirs[0] is not mine
+        assert transformer_cache_info(this_thread=True).misses == 1
+        assert transformer_cache_info().misses == 2
+
+    def test_convert_features_shares_cache(self, sample_feature):
+        for _ in range(3):
+            list(convert_features([sample_feature], "EPSG:2227", "src", "parcels"))
+        assert transformer_cache_info()[:2] == (2, 1)
+
+
+class TestReprojectGeometries:
+    def test_matches_per_point_path(self, ca_transformer):
+        ring = [(6000000.0, 2100000.0), (6000100.0, 2100000.0), (6000100.0, 2100100.0), (6000000.0, 2100000.0)]
+        geoms = [
+            {"type": "Polygon", "coordinates": [ring, ring[::-1]]},
+            {"type": "MultiPolygon", "coordinates": [[ring], [ring, ring]]},
+            {"type": "LineString", "coordinates": ring[:3]},
+            {"type": "MultiPoint", "coordinates": ring[:2]},
+            {"type": "Point", "coordinates": ring[0]},
+        ]
+        result = reproject_geometries(geoms, ca_transformer)
+        for geom, out in zip(geoms, result):
+            assert out["type"] == geom["type"]
+            assert out["coordinates"] == _per_point(geom["coordinates"], ca_transformer)
+
+    def test_preserves_z_and_none(self, ca_transformer):
+        geoms = [None, {"type": "LineString", "coordinates": [[6000000.0, 2100000.0, 12.5], [6000100.0, 2100000.0, 13.5]]}]
+        result = reproject_geometries(geoms, ca_transformer)
+        assert result[0] is None
+        assert [p[2] for p in result[1]["coordinates"]] == [12.5, 13.5]
+
+    def test_mixed_dimensions(self, ca_transformer):
+        geom = {"type": "LineString", "coordinates": [[6000000.0, 2100000.0, 1.0], [6000100.0, 2100000.0]]}
+        (out,) = reproject_geometries([geom], ca_transformer)
+        assert out["coordinates"] == _per_point(geom["coordinates"], ca_transformer)
+
+    def test_geometry_collection(self, ca_transformer):
+        point = {"type": "Point", "coordinates": [6000000.0, 2100000.0]}
+        geom = {"type": "GeometryCollection", "geometries": [point]}
+        (out,) = reproject_geometries([geom], ca_transformer)
+        assert out["geometries"][0]["coordinates"] == _per_point(point["coordinates"], ca_transformer)
+
+    def test_empty_geometry(self, ca_transformer):
+        (out,) = reproject_geometries([{"type": "Polygon", "coordinates": []}], ca_transformer)
+        assert out == {"type": "Polygon", "coordinates": []}
+
+
 class TestConvertFeatures:
     def test_converts_to_jsonl_lines(self, sample_feature):
         features = [sample_feature, sample_feature]
@@ -74,3 +194,62 @@ class TestConvertFeatures:
         # Should be a generator, not a list
         first = next(gen)
         assert json.loads(first)["OBJECTID"] == 1
+
+    def test_reprojects_across_batches(self, sample_feature_non_wgs84, ca_transformer, monkeypatch):
+        monkeypatch.setattr(convert, "REPROJECT_BATCH_SIZE", 2)
+        features = [sample_feature_non_wgs84] * 5
+        lines = list(convert_features(features, crs="EPSG:2227", source_file="test.gdb.zip", layer_name="points"))
+        assert len(lines) == 5
+        expected = _per_point(sample_feature_non_wgs84["geometry"]["coordinates"], ca_transformer)
+        for line in lines:
+            assert json.loads(json.loads(line)["geometry"])["coordinates"] == expected
+
+
+LOADED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _reference(feature, geom):
+    """The row json.dumps(feature_to_row(...)) would produce at LOADED_AT."""
+    row = convert._build_row(feature, geom, "test.gdb.zip", "parcels")
+    row["_loaded_at"] = LOADED_AT.isoformat()
+    return json.dumps(row).encode()
+
+
+class TestRowEncoder:
+    def test_stdlib_byte_identical(self, sample_feature):
+        encoder = RowEncoder("test.gdb.zip", "parcels", loaded_at=LOADED_AT)
+        assert encoder.encode(sample_feature, sample_feature["geometry"]) == _reference(
+            sample_feature, sample_feature["geometry"]
+        )
+
+    @pytest.mark.parametrize("properties", [
+        {},
+        {"NAME": "Caf\u00e9 \"quoted\"", "VALUE": float("nan"), "FLAG": True},
+        {"geometry": "shadowed", "OTHER": 1},
+    ])
+    def test_stdlib_byte_identical_edge_cases(self, properties):
+        feature = {"geometry": None, "properties": properties}
+        encoder = RowEncoder("test.gdb.zip", "parcels", loaded_at=LOADED_AT)
+        assert encoder.encode(feature, None) == _reference(feature, None)
+
+    def test_fiona_feature(self):
+        geometry = fiona.model.Geometry(type="Point", coordinates=(1.0, 2.0))
+        feature = fiona.model.Feature(geometry=geometry, properties=fiona.model.Properties(NAME="A"))
+        encoder = RowEncoder("test.gdb.zip", "parcels", loaded_at=LOADED_AT)
+        row = json.loads(encoder.encode(feature, feature.geometry))
+        assert json.loads(row["geometry"]) == {"type": "Point", "coordinates": [1.0, 2.0]}
+        assert row["NAME"] == "A"
+
+    def test_orjson_same_values(self, sample_feature):
+        pytest.importorskip("orjson")
+        encoder = RowEncoder("test.gdb.zip", "parcels", backend="orjson", loaded_at=LOADED_AT)
+        encoded = encoder.encode(sample_feature, sample_feature["geometry"])
+        row = json.loads(encoded)
+        expected = json.loads(_reference(sample_feature, sample_feature["geometry"]))
+        # The geometry string is compact too, so compare it parsed.
+        assert json.loads(row.pop("geometry")) == json.loads(expected.pop("geometry"))
+        assert row == expected
+
+    def test_rejects_unknown_backend(self):
+        with pytest.raises(ValueError):
+            RowEncoder("test.gdb.zip", "parcels", backend="ujson")
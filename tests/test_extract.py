@@ -1,12 +1,23 @@
 """Tests for rextag.extract."""
 
+import gzip
+import json
 import zipfile
+from datetime import datetime, timezone
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
+from rextag.config import OutputConfig
 from rextag.extract import (
+    decompress_geodatabase,
     download_from_gcs,
+    extract_layer_to_jsonl,
+    find_gdb_in_zip,
+    open_geodatabase,
+    resolve_reader,
+    shard_path,
+    split_ranges,
     unzip_geodatabase,
     list_layers,
 )
@@ -36,23 +47,113 @@ class TestUnzipGeodatabase:
         with pytest.raises(FileNotFoundError):
             unzip_geodatabase(tmp_path / "nonexistent.zip", tmp_path / "output")
 
+    def test_raises_without_gdb(self, tmp_path):
+        zip_path = tmp_path / "empty.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("README.txt", "nothing here")
+        with pytest.raises(ValueError):
+            unzip_geodatabase(zip_path, tmp_path / "output")
+
+
+class TestDecompressGeodatabase:
+    @pytest.fixture
+    def mixed_zip(self, tmp_path):
+        zip_path = tmp_path / "mixed.zip"
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("README.txt", "junk")
+            zf.writestr("drop/parcels.gdb/", "")
+            zf.writestr("drop/parcels.gdb/a00000001.gdbtable", b"x" * 100_000)
+            zf.writestr("drop/parcels.gdb/a00000001.gdbtablx", b"y" * 10)
+            zf.writestr("drop/parcels.gdb/empty", b"")
+            zf.writestr("drop/preview.png", "junk")
+        return zip_path
+
+    def test_extracts_only_gdb_members(self, mixed_zip, tmp_path):
+        stats = decompress_geodatabase(mixed_zip, tmp_path / "output", workers=3)
+
+        assert stats.gdb_path == (tmp_path / "output" / "drop" / "parcels.gdb").resolve()
+        assert (stats.gdb_path / "a00000001.gdbtable").read_bytes() == b"x" * 100_000
+        assert (stats.gdb_path / "empty").read_bytes() == b""
+        assert not (tmp_path / "output" / "README.txt").exists()
+        assert not (tmp_path / "output" / "drop" / "preview.png").exists()
+        assert stats.files == 3
+        assert stats.bytes == 100_010
+        assert stats.mb_per_sec > 0
+
+    def test_detects_crc_mismatch(self, tmp_path):
+        zip_path = tmp_path / "corrupt.zip"
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zf:
+            zf.writestr("x.gdb/a00000001.gdbtable", b"original-bytes")
+        data = zip_path.read_bytes()
+        zip_path.write_bytes(data.replace(b"original-bytes", b"tampered-bytes"))
+
+        with pytest.raises(zipfile.BadZipFile):
+            decompress_geodatabase(zip_path, tmp_path / "output")
+
+    def test_rejects_path_traversal(self, tmp_path):
+        zip_path = tmp_path / "evil.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("x.gdb/../../escaped", b"nope")
+        with pytest.raises(ValueError):
+            decompress_geodatabase(zip_path, tmp_path / "output")
+
+
+class TestOpenGeodatabase:
+    def test_finds_gdb(self, sample_gdb_zip_with_extras):
+        assert find_gdb_in_zip(sample_gdb_zip_with_extras) == "sample.gdb"
+
+    def test_finds_nested_gdb(self, tmp_path):
+        zip_path = tmp_path / "nested.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("drop/parcels.gdb/a00000001.gdbtable", "fake")
+        assert find_gdb_in_zip(zip_path) == "drop/parcels.gdb"
+
+    def test_no_gdb(self, tmp_path):
+        zip_path = tmp_path / "empty.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("README.txt", "nothing here")
+        assert find_gdb_in_zip(zip_path) is None
+
+    def test_reads_in_place(self, sample_gdb_zip_with_extras, tmp_path):
+        path = open_geodatabase(sample_gdb_zip_with_extras, tmp_path / "extracted")
+        assert isinstance(path, str)
+        assert path.startswith("/vsizip/")
+        assert sorted(list_layers(path)) == ["owners", "parcels"]
+        assert not (tmp_path / "extracted").exists()
+
+        output = extract_layer_to_jsonl(path, "parcels", tmp_path / "out" / "data.geojsonl", "sample")
+        assert output.count == 25
+
+    def test_falls_back_to_extraction(self, fake_gdb_zip, tmp_path):
+        path = open_geodatabase(fake_gdb_zip, tmp_path / "extracted")
+        assert path == tmp_path / "extracted" / "test.gdb"
+        assert path.is_dir()
+
+    def test_extract_mode(self, sample_gdb_zip_with_extras, tmp_path):
+        path = open_geodatabase(sample_gdb_zip_with_extras, tmp_path / "extracted", mode="extract")
+        assert isinstance(path, Path)
+
+    def test_missing_zip(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            open_geodatabase(tmp_path / "nonexistent.zip", tmp_path / "extracted")
+
 
 class TestDownloadFromGcs:
-    @patch("rextag.extract.storage.Client")
-    def test_downloads_blob_to_local(self, mock_client_cls, tmp_path):
+    @patch("rextag.gcs.get_client")
+    def test_downloads_blob_to_local(self, mock_get_client, tmp_path):
         mock_client = MagicMock()
-        mock_client_cls.return_value = mock_client
+        mock_get_client.return_value = mock_client
         mock_bucket = MagicMock()
         mock_client.bucket.return_value = mock_bucket
-        mock_blob = MagicMock()
-        mock_bucket.blob.return_value = mock_blob
+        mock_blob = MagicMock(size=1024, content_encoding=None)
+        mock_bucket.get_blob.return_value = mock_blob
 
         dest = tmp_path / "downloaded.gdb.zip"
         download_from_gcs("gs://my-bucket/path/to/file.gdb.zip", dest)
 
         mock_client.bucket.assert_called_once_with("my-bucket")
-        mock_bucket.blob.assert_called_once_with("path/to/file.gdb.zip")
-        mock_blob.download_to_filename.assert_called_once_with(str(dest))
+        mock_bucket.get_blob.assert_called_once_with("path/to/file.gdb.zip", retry=ANY)
+        mock_blob.download_to_filename.assert_called_once_with(str(dest), retry=ANY)
 
 
 class TestListLayers:
@@ -62,3 +163,140 @@ class TestListLayers:
         layers = list_layers(Path("/tmp/test.gdb"))
         assert layers == ["parcels", "zoning", "roads"]
         mock_listlayers.assert_called_once_with(Path("/tmp/test.gdb"))
+
+
+def _rows(paths):
+    rows = []
+    for path in paths:
+        for line in path.read_text().splitlines():
+            row = json.loads(line)
+            row.pop("_loaded_at")
+            rows.append(row)
+    return rows
+
+
+class TestSplitRanges:
+    def test_covers_total_contiguously(self):
+        assert split_ranges(10, 3) == [(0, 3), (3, 6), (6, 10)]
+
+    def test_never_more_ranges_than_features(self):
+        assert split_ranges(2, 8) == [(0, 1), (1, 2)]
+
+
+class TestShardPath:
+    def test_local_path(self, tmp_path):
+        assert shard_path(tmp_path / "data.geojsonl", 3) == tmp_path / "data-00003.geojsonl"
+
+    def test_gcs_uri(self):
+        assert shard_path("gs://b/p/data_drop=2026-01/data.jsonl", 0) == "gs://b/p/data_drop=2026-01/data-00000.jsonl"
+
+
+class TestExtractLayerToJsonl:
+    def test_single_file(self, sample_gdb, tmp_path):
+        output = extract_layer_to_jsonl(sample_gdb, "parcels", tmp_path / "data.geojsonl", "sample")
+        assert output.count == 25
+        assert output.paths == [tmp_path / "data.geojsonl"]
+
+    def test_small_layer_not_split(self, sample_gdb, tmp_path):
+        output = extract_layer_to_jsonl(sample_gdb, "parcels", tmp_path / "data.geojsonl", "sample", splits=4)
+        assert output.paths == [tmp_path / "data.geojsonl"]
+
+    @patch("rextag.extract.MIN_SPLIT_FEATURES", 5)
+    def test_split_matches_single_process(self, sample_gdb, tmp_path):
+        single = extract_layer_to_jsonl(sample_gdb, "parcels", tmp_path / "single" / "data.geojsonl", "sample")
+        split = extract_layer_to_jsonl(sample_gdb, "parcels", tmp_path / "split" / "data.geojsonl", "sample", splits=4)
+
+        assert [p.name for p in split.paths] == [f"data-{i:05d}.geojsonl" for i in range(4)]
+        assert split.count == single.count == 25
+        assert _rows(split.paths) == _rows(single.paths)
+        assert split.bytes == single.bytes == sum(p.stat().st_size for p in single.paths)
+        assert split.worker_cpu_s > 0 and single.worker_cpu_s == 0
+
+    @pytest.mark.parametrize("output", [OutputConfig(), OutputConfig(compression="gzip"), OutputConfig(format="parquet")])
+    def test_fixed_loaded_at_is_reproducible(self, sample_gdb, tmp_path, output):
+        loaded_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        a, b = (
+            extract_layer_to_jsonl(sample_gdb, "parcels", tmp_path / d / "data", "sample", output=output, loaded_at=loaded_at)
+            for d in ("a", "b")
+        )
+        assert a.paths[0].read_bytes() == b.paths[0].read_bytes()
+
+    @patch("rextag.extract.MIN_SPLIT_FEATURES", 5)
+    def test_gzip_shards_decompress(self, sample_gdb, tmp_path):
+        output = extract_layer_to_jsonl(
+            sample_gdb, "parcels", tmp_path / "data.geojsonl.gz", "sample", splits=2, output=OutputConfig(compression="gzip")
+        )
+
+        assert [p.name for p in output.paths] == ["data-00000.geojsonl.gz", "data-00001.geojsonl.gz"]
+        lines = b"".join(gzip.decompress(p.read_bytes()) for p in output.paths).splitlines()
+        assert len(lines) == output.count == 25
+
+
+class TestRollingOutput:
+    def test_rolls_over_at_row_limit(self, sample_gdb, tmp_path):
+        output = extract_layer_to_jsonl(
+            sample_gdb, "parcels", tmp_path / "data.geojsonl", "sample", output=OutputConfig(shard_rows=10)
+        )
+        assert output.count == 25
+        assert [p.name for p in output.paths] == [f"data-{i:05d}.geojsonl" for i in range(3)]
+        assert [len(p.read_text().splitlines()) for p in output.paths] == [10, 10, 5]
+        assert not (tmp_path / "data.geojsonl").exists()
+
+    @patch("rextag.extract.MIN_SPLIT_FEATURES", 5)
+    def test_split_ranges_roll_over_separately(self, sample_gdb, tmp_path):
+        single = extract_layer_to_jsonl(sample_gdb, "parcels", tmp_path / "single" / "data.geojsonl", "sample")
+        output = extract_layer_to_jsonl(
+            sample_gdb, "parcels", tmp_path / "split" / "data.geojsonl", "sample",
+            splits=2, output=OutputConfig(shard_rows=5),
+        )
+        assert [p.name for p in output.paths] == [
+            "data-00000-00000.geojsonl", "data-00000-00001.geojsonl", "data-00000-00002.geojsonl",
+            "data-00001-00000.geojsonl", "data-00001-00001.geojsonl", "data-00001-00002.geojsonl",
+        ]
+        assert _rows(output.paths) == _rows(single.paths)
+
+    def test_uploads_each_shard_as_it_closes(self, fake_gcs, sample_gdb, tmp_path):
+        loaded_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        output = extract_layer_to_jsonl(
+            sample_gdb, "parcels", tmp_path / "data.geojsonl", "sample", output=OutputConfig(shard_rows=10),
+            loaded_at=loaded_at, upload_to="gs://bucket/staged/parcels/data.geojsonl",
+        )
+
+        assert output.paths == [f"gs://bucket/staged/parcels/data-{i:05d}.geojsonl" for i in range(3)]
+        assert sorted(name for _, name in fake_gcs.objects) == [
+            f"staged/parcels/data-{i:05d}.geojsonl" for i in range(3)
+        ]
+        assert list(tmp_path.glob("*.geojsonl")) == []
+
+    def test_identical_shards_are_not_uploaded_again(self, fake_gcs, sample_gdb, tmp_path):
+        loaded_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for _ in range(2):
+            extract_layer_to_jsonl(
+                sample_gdb, "parcels", tmp_path / "data.geojsonl", "sample", output=OutputConfig(shard_rows=10),
+                loaded_at=loaded_at, upload_to="gs://bucket/staged/parcels/data.geojsonl",
+            )
+        uploads = [r for r in fake_gcs.requests if r[0] == "POST" and r[1].startswith("/upload/")]
+        assert len(uploads) == 3
+
+
+class TestResolveReader:
+    def test_defaults_to_fiona_even_with_arrow_installed(self):
+        with patch("rextag.extract.importlib.util.find_spec", return_value=object()):
+            assert resolve_reader() == "fiona"
+
+    def test_auto_falls_back_to_fiona(self):
+        with patch("rextag.extract.importlib.util.find_spec", return_value=None):
+            assert resolve_reader("auto") == "fiona"
+
+    def test_auto_prefers_arrow(self):
+        with patch("rextag.extract.importlib.util.find_spec", return_value=object()):
+            assert resolve_reader("auto") == "arrow"
+
+    def test_arrow_requires_dependencies(self):
+        with patch("rextag.extract.importlib.util.find_spec", return_value=None):
+            with pytest.raises(ImportError, match="pyogrio"):
+                resolve_reader("arrow")
+
+    def test_rejects_unknown_reader(self):
+        with pytest.raises(ValueError):
+            resolve_reader("gdal")
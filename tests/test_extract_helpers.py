@@ -1,15 +1,15 @@
 """Tests for extract helper functions."""
 
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 from rextag.extract import list_blobs, parse_data_drop, has_geometry
 
 
 class TestListBlobs:
-    @patch("rextag.extract.storage.Client")
-    def test_lists_zip_blobs(self, mock_client_cls):
+    @patch("rextag.gcs.get_client")
+    def test_lists_zip_blobs(self, mock_get_client):
         mock_client = MagicMock()
-        mock_client_cls.return_value = mock_client
+        mock_get_client.return_value = mock_client
         mock_bucket = MagicMock()
         mock_client.bucket.return_value = mock_bucket
 
@@ -24,16 +24,16 @@ class TestListBlobs:
         result = list_blobs("gs://siteselect-dbt/rextagsource/data_drop=2026-01/", suffix=".zip")
 
         mock_client.bucket.assert_called_once_with("siteselect-dbt")
-        mock_bucket.list_blobs.assert_called_once_with(prefix="rextagsource/data_drop=2026-01/")
+        mock_bucket.list_blobs.assert_called_once_with(prefix="rextagsource/data_drop=2026-01/", retry=ANY)
         assert result == [
             "gs://siteselect-dbt/rextagsource/data_drop=2026-01/parcels.zip",
             "gs://siteselect-dbt/rextagsource/data_drop=2026-01/zoning.zip",
         ]
 
-    @patch("rextag.extract.storage.Client")
-    def test_lists_all_blobs_no_suffix(self, mock_client_cls):
+    @patch("rextag.gcs.get_client")
+    def test_lists_all_blobs_no_suffix(self, mock_get_client):
         mock_client = MagicMock()
-        mock_client_cls.return_value = mock_client
+        mock_get_client.return_value = mock_client
         mock_bucket = MagicMock()
         mock_client.bucket.return_value = mock_bucket
         blob1 = MagicMock()
@@ -0,0 +1,259 @@
+"""Tests for rextag.gcs against a local fake GCS server."""
+
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import google_crc32c
+import pytest
+from rextag import gcs
+from rextag.config import GCSTransportConfig
+from rextag.sinks import open_sink
+
+
+class TestParseUri:
+    def test_bucket_and_path(self):
+        assert gcs.parse_uri("gs://bucket/path/to/file.zip") == ("bucket", "path/to/file.zip")
+
+    def test_bucket_only(self):
+        assert gcs.parse_uri("gs://bucket") == ("bucket", "")
+
+
+class TestTransport:
+    def test_upload_list_download(self, fake_gcs, tmp_path):
+        local = tmp_path / "data.jsonl"
+        local.write_bytes(b'{"a": 1}\n')
+
+        gcs.upload(local, "gs://bucket/staged/data.jsonl")
+        assert fake_gcs.objects[("bucket", "staged/data.jsonl")] == b'{"a": 1}\n'
+
+        assert gcs.list_uris("gs://bucket/staged/", suffix=".jsonl") == ["gs://bucket/staged/data.jsonl"]
+        assert gcs.list_uris("gs://bucket/staged/", suffix=".zip") == []
+
+        gcs.download("gs://bucket/staged/data.jsonl", tmp_path / "copy" / "data.jsonl")
+        assert (tmp_path / "copy" / "data.jsonl").read_bytes() == b'{"a": 1}\n'
+
+    def test_one_client_per_process(self, fake_gcs):
+        with patch("rextag.gcs.storage.Client", wraps=gcs.storage.Client) as client_cls:
+            assert gcs.get_client() is gcs.get_client()
+            gcs.list_uris("gs://bucket/")
+            gcs.list_uris("gs://bucket/")
+        assert client_cls.call_count == 1
+
+    def test_connections_are_reused(self, fake_gcs, tmp_path):
+        fake_gcs.objects[("bucket", "source.zip")] = b"zip bytes"
+        for i in range(10):
+            gcs.download("gs://bucket/source.zip", tmp_path / f"{i}.zip")
+        assert fake_gcs.connections < 10
+
+    def test_retries_transient_errors(self, fake_gcs, tmp_path):
+        fake_gcs.objects[("bucket", "source.zip")] = b"zip bytes"
+        fake_gcs.fail_next(2, status=503)
+
+        gcs.download("gs://bucket/source.zip", tmp_path / "source.zip")
+
+        assert (tmp_path / "source.zip").read_bytes() == b"zip bytes"
+        assert len(fake_gcs.requests) >= 3
+        # The client's background bucket metadata fetch may land at any point.
+        object_requests = [r for r in fake_gcs.requests if r[1] != "/storage/v1/b/bucket"]
+        assert object_requests[-1] == ("GET", "/download/storage/v1/b/bucket/o/source.zip")
+
+    def test_caps_in_flight_requests(self, fake_gcs, tmp_path):
+        gcs.configure(GCSTransportConfig(max_in_flight=2, initial_backoff=0.01))
+        fake_gcs.objects[("bucket", "source.zip")] = b"zip bytes"
+        # Let the client's one-off background bucket metadata fetch finish first.
+        gcs.download("gs://bucket/source.zip", tmp_path / "warm.zip")
+        time.sleep(0.1)
+        fake_gcs.peak_in_flight = 0
+        fake_gcs.delay = 0.05
+
+        threads = [
+            threading.Thread(target=gcs.download, args=("gs://bucket/source.zip", tmp_path / f"{i}.zip"))
+            for i in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert fake_gcs.peak_in_flight == 2
+        assert len(list(tmp_path.glob("[0-9].zip"))) == 8
+
+    def test_upload_if_changed(self, fake_gcs, tmp_path):
+        local = tmp_path / "data.jsonl"
+        local.write_bytes(b'{"a": 1}\n')
+
+        assert gcs.upload_if_changed(local, "gs://bucket/staged/data.jsonl")
+        assert not gcs.upload_if_changed(local, "gs://bucket/staged/data.jsonl")
+        local.write_bytes(b'{"a": 2}\n')
+        assert gcs.upload_if_changed(local, "gs://bucket/staged/data.jsonl")
+        assert fake_gcs.objects[("bucket", "staged/data.jsonl")] == b'{"a": 2}\n'
+
+    def test_delete_ignores_missing_objects(self, fake_gcs):
+        fake_gcs.objects[("bucket", "a.jsonl")] = b"a"
+        gcs.delete(["gs://bucket/a.jsonl", "gs://bucket/missing.jsonl"])
+        assert fake_gcs.objects == {}
+
+    def test_streaming_sink_uses_shared_client(self, fake_gcs):
+        data = bytes(range(256)) * 3000
+        sink = open_sink("gs://bucket/staged/data.jsonl", chunk_size=256 * 1024)
+        sink.write(data)
+        sink.close()
+        assert fake_gcs.objects[("bucket", "staged/data.jsonl")] == data
+
+
+class TestSlicedDownload:
+    MB = 1024 * 1024
+
+    @pytest.fixture
+    def sliced(self, fake_gcs):
+        gcs.configure(GCSTransportConfig(download_slice_mb=1, download_slices=3, initial_backoff=0.01))
+        return fake_gcs
+
+    def test_large_object_downloads_in_slices(self, sliced, tmp_path):
+        data = os.urandom(3 * self.MB + 12345)
+        sliced.objects[("bucket", "big.zip")] = data
+
+        gcs.download("gs://bucket/big.zip", tmp_path / "big.zip")
+
+        assert (tmp_path / "big.zip").read_bytes() == data
+        assert sorted(sliced.range_requests) == [
+            (0, self.MB),
+            (self.MB, 2 * self.MB),
+            (2 * self.MB, 3 * self.MB),
+            (3 * self.MB, len(data)),
+        ]
+
+    def test_small_object_uses_single_request(self, sliced, tmp_path):
+        sliced.objects[("bucket", "small.zip")] = b"x" * self.MB
+
+        gcs.download("gs://bucket/small.zip", tmp_path / "small.zip")
+
+        assert (tmp_path / "small.zip").read_bytes() == b"x" * self.MB
+        assert sliced.range_requests == []
+
+    def test_checksum_mismatch_removes_file(self, sliced, tmp_path):
+        sliced.objects[("bucket", "big.zip")] = os.urandom(2 * self.MB + 1)
+
+        with patch("rextag.gcs.crc32c_combine", return_value=0):
+            with pytest.raises(ValueError, match="crc32c mismatch"):
+                gcs.download("gs://bucket/big.zip", tmp_path / "big.zip")
+        assert not (tmp_path / "big.zip").exists()
+
+    def test_missing_object(self, sliced, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            gcs.download("gs://bucket/missing.zip", tmp_path / "missing.zip")
+
+
+class TestCompositeUpload:
+    MB = 1024 * 1024
+
+    @pytest.fixture
+    def parts(self, fake_gcs):
+        gcs.configure(GCSTransportConfig(upload_part_mb=1, upload_parts=3, initial_backoff=0.01))
+        return fake_gcs
+
+    def _staged(self, server):
+        return sorted(name for _, name in server.objects)
+
+    def test_large_file_uploads_as_composed_parts(self, parts, tmp_path):
+        data = os.urandom(3 * self.MB + 100)
+        local = tmp_path / "data.jsonl"
+        local.write_bytes(data)
+
+        gcs.upload(local, "gs://bucket/staged/data.jsonl")
+
+        assert parts.objects[("bucket", "staged/data.jsonl")] == data
+        assert parts.composes == [("staged/data.jsonl", [f"staged/data.jsonl.parts/{i:05d}" for i in range(4)])]
+        assert self._staged(parts) == ["staged/data.jsonl"]
+        assert not gcs.upload_state_path(local).exists()
+
+    def test_small_file_uploads_directly(self, parts, tmp_path):
+        local = tmp_path / "data.jsonl"
+        local.write_bytes(b"x" * self.MB)
+
+        gcs.upload(local, "gs://bucket/staged/data.jsonl")
+
+        assert parts.objects[("bucket", "staged/data.jsonl")] == b"x" * self.MB
+        assert parts.composes == []
+
+    @patch("rextag.gcs._MAX_COMPOSE_SOURCES", 2)
+    def test_composes_in_levels_past_source_limit(self, parts, tmp_path):
+        data = os.urandom(4 * self.MB + 1)
+        local = tmp_path / "data.jsonl"
+        local.write_bytes(data)
+
+        gcs.upload(local, "gs://bucket/staged/data.jsonl")
+
+        assert parts.objects[("bucket", "staged/data.jsonl")] == data
+        assert len(parts.composes) > 1
+        assert self._staged(parts) == ["staged/data.jsonl"]
+
+    def test_resumes_interrupted_upload(self, parts, tmp_path):
+        gcs.configure(GCSTransportConfig(upload_part_mb=1, upload_parts=1, initial_backoff=0.01))
+        data = os.urandom(4 * self.MB + 1)
+        local = tmp_path / "data.jsonl"
+        local.write_bytes(data)
+
+        real_upload_part = gcs._upload_part
+        sent = []
+
+        def flaky(bucket, name, *args):
+            if len(sent) == 2:
+                raise ConnectionError("interrupted")
+            sent.append(name)
+            return real_upload_part(bucket, name, *args)
+
+        with patch("rextag.gcs._upload_part", side_effect=flaky):
+            with pytest.raises(ConnectionError):
+                gcs.upload(local, "gs://bucket/staged/data.jsonl")
+        assert gcs.upload_state_path(local).exists()
+        assert ("bucket", "staged/data.jsonl") not in parts.objects
+
+        with patch("rextag.gcs._upload_part", wraps=real_upload_part) as resumed:
+            gcs.upload(local, "gs://bucket/staged/data.jsonl")
+
+        assert [c.args[1] for c in resumed.call_args_list] == [
+            f"staged/data.jsonl.parts/{i:05d}" for i in (2, 3, 4)
+        ]
+        assert parts.objects[("bucket", "staged/data.jsonl")] == data
+        assert self._staged(parts) == ["staged/data.jsonl"]
+        assert not gcs.upload_state_path(local).exists()
+
+    def test_changed_file_restarts_upload(self, parts, tmp_path):
+        local = tmp_path / "data.jsonl"
+        local.write_bytes(os.urandom(2 * self.MB + 1))
+        gcs.upload_state_path(local).write_text(
+            '{"key": {"uri": "gs://bucket/staged/data.jsonl", "size": 1, "sha256": "0", "part_size": 1048576},'
+            ' "parts": {"0": {"name": "staged/data.jsonl.parts/00000", "generation": 1, "crc32c": "AAAAAA=="}}}'
+        )
+        data = local.read_bytes()
+
+        gcs.upload(local, "gs://bucket/staged/data.jsonl")
+
+        assert parts.objects[("bucket", "staged/data.jsonl")] == data
+
+
+class TestCrc32cCombine:
+    @pytest.mark.parametrize("split", [0, 1, 500, 4095, 4096])
+    def test_matches_whole_checksum(self, split):
+        data = os.urandom(4096)
+        a, b = data[:split], data[split:]
+        combined = gcs.crc32c_combine(google_crc32c.value(a), google_crc32c.value(b), len(b))
+        assert combined == google_crc32c.value(data)
+
+
+class TestGCSTransportConfig:
+    def test_defaults(self):
+        config = GCSTransportConfig.from_dict({"staging_bucket": "b", "staging_prefix": "p/"})
+        assert config == GCSTransportConfig()
+
+    def test_from_dict(self):
+        config = GCSTransportConfig.from_dict({"pool_size": 8, "max_in_flight": 4})
+        assert config.pool_size == 8
+        assert config.max_in_flight == 4
+
+    def test_rejects_zero_in_flight(self):
+        with pytest.raises(ValueError):
+            GCSTransportConfig(max_in_flight=0)
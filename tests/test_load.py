@@ -1,15 +1,21 @@
 """Tests for rextag.load."""
 
-from unittest.mock import MagicMock, patch
+from dataclasses import asdict
+from unittest.mock import ANY, MagicMock, patch
 
-from rextag.load import upload_to_gcs
+import pytest
+from rextag.config import OutputConfig, PipelineConfig
+from rextag.load import get_bq_client, load_source, partition_for, staged_schema, upload_to_gcs
+from rextag.state import LayerState, SourceState, save_state
+
+SOURCE_URI = "gs://test-source/rextagsource/data_drop=2026-01/parcels.zip"
 
 
 class TestUploadToGcs:
-    @patch("rextag.load.storage.Client")
-    def test_uploads_file(self, mock_client_cls, tmp_path):
+    @patch("rextag.gcs.get_client")
+    def test_uploads_file(self, mock_get_client, tmp_path):
         mock_client = MagicMock()
-        mock_client_cls.return_value = mock_client
+        mock_get_client.return_value = mock_client
         mock_bucket = MagicMock()
         mock_client.bucket.return_value = mock_bucket
         mock_blob = MagicMock()
@@ -22,4 +28,137 @@ class TestUploadToGcs:
 
         mock_client.bucket.assert_called_once_with("staging-bucket")
         mock_bucket.blob.assert_called_once_with("rextag/staging/parcels/layer.jsonl")
-        mock_blob.upload_from_filename.assert_called_once_with(str(local_file))
+        mock_blob.upload_from_filename.assert_called_once_with(str(local_file), retry=ANY)
+
+
+@pytest.fixture
+def config():
+    return PipelineConfig.from_dict({
+        "gcs": {"staging_bucket": "test-staging", "staging_prefix": "staged/"},
+        "bigquery": {"project": "test-project", "dataset": "rextag_raw"},
+        "sources": [{"name": "parcels", "uri": SOURCE_URI}],
+    })
+
+
+def _stage(fake_gcs, config, layers: dict[str, int], output: OutputConfig = OutputConfig(), complete=True):
+    """Stage `layers` (name -> row count) with a manifest, as extract would."""
+    fiona_schema = {"geometry": "Polygon", "properties": {"NAME": "str", "AREA": "float"}}
+    state = SourceState(
+        source_uri=SOURCE_URI, generation=1, md5=None,
+        loaded_at="2026-01-05T00:00:00+00:00", output=asdict(output), complete=complete,
+    )
+    for layer, count in layers.items():
+        uri = config.hive_staging_path("parcels", layer, "2026-01", "geojsonl")
+        fake_gcs.put("test-staging", uri.removeprefix("gs://test-staging/"), b'{"NAME": "a"}\n' * count)
+        state.layers[layer] = LayerState(uris=[uri], count=count, schema=staged_schema(fiona_schema, output))
+    save_state(config.manifest_path("parcels", "2026-01"), state)
+    return state
+
+
+class TestStagedSchema:
+    def test_jsonl_geometry_is_text(self, sample_fiona_schema):
+        schema = staged_schema(sample_fiona_schema, OutputConfig())
+        assert schema[0] == {"name": "geometry", "type": "STRING", "mode": "NULLABLE"}
+        assert [f["name"] for f in schema[-3:]] == ["_loaded_at", "_source_file", "_layer_name"]
+
+    def test_parquet_geometry_is_wkb(self, sample_fiona_schema):
+        schema = staged_schema(sample_fiona_schema, OutputConfig(format="parquet"))
+        assert schema[0]["type"] == "BYTES"
+
+    def test_parquet_without_geometry_has_no_geometry_column(self):
+        schema = staged_schema({"geometry": "None", "properties": {"OWNER": "str"}}, OutputConfig(format="parquet"))
+        assert [f["name"] for f in schema] == ["OWNER", "_loaded_at", "_source_file", "_layer_name"]
+
+
+class TestPartitionFor:
+    def test_month(self):
+        assert partition_for("2026-01") == ("MONTH", "202601")
+
+    def test_day(self):
+        assert partition_for("2026-01-15") == ("DAY", "20260115")
+
+    def test_year(self):
+        assert partition_for("2026") == ("YEAR", "2026")
+
+    def test_rejects_non_date(self):
+        with pytest.raises(ValueError, match="latest"):
+            partition_for("latest")
+
+
+class TestLoadSource:
+    def test_loads_each_layer_into_its_partition(self, fake_bigquery, fake_gcs, config):
+        _stage(fake_gcs, config, {"boundaries": 3, "owners": 2})
+        lines = []
+
+        failed = load_source(get_bq_client(config.bigquery), config, config.sources[0], echo=lines.append)
+
+        assert failed == []
+        assert fake_bigquery.partitions == {
+            ("test-project", "rextag_raw", "parcels__boundaries"): {"202601": 3},
+            ("test-project", "rextag_raw", "parcels__owners"): {"202601": 2},
+        }
+        table = fake_bigquery.tables[("test-project", "rextag_raw", "parcels__boundaries")]
+        assert table["timePartitioning"] == {"type": "MONTH"}
+        assert fake_bigquery.column_names("test-project", "rextag_raw", "parcels__boundaries") == [
+            "geometry", "NAME", "AREA", "_loaded_at", "_source_file", "_layer_name",
+        ]
+        load = fake_bigquery.loads[0]
+        assert load["destinationTable"]["tableId"] == "parcels__boundaries$202601"
+        assert (load["writeDisposition"], load["sourceFormat"]) == ("WRITE_TRUNCATE", "NEWLINE_DELIMITED_JSON")
+        assert "  Loaded 3 rows into test-project.rextag_raw.parcels__boundaries$202601" in lines
+
+    def test_rerun_replaces_partition(self, fake_bigquery, fake_gcs, config):
+        client = get_bq_client(config.bigquery)
+        _stage(fake_gcs, config, {"boundaries": 3})
+        load_source(client, config, config.sources[0], echo=lambda line: None)
+        _stage(fake_gcs, config, {"boundaries": 5})
+
+        assert load_source(client, config, config.sources[0], echo=lambda line: None) == []
+        assert fake_bigquery.partitions[("test-project", "rextag_raw", "parcels__boundaries")] == {"202601": 5}
+
+    def test_new_columns_are_added(self, fake_bigquery, fake_gcs, config):
+        client = get_bq_client(config.bigquery)
+        state = _stage(fake_gcs, config, {"boundaries": 3})
+        load_source(client, config, config.sources[0], echo=lambda line: None)
+        state.layers["boundaries"].schema.insert(3, {"name": "ZONE", "type": "STRING", "mode": "NULLABLE"})
+        save_state(config.manifest_path("parcels", "2026-01"), state)
+
+        assert load_source(client, config, config.sources[0], echo=lambda line: None) == []
+        assert "ZONE" in fake_bigquery.column_names("test-project", "rextag_raw", "parcels__boundaries")
+        assert fake_bigquery.loads[-1]["schemaUpdateOptions"] == ["ALLOW_FIELD_ADDITION"]
+
+    def test_parquet_staging_loads_as_parquet(self, fake_bigquery, fake_gcs, config):
+        _stage(fake_gcs, config, {"boundaries": 0}, output=OutputConfig(format="parquet"))
+
+        load_source(get_bq_client(config.bigquery), config, config.sources[0], echo=lambda line: None)
+
+        assert fake_bigquery.loads[0]["sourceFormat"] == "PARQUET"
+
+    def test_incomplete_manifest_is_not_loaded(self, fake_bigquery, fake_gcs, config):
+        _stage(fake_gcs, config, {"boundaries": 3}, complete=False)
+        lines = []
+
+        failed = load_source(get_bq_client(config.bigquery), config, config.sources[0], echo=lines.append)
+
+        assert failed == ["parcels"]
+        assert fake_bigquery.loads == []
+        assert any("run extract first" in line for line in lines)
+
+    def test_row_count_mismatch_fails(self, fake_bigquery, fake_gcs, config):
+        state = _stage(fake_gcs, config, {"boundaries": 3})
+        state.layers["boundaries"].count = 4
+        save_state(config.manifest_path("parcels", "2026-01"), state)
+
+        failed = load_source(get_bq_client(config.bigquery), config, config.sources[0], echo=lambda line: None)
+
+        assert failed == ["parcels/boundaries"]
+
+    def test_layer_without_schema_fails(self, fake_bigquery, fake_gcs, config):
+        state = _stage(fake_gcs, config, {"boundaries": 3, "owners": 2})
+        state.layers["owners"].schema = None
+        save_state(config.manifest_path("parcels", "2026-01"), state)
+
+        failed = load_source(get_bq_client(config.bigquery), config, config.sources[0], echo=lambda line: None)
+
+        assert failed == ["parcels/owners"]
+        assert ("test-project", "rextag_raw", "parcels__boundaries") in fake_bigquery.partitions
@@ -0,0 +1,81 @@
+"""Tests for rextag.metrics."""
+
+import json
+import time
+
+import pytest
+from rextag.metrics import RunReport, StageMetrics, measure
+
+
+class TestMeasure:
+    def test_records_wall_cpu_and_rss(self):
+        with measure("convert", "parcels", "boundaries") as metrics:
+            metrics.features = 100
+            sum(i * i for i in range(200_000))
+            time.sleep(0.02)
+
+        assert (metrics.stage, metrics.source, metrics.layer) == ("convert", "parcels", "boundaries")
+        assert metrics.wall_s >= 0.02
+        assert 0 < metrics.cpu_s < metrics.wall_s
+        assert metrics.peak_rss_bytes > 1_000_000
+        assert metrics.features_per_s == pytest.approx(100 / metrics.wall_s)
+        assert metrics.ok
+
+    def test_marks_failed_stage(self):
+        with pytest.raises(RuntimeError):
+            with measure("upload", "parcels") as metrics:
+                raise RuntimeError("boom")
+        assert not metrics.ok
+        assert metrics.wall_s > 0
+
+
+@pytest.fixture
+def report():
+    report = RunReport("extract")
+    report.add(
+        StageMetrics("download", "parcels", wall_s=2.0, cpu_s=0.5, bytes_in=1000),
+        StageMetrics("convert", "parcels", "boundaries", wall_s=4.0, cpu_s=3.5, bytes_out=800, features=400),
+        StageMetrics(
+            "convert", "parcels", 'odd "name"', wall_s=1.0, cpu_s=1.0, bytes_out=200, features=100,
+            transformer_cache_hits=3, transformer_cache_misses=1,
+        ),
+    )
+    report.failures = ["zoning/roads"]
+    return report
+
+
+class TestRunReport:
+    def test_totals_by_source_and_stage(self, report):
+        doc = report.to_dict()
+
+        assert doc["command"] == "extract"
+        assert doc["failures"] == ["zoning/roads"]
+        assert doc["sources"]["parcels"]["convert"] == {
+            "count": 2, "wall_s": 5.0, "cpu_s": 4.5, "bytes_out": 1000, "features": 500,
+            "transformer_cache_hits": 3, "transformer_cache_misses": 1,
+        }
+        assert doc["sources"]["parcels"]["download"]["bytes_in"] == 1000
+        assert doc["stages"][1]["features_per_s"] == 100.0
+        assert doc["stages"][0]["features_per_s"] is None
+
+    def test_prometheus_text(self, report):
+        text = report.to_prometheus()
+
+        assert "# TYPE rextag_stage_wall_seconds gauge" in text
+        assert (
+            'rextag_stage_features{command="extract",stage="convert",source="parcels",layer="boundaries"} 400'
+            in text
+        )
+        assert 'layer="odd \\"name\\""' in text
+        assert 'rextag_run_failures{command="extract"} 1' in text
+        # Stages without bytes in are not exported with a value.
+        assert text.count("rextag_stage_bytes_in{") == 1
+        assert 'rextag_stage_transformer_cache_misses{command="extract",stage="convert"' in text
+
+    def test_writes_json_or_prometheus_by_extension(self, report, tmp_path):
+        report.write(tmp_path / "run.json")
+        report.write(tmp_path / "metrics" / "rextag.prom")
+
+        assert json.loads((tmp_path / "run.json").read_text())["command"] == "extract"
+        assert (tmp_path / "metrics" / "rextag.prom").read_text().startswith("# HELP rextag_")
+        assert sorted(p.name for p in tmp_path.rglob("*") if p.is_file()) == ["rextag.prom", "run.json"]
@@ -0,0 +1,134 @@
+"""Tests for GeoParquet output."""
+
+import json
+import struct
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from rextag.config import OutputConfig  # noqa: E402
+from rextag.extract import extract_layer_to_jsonl, shard_path  # noqa: E402
+from rextag.parquet import arrow_schema, convert_features_to_batches, geometry_to_wkb, write_batches  # noqa: E402
+from rextag.sinks import RollingSink  # noqa: E402
+
+
+class TestGeometryToWkb:
+    def test_point(self):
+        wkb = geometry_to_wkb({"type": "Point", "coordinates": [1.0, 2.0]})
+        assert wkb == struct.pack("<BIdd", 1, 1, 1.0, 2.0)
+
+    def test_point_z(self):
+        wkb = geometry_to_wkb({"type": "Point", "coordinates": [1.0, 2.0, 3.0]})
+        assert wkb == struct.pack("<BIddd", 1, 1001, 1.0, 2.0, 3.0)
+
+    def test_polygon(self):
+        ring = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]
+        wkb = geometry_to_wkb({"type": "Polygon", "coordinates": [ring]})
+        expected = struct.pack("<BIII", 1, 3, 1, 4) + b"".join(struct.pack("<dd", *p) for p in ring)
+        assert wkb == expected
+
+    def test_multipolygon_parts_are_full_geometries(self):
+        ring = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]
+        polygon = geometry_to_wkb({"type": "Polygon", "coordinates": [ring]})
+        wkb = geometry_to_wkb({"type": "MultiPolygon", "coordinates": [[ring], [ring]]})
+        assert wkb == struct.pack("<BII", 1, 6, 2) + polygon + polygon
+
+    def test_geometry_collection(self):
+        point = {"type": "Point", "coordinates": [1.0, 2.0]}
+        wkb = geometry_to_wkb({"type": "GeometryCollection", "geometries": [point]})
+        assert wkb == struct.pack("<BII", 1, 7, 1) + geometry_to_wkb(point)
+
+
+class TestArrowSchema:
+    def test_types_follow_bigquery_mapping(self, sample_fiona_schema):
+        schema = arrow_schema(sample_fiona_schema)
+        assert schema.field("geometry").type == pa.binary()
+        assert schema.field("OBJECTID").type == pa.int64()
+        assert schema.field("AREA_SQFT").type == pa.float64()
+        assert schema.field("CREATED_DATE").type == pa.date32()
+        assert schema.field("_loaded_at").type == pa.timestamp("us", tz="UTC")
+
+        geo = json.loads(schema.metadata[b"geo"])
+        assert geo["primary_column"] == "geometry"
+        assert geo["columns"]["geometry"]["encoding"] == "WKB"
+
+    def test_no_geometry_layer_is_plain_parquet(self):
+        schema = arrow_schema({"geometry": "None", "properties": {"OWNER": "str"}})
+        assert "geometry" not in schema.names
+        assert schema.metadata is None
+
+
+class TestConvertFeaturesToBatches:
+    def test_batches_and_values(self, sample_feature, sample_fiona_schema):
+        features = [sample_feature] * 5
+        batches = list(convert_features_to_batches(
+            features, sample_fiona_schema, "EPSG:4326", "test.gdb", "parcels", batch_size=2
+        ))
+
+        assert [b.num_rows for b in batches] == [2, 2, 1]
+        row = pa.Table.from_batches(batches).to_pylist()[0]
+        assert row["geometry"] == geometry_to_wkb(sample_feature["geometry"])
+        assert str(row["CREATED_DATE"]) == "2024-01-15"
+        assert row["NOTES"] is None
+        assert row["_source_file"] == "test.gdb"
+        assert row["_layer_name"] == "parcels"
+
+
+class TestParquetExtract:
+    def test_extract_layer(self, sample_gdb, tmp_path):
+        output = OutputConfig(format="parquet", compression="zstd")
+        result = extract_layer_to_jsonl(sample_gdb, "parcels", tmp_path / "data.parquet", "sample", output=output)
+
+        table = pq.read_table(tmp_path / "data.parquet")
+        assert result.count == table.num_rows == 25
+        assert b"geo" in table.schema.metadata
+        wkb = table.column("geometry")[0].as_py()
+        _, geom_type = struct.unpack_from("<BI", wkb)
+        # First position follows the ring (and, for a MultiPolygon, polygon) headers.
+        lon, lat = struct.unpack_from("<dd", wkb, 13 if geom_type == 3 else 22)
+        assert -123 < lon < -121 and 37 < lat < 39
+
+    def test_extract_layer_without_geometry(self, sample_gdb, tmp_path):
+        output = OutputConfig(format="parquet")
+        result = extract_layer_to_jsonl(sample_gdb, "owners", tmp_path / "data.parquet", "sample", output=output)
+
+        table = pq.read_table(tmp_path / "data.parquet")
+        assert result.count == table.num_rows == 10
+        assert "geometry" not in table.column_names
+
+
+class TestRollingParquet:
+    def _batches(self, sizes):
+        schema = pa.schema([("n", pa.int64())])
+        start = 0
+        for size in sizes:
+            yield pa.record_batch([pa.array(range(start, start + size))], schema=schema)
+            start += size
+
+    def test_each_shard_is_a_complete_file(self, tmp_path):
+        sink = RollingSink(lambda n: shard_path(tmp_path / "data.parquet", n), max_rows=4, row_writes=False)
+
+        count = write_batches(self._batches([3, 3, 3]), pa.schema([("n", pa.int64())]), sink)
+        sink.close()
+
+        assert count == 9
+        tables = [pq.read_table(p) for p in sink.targets]
+        assert [t.num_rows for t in tables] == [4, 4, 1]
+        assert sum((t.column("n").to_pylist() for t in tables), []) == list(range(9))
+
+    def test_empty_output_is_one_empty_file(self, tmp_path):
+        sink = RollingSink(lambda n: shard_path(tmp_path / "data.parquet", n), max_rows=4, row_writes=False)
+
+        write_batches(iter([]), pa.schema([("n", pa.int64())]), sink)
+        sink.close()
+
+        assert [pq.read_table(p).num_rows for p in sink.targets] == [0]
+
+    def test_extract_layer_rolls_over(self, sample_gdb, tmp_path):
+        output = OutputConfig(format="parquet", shard_rows=10)
+        result = extract_layer_to_jsonl(sample_gdb, "parcels", tmp_path / "data.parquet", "sample", output=output)
+
+        assert [p.name for p in result.paths] == [f"data-{i:05d}.parquet" for i in range(3)]
+        assert [pq.read_table(p).num_rows for p in result.paths] == [10, 10, 5]
@@ -0,0 +1,558 @@
+"""Tests for rextag.pipeline."""
+
+import dataclasses
+import json
+import multiprocessing
+import os
+import signal
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from rextag import gcs
+from rextag import extract
+from rextag.config import GCSTransportConfig, OutputConfig, PipelineConfig, SourceConfig
+from rextag.metrics import RunReport
+from rextag.profiling import ProfileSettings, summarize
+from rextag.pipeline import ExtractScheduler, SchedulerLimits, convert_layer, upload_layer
+from rextag.state import load_state, save_state
+
+
+def _terminate_self() -> int:
+    os.kill(os.getpid(), signal.SIGTERM)
+    return os.getpid()
+
+
+@pytest.fixture
+def config():
+    return PipelineConfig.from_dict({
+        "gcs": {"staging_bucket": "test-staging", "staging_prefix": "staged/"},
+        "sources": [],
+    })
+
+
+class TestConvertLayer:
+    def test_converts_to_local_file(self, sample_gdb, tmp_path):
+        result = convert_layer(sample_gdb, "parcels", "parcels_src", tmp_path / "work")
+
+        assert result.ok
+        assert result.count == 25
+        assert result.ext == "geojsonl"
+        assert result.paths == [tmp_path / "work" / "parcels" / "data.geojsonl"]
+        assert json.loads(result.paths[0].read_text().splitlines()[0])["_layer_name"] == "parcels"
+        assert result.log[0] == "  Converting layer: parcels"
+
+    @patch("rextag.gcs.get_client")
+    def test_streams_to_staging_path(self, mock_get_client, sample_gdb, config, tmp_path):
+        result = convert_layer(sample_gdb, "parcels", "src", tmp_path / "work", config=config, data_drop="2026-01")
+
+        assert result.ok
+        assert result.paths == []
+        assert result.gcs_uris == ["gs://test-staging/staged/src/parcels/data_drop=2026-01/data.geojsonl"]
+        mock_get_client.return_value.bucket.return_value.blob.assert_called_once_with(
+            "staged/src/parcels/data_drop=2026-01/data.geojsonl"
+        )
+        assert not (tmp_path / "work").exists()
+
+    def test_records_staged_schema(self, sample_gdb, tmp_path):
+        result = convert_layer(sample_gdb, "owners", "src", tmp_path / "work", output=OutputConfig(format="parquet"))
+
+        assert [f["name"] for f in result.schema] == ["OWNER_NAME", "_loaded_at", "_source_file", "_layer_name"]
+        assert result.state().schema == result.schema
+
+    def test_profiles_conversion(self, sample_gdb, tmp_path):
+        settings = ProfileSettings(tmp_path / "profile")
+        settings.directory.mkdir()
+
+        result = convert_layer(sample_gdb, "parcels", "src", tmp_path / "work", profile=settings)
+
+        assert result.ok
+        assert "encode_features" in summarize(settings.directory)
+
+    def test_counts_transformer_cache_use(self, sample_gdb, tmp_path):
+        convert_layer(sample_gdb, "parcels", "src", tmp_path / "first")
+        (metrics,) = convert_layer(sample_gdb, "parcels", "src", tmp_path / "second").metrics
+
+        assert metrics.transformer_cache_misses == 0
+        assert metrics.transformer_cache_hits >= 1
+
+    def test_captures_errors(self, sample_gdb, tmp_path):
+        result = convert_layer(sample_gdb, "missing", "src", tmp_path / "work")
+        assert not result.ok
+        assert result.log[-1] == "    Failed: missing"
+
+    @patch("rextag.extract.MIN_SPLIT_FEATURES", 5)
+    def test_splits_into_shards(self, sample_gdb, tmp_path):
+        result = convert_layer(sample_gdb, "parcels", "src", tmp_path / "work", splits=3)
+        assert result.count == 25
+        assert [p.name for p in result.paths] == [f"data-{i:05d}.geojsonl" for i in range(3)]
+
+
+class TestUploadLayer:
+    @pytest.fixture(autouse=True)
+    def staging(self, fake_gcs):
+        return fake_gcs
+
+    @patch("rextag.pipeline.upload_to_gcs")
+    def test_uploads_and_removes_local_file(self, mock_upload, sample_gdb, config, tmp_path):
+        result = convert_layer(sample_gdb, "parcels", "src", tmp_path / "work")
+        local = result.paths[0]
+
+        result = upload_layer(result, config, "src", "2026-01")
+
+        assert result.ok
+        assert result.gcs_uris == ["gs://test-staging/staged/src/parcels/data_drop=2026-01/data.geojsonl"]
+        mock_upload.assert_called_once_with(local, result.gcs_uris[0])
+        assert not local.exists()
+        assert result.log[-1] == "    Done: parcels"
+
+    @patch("rextag.pipeline.upload_to_gcs")
+    @patch("rextag.extract.MIN_SPLIT_FEATURES", 5)
+    def test_uploads_shards(self, mock_upload, sample_gdb, config, tmp_path):
+        result = convert_layer(sample_gdb, "parcels", "src", tmp_path / "work", splits=3)
+        result = upload_layer(result, config, "src", "2026-01")
+        assert result.gcs_uris == [
+            f"gs://test-staging/staged/src/parcels/data_drop=2026-01/data-{i:05d}.geojsonl" for i in range(3)
+        ]
+
+    def test_skips_upload_of_staged_output(self, fake_gcs, sample_gdb, config, tmp_path):
+        loaded_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        first = convert_layer(sample_gdb, "parcels", "src", tmp_path / "a", loaded_at=loaded_at)
+        first = upload_layer(first, config, "src", "2026-01")
+        again = convert_layer(sample_gdb, "parcels", "src", tmp_path / "b", loaded_at=loaded_at)
+        local = again.paths[0]
+
+        with patch("rextag.pipeline.upload_to_gcs") as mock_upload:
+            again = upload_layer(again, config, "src", "2026-01", previous=first.state())
+
+        assert again.sha256 == first.sha256
+        assert again.gcs_uris == first.gcs_uris
+        mock_upload.assert_not_called()
+        assert not local.exists()
+        assert "    Unchanged output, upload skipped" in again.log
+
+    def test_reuploads_missing_staged_output(self, fake_gcs, sample_gdb, config, tmp_path):
+        loaded_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        first = convert_layer(sample_gdb, "owners", "src", tmp_path / "a", loaded_at=loaded_at)
+        first = upload_layer(first, config, "src", "2026-01")
+        fake_gcs.objects.clear()
+        again = convert_layer(sample_gdb, "owners", "src", tmp_path / "b", loaded_at=loaded_at)
+
+        with patch("rextag.pipeline.upload_to_gcs") as mock_upload:
+            upload_layer(again, config, "src", "2026-01", previous=first.state())
+        mock_upload.assert_called_once()
+
+    def test_removes_stale_shards(self, staging, sample_gdb, config, tmp_path):
+        for name in ("data-00000.geojsonl", "data-00001.geojsonl", "other/keep.txt"):
+            staging.objects[("test-staging", f"staged/src/parcels/data_drop=2026-01/{name}")] = b"old"
+
+        result = upload_layer(convert_layer(sample_gdb, "parcels", "src", tmp_path), config, "src", "2026-01")
+
+        assert result.ok
+        assert sorted(name for _, name in staging.objects) == [
+            "staged/src/parcels/data_drop=2026-01/data.geojsonl",
+            "staged/src/parcels/data_drop=2026-01/other/keep.txt",
+        ]
+        assert "    Removing 2 stale file(s) from an earlier run" in result.log
+
+    def test_reconverted_layer_resumes_composite_upload(self, fake_gcs, config, tmp_path):
+        import fiona
+
+        gdb_path = tmp_path / "notes.gdb"
+        with fiona.open(
+            gdb_path, "w", driver="OpenFileGDB", schema={"geometry": "None", "properties": {"TEXT": "str"}},
+            layer="notes",
+        ) as dst:
+            for i in range(300):
+                dst.write({"geometry": None, "properties": {"TEXT": f"{i:04d}" * 2000}})
+        gcs.configure(dataclasses.replace(config.transport, upload_part_mb=1, upload_parts=1, initial_backoff=0.01))
+        loaded_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        real_upload_part = gcs._upload_part
+
+        def interrupted(bucket, name, *args):
+            if not name.endswith("00000"):
+                raise ConnectionError("interrupted")
+            return real_upload_part(bucket, name, *args)
+
+        first = convert_layer(gdb_path, "notes", "src", tmp_path / "work", loaded_at=loaded_at)
+        with patch("rextag.gcs._upload_part", side_effect=interrupted):
+            assert not upload_layer(first, config, "src", "2026-01").ok
+
+        # A resumed extract converts the layer again, rewriting the same bytes.
+        again = convert_layer(gdb_path, "notes", "src", tmp_path / "work", loaded_at=loaded_at)
+        with patch("rextag.gcs._upload_part", wraps=real_upload_part) as resumed:
+            again = upload_layer(again, config, "src", "2026-01")
+
+        assert again.ok
+        sent = [c.args[1].rsplit("/", 1)[1] for c in resumed.call_args_list]
+        assert sent and "00000" not in sent
+        staged = fake_gcs.objects[("test-staging", "staged/src/notes/data_drop=2026-01/data.jsonl")]
+        assert len(staged.splitlines()) == 300
+
+    @patch("rextag.pipeline.upload_to_gcs")
+    def test_captures_errors(self, mock_upload, sample_gdb, config, tmp_path):
+        mock_upload.side_effect = RuntimeError("upload refused")
+        result = upload_layer(convert_layer(sample_gdb, "owners", "src", tmp_path), config, "src", "2026-01")
+        assert not result.ok
+        assert "upload refused" in result.error
+
+
+class TestExtractScheduler:
+    @pytest.fixture
+    def sources(self):
+        return [
+            SourceConfig(name=f"src{i}", uri=f"gs://bucket/data_drop=2026-01/src{i}.zip") for i in range(3)
+        ]
+
+    @pytest.fixture(autouse=True)
+    def source_zips(self, fake_gcs, sample_gdb_zip, sources):
+        for source in sources:
+            _, name = gcs.parse_uri(source.uri)
+            fake_gcs.objects[("bucket", name)] = Path(sample_gdb_zip).read_bytes()
+        return fake_gcs
+
+    @patch("rextag.pipeline.upload_to_gcs")
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_runs_all_sources(self, mock_download, mock_upload, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+        lines = []
+
+        scheduler = ExtractScheduler(config, SchedulerLimits(sources=2, conversions=2), echo=lines.append)
+        failed = scheduler.run(sources)
+
+        assert failed == []
+        uploaded = sorted(c.args[1] for c in mock_upload.call_args_list)
+        assert len(uploaded) == 6
+        assert "gs://test-staging/staged/src2/owners/data_drop=2026-01/data.jsonl" in uploaded
+        assert "[src0] Completed: src0" in lines
+
+    @patch("rextag.pipeline.upload_to_gcs")
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_extract_mode_reports_throughput(self, mock_download, mock_upload, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+        lines = []
+
+        failed = ExtractScheduler(config, gdb_mode="extract", echo=lines.append).run(sources[:1])
+
+        assert failed == []
+        assert any(line.startswith("  Extracted ") and line.endswith(" MB/s") for line in lines)
+        assert mock_upload.call_count == 2
+
+    @patch("rextag.pipeline.upload_to_gcs")
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_records_stage_metrics(self, mock_download, mock_upload, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+        report = RunReport("extract")
+
+        failed = ExtractScheduler(config, gdb_mode="extract", echo=lambda line: None, report=report).run(sources[:1])
+
+        assert failed == []
+        stages = {(m.stage, m.layer): m for m in report.stages}
+        assert sorted(stages) == sorted([
+            ("source", None), ("download", None), ("unzip", None),
+            ("convert", "parcels"), ("upload", "parcels"), ("convert", "owners"), ("upload", "owners"),
+        ])
+        assert stages[("download", None)].bytes_in == Path(sample_gdb_zip).stat().st_size
+        assert stages[("unzip", None)].bytes_out > 0
+        convert = stages[("convert", "parcels")]
+        assert convert.features == 25
+        assert convert.bytes_out == stages[("upload", "parcels")].bytes_out > 0
+        assert convert.cpu_s > 0 and convert.peak_rss_bytes > 0
+        assert all(m.ok and m.source == "src0" for m in report.stages)
+
+    @patch("rextag.pipeline.upload_to_gcs")
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_caps_concurrent_downloads(self, mock_download, mock_upload, sample_gdb_zip, config, sources):
+        active, peak = 0, 0
+        lock = threading.Lock()
+
+        def download(uri, dest):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            shutil.copy(sample_gdb_zip, dest)
+            with lock:
+                active -= 1
+
+        mock_download.side_effect = download
+        scheduler = ExtractScheduler(config, SchedulerLimits(sources=3, downloads=1), echo=lambda line: None)
+        assert scheduler.run(sources) == []
+        assert peak == 1
+
+    @patch("rextag.pipeline.upload_to_gcs")
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_failed_source_does_not_stop_others(self, mock_download, mock_upload, sample_gdb_zip, config, sources):
+        def download(uri, dest):
+            if "src1" in uri:
+                raise RuntimeError("download failed")
+            shutil.copy(sample_gdb_zip, dest)
+
+        mock_download.side_effect = download
+        lines = []
+        failed = ExtractScheduler(config, SchedulerLimits(sources=3), echo=lines.append).run(sources)
+
+        assert failed == ["src1"]
+        assert mock_upload.call_count == 4
+        block = "\n".join(lines)
+        assert "download failed" in block
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_records_manifest(self, mock_download, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+
+        assert ExtractScheduler(config, echo=lambda line: None).run(sources[:1]) == []
+
+        state = load_state(config.manifest_path("src0", "2026-01"))
+        assert state.complete
+        assert state.generation == 1
+        assert state.layers["parcels"].count == 25
+        assert state.layers["parcels"].uris == [
+            "gs://test-staging/staged/src0/parcels/data_drop=2026-01/data.geojsonl"
+        ]
+        assert len(state.layers["owners"].sha256) == 64
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_skips_unchanged_source(self, mock_download, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+        ExtractScheduler(config, echo=lambda line: None).run(sources[:1])
+        lines = []
+
+        assert ExtractScheduler(config, echo=lines.append).run(sources[:1]) == []
+
+        assert mock_download.call_count == 1
+        assert "  Unchanged since last extract (generation 1), skipping" in lines
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_restages_deleted_layer(self, mock_download, source_zips, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+        ExtractScheduler(config, echo=lambda line: None).run(sources[:1])
+        staged = ("test-staging", "staged/src0/owners/data_drop=2026-01/data.jsonl")
+        first = source_zips.objects.pop(staged)
+        loaded_at = load_state(config.manifest_path("src0", "2026-01")).loaded_at
+        lines = []
+
+        assert ExtractScheduler(config, echo=lines.append).run(sources[:1]) == []
+
+        assert "  Staged files missing for layer(s) owners, restaging" in lines
+        # parcels converts to the same bytes under the kept _loaded_at, so only owners is uploaded.
+        assert lines.count("    Unchanged output, upload skipped") == 1
+        assert source_zips.objects[staged] == first
+        state = load_state(config.manifest_path("src0", "2026-01"))
+        assert state.complete
+        assert state.loaded_at == loaded_at
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_identical_reupload_counts_as_unchanged(self, mock_download, source_zips, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+        ExtractScheduler(config, echo=lambda line: None).run(sources[:1])
+        source_zips.put("bucket", "data_drop=2026-01/src0.zip", Path(sample_gdb_zip).read_bytes())
+
+        assert ExtractScheduler(config, echo=lambda line: None).run(sources[:1]) == []
+        assert mock_download.call_count == 1
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_new_generation_is_extracted(self, mock_download, source_zips, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+        ExtractScheduler(config, echo=lambda line: None).run(sources[:1])
+        source_zips.put("bucket", "data_drop=2026-01/src0.zip", b"changed zip")
+
+        assert ExtractScheduler(config, echo=lambda line: None).run(sources[:1]) == []
+        assert mock_download.call_count == 2
+        assert load_state(config.manifest_path("src0", "2026-01")).generation == 2
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_force_reextracts(self, mock_download, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+        ExtractScheduler(config, echo=lambda line: None).run(sources[:1])
+
+        with patch("rextag.pipeline.upload_to_gcs") as mock_upload:
+            assert ExtractScheduler(config, force=True, echo=lambda line: None).run(sources[:1]) == []
+        assert mock_download.call_count == 2
+        assert mock_upload.call_count == 2
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_rerun_after_failure_skips_staged_layers(self, mock_download, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+
+        def upload(local, uri):
+            if "/owners/" in uri:
+                raise RuntimeError("upload refused")
+            gcs.upload(local, uri)
+
+        with patch("rextag.pipeline.upload_to_gcs", side_effect=upload):
+            assert ExtractScheduler(config, echo=lambda line: None).run(sources[:1]) == ["src0/owners"]
+        assert not load_state(config.manifest_path("src0", "2026-01")).complete
+
+        lines = []
+        with patch("rextag.pipeline.upload_to_gcs", wraps=gcs.upload) as mock_upload:
+            assert ExtractScheduler(config, echo=lines.append).run(sources[:1]) == []
+
+        assert [c.args[1] for c in mock_upload.call_args_list] == [
+            "gs://test-staging/staged/src0/owners/data_drop=2026-01/data.jsonl"
+        ]
+        assert "    Unchanged output, upload skipped" in lines
+        assert load_state(config.manifest_path("src0", "2026-01")).complete
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_rolled_layers_upload_shards_during_conversion(
+        self, mock_download, source_zips, sample_gdb_zip, config, sources
+    ):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+        config = dataclasses.replace(config, output=OutputConfig(shard_rows=10))
+
+        with patch("rextag.pipeline.upload_to_gcs") as mock_upload:
+            assert ExtractScheduler(config, echo=lambda line: None).run(sources[:1]) == []
+
+        mock_upload.assert_not_called()
+        staged = sorted(name for bucket, name in source_zips.objects if bucket == "test-staging" and "/data-" in name)
+        assert staged == [
+            "staged/src0/owners/data_drop=2026-01/data-00000.jsonl",
+            *[f"staged/src0/parcels/data_drop=2026-01/data-{i:05d}.geojsonl" for i in range(3)],
+        ]
+        state = load_state(config.manifest_path("src0", "2026-01"))
+        assert state.complete
+        assert state.layers["parcels"].count == 25
+        assert len(state.layers["parcels"].uris) == 3
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_checkpoints_after_each_layer(self, mock_download, sample_gdb_zip, config, sources):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+
+        layer_counts = []
+
+        def save(uri, state):
+            layer_counts.append(len(state.layers))
+            save_state(uri, state)
+
+        with patch("rextag.pipeline.save_state", side_effect=save):
+            ExtractScheduler(config, echo=lambda line: None).run(sources[:1])
+
+        assert layer_counts == [1, 2, 2]
+
+
+class TestResume:
+    @pytest.fixture
+    def source(self, fake_gcs, sample_gdb_zip):
+        fake_gcs.objects[("bucket", "data_drop=2026-01/src0.zip")] = Path(sample_gdb_zip).read_bytes()
+        return SourceConfig(name="src0", uri="gs://bucket/data_drop=2026-01/src0.zip")
+
+    @pytest.fixture
+    def crashed(self, source, sample_gdb_zip, config, tmp_path):
+        """Run once with the owners upload failing, leaving parcels checkpointed."""
+
+        def upload(local, uri):
+            if "/owners/" in uri:
+                raise ConnectionError("connection reset")
+            gcs.upload(local, uri)
+
+        with (
+            patch("rextag.pipeline.download_from_gcs", side_effect=lambda uri, dest: shutil.copy(sample_gdb_zip, dest)),
+            patch("rextag.pipeline.upload_to_gcs", side_effect=upload),
+        ):
+            scheduler = ExtractScheduler(config, work_dir=tmp_path / "work", echo=lambda line: None)
+            assert scheduler.run([source]) == ["src0/owners"]
+        return tmp_path / "work"
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_skips_checkpointed_layers_and_reuses_download(self, mock_download, crashed, source, config):
+        assert list(crashed.glob("src0/generation=1/src0.zip"))
+        lines = []
+
+        with patch("rextag.pipeline.upload_to_gcs", wraps=gcs.upload) as mock_upload:
+            scheduler = ExtractScheduler(config, resume=True, work_dir=crashed, echo=lines.append)
+            assert scheduler.run([source]) == []
+
+        mock_download.assert_not_called()
+        assert "  Skipping layer parcels: checkpointed with 25 rows" in lines
+        assert "  Converting layer: parcels" not in lines
+        assert [c.args[1] for c in mock_upload.call_args_list] == [
+            "gs://test-staging/staged/src0/owners/data_drop=2026-01/data.jsonl"
+        ]
+        state = load_state(config.manifest_path("src0", "2026-01"))
+        assert state.complete
+        assert set(state.layers) == {"parcels", "owners"}
+        assert not (crashed / "src0" / "generation=1").exists()
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_reconverts_layer_whose_objects_are_gone(self, mock_download, crashed, source, config, fake_gcs):
+        del fake_gcs.objects[("test-staging", "staged/src0/parcels/data_drop=2026-01/data.geojsonl")]
+        lines = []
+
+        ExtractScheduler(config, resume=True, work_dir=crashed, echo=lines.append).run([source])
+
+        assert "  Converting layer: parcels" in lines
+        assert ("test-staging", "staged/src0/parcels/data_drop=2026-01/data.geojsonl") in fake_gcs.objects
+
+    @patch("rextag.pipeline.download_from_gcs")
+    def test_without_resume_downloads_again(self, mock_download, crashed, source, sample_gdb_zip, config):
+        mock_download.side_effect = lambda uri, dest: shutil.copy(sample_gdb_zip, dest)
+        with patch("rextag.pipeline.upload_to_gcs"):
+            ExtractScheduler(config, work_dir=crashed, echo=lambda line: None).run([source])
+        mock_download.assert_called_once()
+
+    def test_reuses_extracted_geodatabase(self, source, sample_gdb_zip, config, tmp_path):
+        with (
+            patch("rextag.pipeline.download_from_gcs", side_effect=lambda uri, dest: shutil.copy(sample_gdb_zip, dest)),
+            patch("rextag.pipeline.upload_to_gcs", side_effect=ConnectionError("connection reset")),
+        ):
+            scheduler = ExtractScheduler(config, gdb_mode="extract", work_dir=tmp_path / "work", echo=lambda line: None)
+            scheduler.run([source])
+        lines = []
+
+        with patch("rextag.pipeline.download_from_gcs") as mock_download:
+            scheduler = ExtractScheduler(
+                config, gdb_mode="extract", resume=True, work_dir=tmp_path / "work", echo=lines.append
+            )
+            assert scheduler.run([source]) == []
+
+        mock_download.assert_not_called()
+        assert any(line.startswith("  Reusing extracted geodatabase") for line in lines)
+
+    def test_stop_finishes_current_layer_and_cancels_the_rest(
+        self, fake_gcs, source, sample_gdb_zip, config, tmp_path
+    ):
+        other = SourceConfig(name="src1", uri="gs://bucket/data_drop=2026-01/src1.zip")
+        lines = []
+        scheduler = ExtractScheduler(config, work_dir=tmp_path / "work", echo=lines.append)
+
+        def convert_then_stop(*args, **kwargs):
+            scheduler.stop()
+            return convert_layer(*args, **kwargs)
+
+        with (
+            patch("rextag.pipeline.download_from_gcs", side_effect=lambda uri, dest: shutil.copy(sample_gdb_zip, dest)),
+            patch("rextag.pipeline.convert_layer", side_effect=convert_then_stop) as mock_convert,
+        ):
+            assert scheduler.run([source, other]) == []
+
+        assert scheduler.stopped
+        assert mock_convert.call_count == 1
+        state = load_state(config.manifest_path("src0", "2026-01"))
+        assert not state.complete
+        assert len(state.layers) == 1
+        assert "Stopped: src0 (1 of 2 layers checkpointed)" in lines
+        assert load_state(config.manifest_path("src1", "2026-01")) is None
+        assert (tmp_path / "work" / "src0" / "generation=1" / "src0.zip").exists()
+
+    def test_workers_outlive_sigterm(self):
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=ctx, initializer=extract.init_worker, initargs=(GCSTransportConfig(),)
+        ) as pool:
+            first, second = pool.submit(_terminate_self).result(), pool.submit(_terminate_self).result()
+        assert first == second
+
+    @patch("rextag.extract.MIN_SPLIT_FEATURES", 5)
+    def test_split_range_workers_ignore_sigterm(self, sample_gdb, tmp_path):
+        with patch("rextag.extract.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool:
+            result = convert_layer(sample_gdb, "parcels", "src", tmp_path / "work", splits=3)
+
+        assert result.ok
+        assert pool.call_args.kwargs["initializer"] is extract.init_worker
@@ -0,0 +1,68 @@
+"""Tests for rextag.profiling."""
+
+import json
+
+import pytest
+from rextag.profiling import ProfileSettings, dump_name, prepare, profile_layer, summarize
+
+
+def _busy_layer_work():
+    return sorted(str(i) for i in range(20_000))
+
+
+class TestProfileLayer:
+    def test_writes_cprofile_dump(self, tmp_path):
+        with profile_layer(ProfileSettings(tmp_path), "parcels", "boundaries"):
+            _busy_layer_work()
+
+        assert [p.name for p in tmp_path.iterdir()] == ["parcels__boundaries.prof"]
+
+    def test_memory_dump(self, tmp_path):
+        with profile_layer(ProfileSettings(tmp_path, memory=True, top_allocations=5), "parcels", "boundaries"):
+            data = _busy_layer_work()
+
+        doc = json.loads((tmp_path / "parcels__boundaries.tracemalloc.json").read_text())
+        assert doc["peak_bytes"] > 0
+        assert 0 < len(doc["top"]) <= 5
+        assert any(site["file"] == __file__ for site in doc["top"])
+        assert data
+
+    def test_dumps_even_when_layer_fails(self, tmp_path):
+        with pytest.raises(ValueError):
+            with profile_layer(ProfileSettings(tmp_path), "parcels", "broken"):
+                raise ValueError("bad layer")
+        assert (tmp_path / "parcels__broken.prof").exists()
+
+    def test_disabled(self, tmp_path):
+        with profile_layer(None, "parcels", "boundaries"):
+            _busy_layer_work()
+
+    def test_dump_name_is_file_safe(self):
+        assert dump_name("parcels", "a/b c") == "parcels__a_b_c"
+
+
+class TestSummarize:
+    def test_merges_layers(self, tmp_path):
+        for layer in ("boundaries", "owners"):
+            with profile_layer(ProfileSettings(tmp_path, memory=True), "parcels", layer):
+                _busy_layer_work()
+
+        summary = summarize(tmp_path, top=5)
+
+        assert "Profiles: 2 layer(s)" in summary
+        assert "parcels__owners:" in summary
+        assert "_busy_layer_work" in summary
+        assert "Top 5 allocation sites, all layers:" in summary
+
+    def test_no_dumps(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            summarize(tmp_path)
+
+    def test_prepare_removes_earlier_dumps(self, tmp_path):
+        with profile_layer(ProfileSettings(tmp_path), "parcels", "boundaries"):
+            pass
+        (tmp_path / "notes.txt").write_text("keep")
+
+        prepare(tmp_path)
+
+        assert [p.name for p in tmp_path.iterdir()] == ["notes.txt"]
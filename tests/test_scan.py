@@ -1,5 +1,6 @@
 """Tests for rextag.scan."""
 
+import json
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -115,3 +116,137 @@ class TestInspectGeodatabase:
 
         assert result.layers[0].file_extension == "geojsonl"
         assert result.layers[1].file_extension == "jsonl"
+
+
+def _zip_gdb(gdb_path: Path, zip_path: Path, arcroot: str, filler: int = 0) -> bytes:
+    import os
+    import zipfile
+
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for f in sorted(gdb_path.iterdir()):
+            zf.write(f, f"{arcroot}{gdb_path.name}/{f.name}")
+        if filler:
+            zf.writestr("filler.bin", os.urandom(filler), compress_type=zipfile.ZIP_STORED)
+    return zip_path.read_bytes()
+
+
+@pytest.fixture
+def remote_zips(sample_gdb, tmp_path, monkeypatch):
+    """Zips served over HTTP by a fake GCS in a child process."""
+    from rextag import gcs
+    from rextag.config import GCSTransportConfig
+    from tests.fake_gcs import FakeGCSProcess
+
+    (tmp_path / "empty").mkdir()
+    objects = {
+        ("bucket", "drop/flat.zip"): _zip_gdb(sample_gdb, tmp_path / "flat.zip", "", filler=4_000_000),
+        ("bucket", "drop/nested.zip"): _zip_gdb(sample_gdb, tmp_path / "nested.zip", "export/data/"),
+        ("bucket", "other/empty.zip"): _zip_gdb(tmp_path / "empty", tmp_path / "empty.zip", ""),
+    }
+    server = FakeGCSProcess(objects).start()
+    monkeypatch.setenv("STORAGE_EMULATOR_HOST", server.url)
+    gcs.configure(GCSTransportConfig())
+    yield server
+    gcs.configure(GCSTransportConfig())
+    server.stop()
+
+
+class TestRemoteGeodatabase:
+    def _inspect(self, uri):
+        import fiona
+        from rextag import gcs
+        from rextag.extract import remote_geodatabase
+
+        with fiona.Env(**gcs.gdal_http_options()):
+            path = remote_geodatabase(uri)
+            return path, path and inspect_geodatabase(path, "sample")
+
+    def test_reads_schemas_with_range_requests(self, remote_zips, sample_gdb):
+        path, dataset = self._inspect("gs://bucket/drop/flat.zip")
+
+        assert path.startswith("/vsizip/{/vsicurl/")
+        assert path.endswith("}/sample.gdb")
+        assert dataset == inspect_geodatabase(sample_gdb, "sample")
+        assert remote_zips.stats()["bytes_sent"] < 400_000
+
+    def test_finds_nested_gdb(self, remote_zips):
+        path, dataset = self._inspect("gs://bucket/drop/nested.zip")
+
+        assert path.endswith("}/export/data/sample.gdb")
+        assert [layer.name for layer in dataset.layers] == ["parcels", "owners"]
+
+    def test_zip_without_gdb(self, remote_zips):
+        path, _ = self._inspect("gs://bucket/other/empty.zip")
+        assert path is None
+
+    def _scan(self, tmp_path, *args):
+        from click.testing import CliRunner
+        from rextag.cli import main
+
+        return CliRunner().invoke(main, [
+            "scan",
+            "--prefix", "gs://bucket/drop/",
+            "--output-dir", str(tmp_path / "dbt"),
+            "--staging-bucket", "staging",
+            "--catalog", str(tmp_path / "catalog.json"),
+            *args,
+        ])
+
+    def test_run_scan_does_not_download(self, remote_zips, tmp_path):
+        result = self._scan(tmp_path)
+
+        assert result.exit_code == 0, result.output
+        assert "Downloading" not in result.output
+        assert (tmp_path / "dbt" / "flat" / "_sources.yml").exists()
+        assert (tmp_path / "dbt" / "nested" / "_sources.yml").exists()
+        assert remote_zips.stats()["bytes_sent"] < 1_000_000
+
+    def test_metrics_out(self, remote_zips, tmp_path):
+        result = self._scan(tmp_path, "--metrics-out", str(tmp_path / "scan.json"))
+
+        assert result.exit_code == 0, result.output
+        report = json.loads((tmp_path / "scan.json").read_text())
+        assert report["command"] == "scan"
+        assert sorted(report["sources"]) == ["flat", "nested"]
+        assert set(report["sources"]["flat"]) == {"inspect", "generate"}
+
+    def test_rescan_skips_unchanged_zips(self, remote_zips, tmp_path):
+        assert self._scan(tmp_path).exit_code == 0
+        sources = tmp_path / "dbt" / "flat" / "_sources.yml"
+        mtime = sources.stat().st_mtime_ns
+        catalog_mtime = (tmp_path / "catalog.json").stat().st_mtime_ns
+        seen = len(remote_zips.stats()["requests"])
+
+        result = self._scan(tmp_path)
+
+        assert result.exit_code == 0, result.output
+        assert result.output.count("Unchanged since last scan") == 2
+        assert sources.stat().st_mtime_ns == mtime
+        assert (tmp_path / "catalog.json").stat().st_mtime_ns == catalog_mtime
+        new_requests = remote_zips.stats()["requests"][seen:]
+        assert not any(path.startswith("/download/") for _, path in new_requests)
+
+    def test_rescan_reads_new_generation(self, remote_zips, tmp_path):
+        assert self._scan(tmp_path).exit_code == 0
+        flat = tmp_path / "dbt" / "flat" / "_sources.yml"
+        mtime = flat.stat().st_mtime_ns
+        remote_zips.put("bucket", "drop/flat.zip", (tmp_path / "flat.zip").read_bytes())
+
+        result = self._scan(tmp_path)
+
+        assert result.exit_code == 0, result.output
+        assert "New generation 2, schema unchanged" in result.output
+        assert result.output.count("Unchanged since last scan") == 1
+        assert flat.stat().st_mtime_ns == mtime
+
+    def test_parallel_scan_matches_serial(self, remote_zips, tmp_path):
+        serial = self._scan(tmp_path / "serial")
+        parallel = self._scan(tmp_path / "parallel", "--jobs", "3")
+
+        assert parallel.exit_code == 0, parallel.output
+        assert parallel.output.replace(str(tmp_path / "parallel"), str(tmp_path / "serial")) == serial.output
+        serial_dbt, parallel_dbt = tmp_path / "serial" / "dbt", tmp_path / "parallel" / "dbt"
+        serial_files = sorted(p.relative_to(serial_dbt) for p in serial_dbt.rglob("*") if p.is_file())
+        assert serial_files == sorted(p.relative_to(parallel_dbt) for p in parallel_dbt.rglob("*") if p.is_file())
+        for rel in serial_files:
+            assert (parallel_dbt / rel).read_bytes() == (serial_dbt / rel).read_bytes()
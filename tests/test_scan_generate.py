@@ -2,6 +2,7 @@
 
 import yaml
 import pytest
+from rextag.config import OutputConfig
 from rextag.scan import LayerInfo, DatasetInfo, generate_sources_yml, generate_staging_sql
 
 
@@ -74,6 +75,47 @@ class TestGenerateSourcesYml:
         assert ext["options"]["json_extension"] == "GEOJSON"
         assert "hive_partition_uri_prefix" in ext["options"]
 
+    def test_location_covers_shards(self, dataset_with_geometry):
+        result = generate_sources_yml(
+            dataset_with_geometry,
+            staging_bucket="siteselect-dbt",
+            staging_prefix="staged",
+        )
+        ext = yaml.safe_load(result)["sources"][0]["tables"][0]["external"]
+        assert ext["location"] == "gs://siteselect-dbt/staged/county_parcels/parcels/*.geojsonl"
+        assert ext["options"]["hive_partition_uri_prefix"] == "gs://siteselect-dbt/staged/county_parcels/parcels/"
+
+    def test_gzip_output_location_and_compression(self, dataset_mixed):
+        gzip_output = OutputConfig(compression="gzip")
+        for layer in dataset_mixed.layers:
+            layer.output = gzip_output
+        result = generate_sources_yml(
+            dataset_mixed,
+            staging_bucket="siteselect-dbt",
+            staging_prefix="staged",
+        )
+        tables = {t["name"]: t["external"] for t in yaml.safe_load(result)["sources"][0]["tables"]}
+        assert tables["boundaries"]["location"].endswith("/boundaries/*.geojsonl.gz")
+        assert tables["boundaries"]["options"]["compression"] == "GZIP"
+        assert tables["boundaries"]["options"]["json_extension"] == "GEOJSON"
+        assert tables["owners"]["location"].endswith("/owners/*.jsonl.gz")
+        assert "json_extension" not in tables["owners"]["options"]
+
+    def test_parquet_output(self, dataset_mixed):
+        for layer in dataset_mixed.layers:
+            layer.output = OutputConfig(format="parquet", compression="zstd")
+        result = generate_sources_yml(
+            dataset_mixed,
+            staging_bucket="siteselect-dbt",
+            staging_prefix="staged",
+        )
+        tables = {t["name"]: t["external"] for t in yaml.safe_load(result)["sources"][0]["tables"]}
+        for name in ("boundaries", "owners"):
+            assert tables[name]["location"].endswith(f"/{name}/*.parquet")
+            assert tables[name]["options"]["format"] == "PARQUET"
+            assert "json_extension" not in tables[name]["options"]
+            assert "compression" not in tables[name]["options"]
+
     def test_columns_have_types(self, dataset_with_geometry):
         result = generate_sources_yml(
             dataset_with_geometry,
@@ -56,3 +56,9 @@ class TestBuildBqSchema:
 
         loaded_at = next(f for f in schema if f.name == "_loaded_at")
         assert loaded_at.field_type == "TIMESTAMP"
+
+    def test_geometry_type(self, sample_fiona_schema):
+        schema = build_bq_schema(sample_fiona_schema, geometry_type="BYTES")
+        assert (schema[0].name, schema[0].field_type) == ("geometry", "BYTES")
+        names = [f.name for f in build_bq_schema(sample_fiona_schema, geometry_type=None)]
+        assert "geometry" not in names
@@ -0,0 +1,222 @@
+"""Tests for rextag.sinks."""
+
+import gzip
+import threading
+from unittest.mock import patch
+
+import pytest
+from rextag.extract import extract_layer_to_jsonl, shard_path
+from rextag.sinks import GCSStreamSink, GzipBlockSink, LocalFileSink, RollingSink, open_sink
+
+CHUNK = 256 * 1024
+
+
+class FakeBlobWriter:
+    def __init__(self, fail_on_write: bool = False):
+        self.chunks = []
+        self.closed = False
+        self.fail_on_write = fail_on_write
+        self.thread = None
+
+    def write(self, data):
+        self.thread = threading.current_thread()
+        if self.fail_on_write:
+            raise ConnectionError("connection reset")
+        self.chunks.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBlob:
+    def __init__(self, writer):
+        self.writer = writer
+        self.open_kwargs = None
+
+    def open(self, mode, **kwargs):
+        assert mode == "wb"
+        self.open_kwargs = kwargs
+        return self.writer
+
+
+class TestLocalFileSink:
+    def test_writes_file(self, tmp_path):
+        sink = LocalFileSink(tmp_path / "out" / "data.jsonl")
+        sink.write(b"a\n")
+        sink.write(b"b\n")
+        sink.close()
+        assert (tmp_path / "out" / "data.jsonl").read_bytes() == b"a\nb\n"
+        assert sink.bytes_written == 4
+
+    def test_abort_removes_partial_file(self, tmp_path):
+        sink = LocalFileSink(tmp_path / "data.jsonl")
+        sink.write(b"partial")
+        sink.abort()
+        assert not (tmp_path / "data.jsonl").exists()
+
+
+class TestGCSStreamSink:
+    def test_uploads_fixed_size_chunks_in_background(self):
+        writer = FakeBlobWriter()
+        sink = GCSStreamSink("gs://bucket/data.jsonl", chunk_size=CHUNK, blob=FakeBlob(writer))
+        payload = bytes(range(256)) * 3000
+        for i in range(0, len(payload), 1000):
+            sink.write(payload[i:i + 1000])
+        sink.close()
+
+        assert b"".join(writer.chunks) == payload
+        assert all(len(c) == CHUNK for c in writer.chunks[:-1])
+        assert writer.closed
+        assert writer.thread is not threading.current_thread()
+        assert sink.bytes_written == len(payload)
+
+    def test_abort_does_not_finalize(self):
+        writer = FakeBlobWriter()
+        sink = GCSStreamSink("gs://bucket/data.jsonl", chunk_size=CHUNK, blob=FakeBlob(writer))
+        sink.write(b"x" * (CHUNK + 10))
+        sink.abort()
+        assert not writer.closed
+
+    def test_upload_error_surfaces_to_writer(self):
+        sink = GCSStreamSink("gs://bucket/data.jsonl", chunk_size=CHUNK, blob=FakeBlob(FakeBlobWriter(fail_on_write=True)))
+        with pytest.raises(RuntimeError, match="Streaming upload"):
+            for _ in range(50):
+                sink.write(b"x" * CHUNK)
+            sink.close()
+
+    def test_rejects_unaligned_chunk_size(self):
+        with pytest.raises(ValueError):
+            GCSStreamSink("gs://bucket/data.jsonl", chunk_size=1000, blob=FakeBlob(FakeBlobWriter()))
+
+
+class TestGzipBlockSink:
+    def test_multi_member_output_round_trips(self, tmp_path):
+        data = b"".join(b'{"row": %d}\n' % i for i in range(5000))
+        sink = GzipBlockSink(LocalFileSink(tmp_path / "data.jsonl.gz"), block_size=4096, workers=3)
+        for i in range(0, len(data), 1000):
+            sink.write(data[i:i + 1000])
+        sink.close()
+
+        assert sink.bytes_written == len(data)
+        assert sink.compressed_bytes == (tmp_path / "data.jsonl.gz").stat().st_size
+        assert gzip.decompress((tmp_path / "data.jsonl.gz").read_bytes()) == data
+
+    def test_output_is_deterministic(self, tmp_path):
+        for name in ("a.gz", "b.gz"):
+            sink = GzipBlockSink(LocalFileSink(tmp_path / name), block_size=1024, workers=2)
+            sink.write(b"x" * 10_000)
+            sink.close()
+        assert (tmp_path / "a.gz").read_bytes() == (tmp_path / "b.gz").read_bytes()
+
+    def test_abort_removes_file(self, tmp_path):
+        sink = GzipBlockSink(LocalFileSink(tmp_path / "data.jsonl.gz"), block_size=16)
+        sink.write(b"partial output " * 10)
+        sink.abort()
+        assert not (tmp_path / "data.jsonl.gz").exists()
+
+
+class TestRollingSink:
+    def _sink(self, tmp_path, **kwargs):
+        return RollingSink(lambda n: shard_path(tmp_path / "data.jsonl", n), **kwargs)
+
+    def test_rolls_over_at_row_limit(self, tmp_path):
+        closed = []
+        sink = self._sink(tmp_path, max_rows=2, on_close=closed.append)
+        for i in range(5):
+            sink.write(b'{"row": %d}\n' % i)
+        sink.close()
+
+        assert [p.name for p in sink.targets] == ["data-00000.jsonl", "data-00001.jsonl", "data-00002.jsonl"]
+        assert closed == sink.targets
+        assert [len(p.read_bytes().splitlines()) for p in sink.targets] == [2, 2, 1]
+
+    def test_rolls_over_at_size_without_splitting_rows(self, tmp_path):
+        sink = self._sink(tmp_path, max_bytes=25)
+        for i in range(6):
+            sink.write(b'{"row": %d}\n' % i)
+        sink.close()
+
+        assert [p.read_bytes().count(b"\n") for p in sink.targets] == [3, 3]
+
+    def test_no_empty_trailing_shard(self, tmp_path):
+        sink = self._sink(tmp_path, max_rows=2)
+        for i in range(4):
+            sink.write(b"row\n")
+        sink.close()
+        assert len(sink.targets) == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["data-00000.jsonl", "data-00001.jsonl"]
+
+    def test_empty_output_still_writes_one_shard(self, tmp_path):
+        sink = self._sink(tmp_path, max_rows=2)
+        sink.close()
+        assert [p.read_bytes() for p in sink.targets] == [b""]
+
+    def test_gzip_shards_are_complete_streams(self, tmp_path):
+        sink = RollingSink(lambda n: shard_path(tmp_path / "data.jsonl.gz", n), compression="gzip", max_rows=3)
+        for i in range(7):
+            sink.write(b"%d\n" % i)
+        sink.close()
+        assert [gzip.decompress(p.read_bytes()) for p in sink.targets] == [b"0\n1\n2\n", b"3\n4\n5\n", b"6\n"]
+
+    def test_abort_removes_only_the_open_shard(self, tmp_path):
+        sink = self._sink(tmp_path, max_rows=2)
+        for i in range(3):
+            sink.write(b"row\n")
+        sink.abort()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["data-00000.jsonl"]
+
+
+class TestOpenSink:
+    def test_local_path(self, tmp_path):
+        sink = open_sink(tmp_path / "data.jsonl")
+        assert isinstance(sink, LocalFileSink)
+        sink.close()
+
+    def test_gzip_wraps_sink(self, tmp_path):
+        sink = open_sink(tmp_path / "data.jsonl.gz", compression="gzip")
+        assert isinstance(sink, GzipBlockSink)
+        sink.close()
+
+    def test_rejects_unknown_compression(self, tmp_path):
+        with pytest.raises(ValueError):
+            open_sink(tmp_path / "data.jsonl.zst", compression="zstd")
+        assert list(tmp_path.iterdir()) == []
+
+    @patch("rextag.gcs.get_client")
+    def test_rejects_unknown_compression_before_starting_upload(self, mock_get_client):
+        with pytest.raises(ValueError):
+            open_sink("gs://bucket/staged/data.jsonl.zst", compression="zstd")
+        mock_get_client.assert_not_called()
+
+    @patch("rextag.gcs.get_client")
+    def test_gcs_uri(self, mock_get_client):
+        writer = FakeBlobWriter()
+        mock_get_client.return_value.bucket.return_value.blob.return_value = FakeBlob(writer)
+
+        sink = open_sink("gs://bucket/staged/data.jsonl")
+        sink.close()
+
+        assert isinstance(sink, GCSStreamSink)
+        mock_get_client.return_value.bucket.assert_called_once_with("bucket")
+        mock_get_client.return_value.bucket.return_value.blob.assert_called_once_with("staged/data.jsonl")
+        assert writer.closed
+
+
+class TestStreamingExtract:
+    @patch("rextag.gcs.get_client")
+    def test_streams_layer_without_local_file(self, mock_get_client, sample_gdb, tmp_path):
+        blobs = {}
+
+        def blob(name):
+            return blobs.setdefault(name, FakeBlob(FakeBlobWriter()))
+
+        mock_get_client.return_value.bucket.return_value.blob.side_effect = blob
+
+        output = extract_layer_to_jsonl(sample_gdb, "parcels", "gs://bucket/staged/data.geojsonl", "sample")
+
+        assert output.count == 25
+        assert output.paths == ["gs://bucket/staged/data.geojsonl"]
+        writer = blobs["staged/data.geojsonl"].writer
+        assert writer.closed
+        assert b"".join(writer.chunks).count(b"\n") == 25
+        assert not list(tmp_path.rglob("*.geojsonl"))
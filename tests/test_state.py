@@ -0,0 +1,59 @@
+"""Tests for rextag.state."""
+
+from rextag.state import LayerState, SourceState, files_sha256, load_state, save_state
+
+MANIFEST = "gs://staging/staged/parcels/_rextag_state/data_drop=2026-01.json"
+
+
+def _state(**overrides) -> SourceState:
+    fields = {
+        "source_uri": "gs://source/data_drop=2026-01/parcels.zip",
+        "generation": 7,
+        "md5": "abc==",
+        "loaded_at": "2026-01-01T00:00:00+00:00",
+        "output": {"format": "jsonl", "compression": "none", "json_encoder": "stdlib"},
+    }
+    return SourceState(**{**fields, **overrides})
+
+
+class TestManifest:
+    def test_round_trip(self, fake_gcs):
+        layers = {"parcels": LayerState(uris=["gs://staging/a.jsonl"], count=3, sha256="f")}
+        state = _state(complete=True, layers=layers)
+        save_state(MANIFEST, state)
+        assert load_state(MANIFEST) == state
+
+    def test_missing_manifest(self, fake_gcs):
+        assert load_state(MANIFEST) is None
+
+    def test_ignores_other_versions(self, fake_gcs):
+        fake_gcs.objects[("staging", "staged/parcels/_rextag_state/data_drop=2026-01.json")] = b'{"version": 0}'
+        assert load_state(MANIFEST) is None
+
+
+class TestMatches:
+    def test_same_generation(self):
+        state = _state()
+        assert state.matches(state.source_uri, 7, None, state.output)
+
+    def test_identical_reupload(self):
+        state = _state()
+        assert state.matches(state.source_uri, 8, "abc==", state.output)
+
+    def test_changed_zip(self):
+        state = _state()
+        assert not state.matches(state.source_uri, 8, "def==", state.output)
+
+    def test_changed_output_settings(self):
+        state = _state()
+        assert not state.matches(state.source_uri, 7, "abc==", {**state.output, "compression": "gzip"})
+
+
+class TestFilesSha256:
+    def test_depends_on_shard_boundaries(self, tmp_path):
+        (tmp_path / "a").write_bytes(b"ab")
+        (tmp_path / "b").write_bytes(b"c")
+        (tmp_path / "c").write_bytes(b"a")
+        (tmp_path / "d").write_bytes(b"bc")
+        assert files_sha256([tmp_path / "a", tmp_path / "b"]) == files_sha256([tmp_path / "a", tmp_path / "b"])
+        assert files_sha256([tmp_path / "a", tmp_path / "b"]) != files_sha256([tmp_path / "c", tmp_path / "d"])